@@ -1,22 +1,83 @@
-from .utils import distance
+from .config import CONFIG
+from .estimation import SlidingPolyFit
+from .history import TrackHistory
+from .utils import distance, smooth_path
+import numpy as np
 import time
 
+
+def detect_targets(frames):
+    """
+    Pick the highest point (largest z) of every LiDAR frame in one pass.
+
+    `frames` is either a single (N, 3) array, a stacked (F, N, 3) array or a
+    sequence of (N_i, 3) frames with different sizes. Returns an (F, 3) array
+    with one target per frame (F = 1 for a single frame).
+    """
+    if isinstance(frames, np.ndarray) and frames.ndim == 3:
+        stacked = np.asarray(frames, dtype=float)
+        if stacked.shape[1] == 0:
+            raise ValueError("Cannot detect a target in an empty frame.")
+        idx = np.argmax(stacked[:, :, 2], axis=1)
+        return stacked[np.arange(len(stacked)), idx]
+
+    if isinstance(frames, np.ndarray) and frames.ndim == 2:
+        frames = [frames]
+    frames = [np.asarray(frame, dtype=float).reshape(-1, 3) for frame in frames]
+    if len(frames) == 0 or any(len(frame) == 0 for frame in frames):
+        raise ValueError("Cannot detect a target in an empty frame.")
+
+    # Ragged frames: reduce each frame in place rather than concatenating
+    # them, the copy costs more than the argmax itself.
+    return np.array([frame[np.argmax(frame[:, 2])] for frame in frames])
+
+
 class SatelliteTracker:
-    def __init__(self):
-        self.history = []
+    def __init__(self, history_size=4096, fit_window=10, fit_degree=2):
+        self.history = TrackHistory(history_size)
+        self.estimator = SlidingPolyFit(fit_window, fit_degree)
 
     def process_lidar_frame(self, points):
         target = self.detect_target(points)
-        self.history.append((time.time(), target))
+        now = time.time()
+        self.history.append(now, target)
+        self.estimator.update(now, target)
         return target
 
+    def process_lidar_frames(self, frames, timestamps=None, frame_period=None):
+        """
+        Detect the target of many frames at once and record them in the history.
+        `timestamps` (one per frame) default to a grid `frame_period` seconds
+        apart (1 / lidar_refresh_rate) ending at the current time; pass the
+        capture times when replaying recorded frames.
+        """
+        targets = detect_targets(frames)
+        if timestamps is None:
+            if frame_period is None:
+                frame_period = 1.0 / CONFIG["lidar_refresh_rate"]
+            timestamps = time.time() - frame_period * np.arange(len(targets) - 1, -1, -1)
+        elif len(timestamps) != len(targets):
+            raise ValueError("Expected one timestamp per frame.")
+        self.history.extend(timestamps, targets)
+        self.estimator.extend(timestamps[-self.estimator.window:], targets[-self.estimator.window:])
+        return targets
+
     def detect_target(self, points):
-        return max(points, key=lambda p: p[2])
+        return tuple(detect_targets(np.asarray(points, dtype=float).reshape(-1, 3))[0].tolist())
 
     def calculate_trajectory(self):
-        if len(self.history) < 2:
+        estimate = self.estimate_trajectory()
+        if estimate is None:
             return None
-        (t1, p1), (t2, p2) = self.history[-2:]
-        dt = t2 - t1
-        velocity = [(p2[i] - p1[i]) / dt for i in range(3)]
-        return velocity
+        return estimate.velocity.tolist()
+
+    def estimate_trajectory(self):
+        """
+        Position, velocity and acceleration (with covariance) at the latest
+        sample, from a least-squares fit over the last `fit_window` samples.
+        """
+        return self.estimator.estimate()
+
+    def smoothed_path(self, window=3, samples=None):
+        _, points = self.history.window(samples)
+        return smooth_path(points, window)
@@ -0,0 +1,124 @@
+from collections import namedtuple
+import numpy as np
+
+from .history import TrackHistory
+
+TrajectoryEstimate = namedtuple(
+    "TrajectoryEstimate",
+    ["time", "position", "velocity", "acceleration", "covariance", "samples"],
+)
+TrajectoryEstimate.__doc__ = """
+State at `time` from a least-squares fit. `covariance[axis]` is the 3x3
+covariance of (position, velocity, acceleration) along that axis; it is NaN
+while the window holds no more samples than the fit has coefficients.
+"""
+
+
+class SlidingPolyFit:
+    """
+    Least-squares polynomial fit over the last `window` samples of a track.
+
+    Keeps running sums of t^k and t^k * x so every new sample costs O(1):
+    the incoming sample is added, the one leaving the window is subtracted.
+    Times and positions are taken relative to a reference sample which is
+    moved forward (and the sums rebuilt) once per window to keep the
+    higher-order sums well conditioned over long runs.
+    """
+
+    def __init__(self, window=10, degree=2):
+        if window < 2:
+            raise ValueError("Window must hold at least 2 samples.")
+        if degree not in (1, 2):
+            raise ValueError("Degree must be 1 (velocity) or 2 (acceleration).")
+        self.window = int(window)
+        self.degree = degree
+        self._samples = TrackHistory(self.window)
+        self._t_ref = 0.0
+        self._x_ref = np.zeros(3)
+        self._since_rebase = 0
+        self._reset_sums()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def _reset_sums(self):
+        self._s = np.zeros(5)          # sum tau^k, k = 0..4
+        self._b = np.zeros((3, 3))     # sum tau^k * x, k = 0..2
+        self._q = np.zeros(3)          # sum x^2
+
+    def _accumulate(self, t, point, sign):
+        tau = t - self._t_ref
+        x = point - self._x_ref
+        powers = tau ** np.arange(5)
+        self._s += sign * powers
+        self._b += sign * np.outer(powers[:3], x)
+        self._q += sign * x * x
+
+    def _rebase(self):
+        times, points = self._samples.window()
+        self._t_ref = times[-1]
+        self._x_ref = points[-1].copy()
+        tau = times - self._t_ref
+        x = points - self._x_ref
+        powers = tau[:, None] ** np.arange(5)
+        self._s = powers.sum(axis=0)
+        self._b = powers[:, :3].T @ x
+        self._q = (x * x).sum(axis=0)
+        self._since_rebase = 0
+
+    def update(self, t, point):
+        point = np.asarray(point, dtype=float)
+        if len(self._samples) == self.window:
+            times, points = self._samples.window(self.window)
+            self._accumulate(times[0], points[0], -1.0)
+        if len(self._samples) == 0:
+            self._t_ref = t
+            self._x_ref = point.copy()
+        self._samples.append(t, point)
+        self._accumulate(t, point, 1.0)
+        self._since_rebase += 1
+        if self._since_rebase >= self.window:
+            self._rebase()
+
+    def extend(self, times, points):
+        for t, point in zip(np.asarray(times, dtype=float), np.asarray(points, dtype=float)):
+            self.update(t, point)
+
+    def estimate(self):
+        n = len(self._samples)
+        if n < 2:
+            return None
+        p = min(self.degree, n - 1) + 1
+        s = self._s
+        normal = np.array([[s[i + j] for j in range(p)] for i in range(p)])
+        try:
+            normal_inv = np.linalg.inv(normal)
+        except np.linalg.LinAlgError:
+            return None                                     # all samples share one timestamp
+        beta = normal_inv @ self._b[:p]                     # (p, 3)
+
+        t_last, x_last = self._samples.latest()
+        tau = t_last - self._t_ref
+        jac = np.array([
+            [1.0, tau, tau * tau],
+            [0.0, 1.0, 2.0 * tau],
+            [0.0, 0.0, 2.0],
+        ])[:, :p]
+        state = jac @ beta                                  # rows: pos, vel, acc
+
+        if n > p:
+            rss = np.maximum(self._q - np.einsum("ka,ka->a", beta, self._b[:p]), 0.0)
+            sigma2 = rss / (n - p)
+        else:
+            sigma2 = np.full(3, np.nan)
+        cov_state = jac @ normal_inv @ jac.T
+        covariance = sigma2[:, None, None] * cov_state[None, :, :]
+
+        return TrajectoryEstimate(
+            time=t_last,
+            position=state[0] + self._x_ref,
+            velocity=state[1],
+            acceleration=state[2],
+            covariance=covariance,
+            samples=n,
+        )
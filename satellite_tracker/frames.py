@@ -0,0 +1,104 @@
+import numpy as np
+
+# WGS-84 ellipsoid
+WGS84_A = 6378.137                # km
+WGS84_F = 1.0 / 298.257223563
+WGS84_E2 = WGS84_F * (2.0 - WGS84_F)
+
+# Ground station used throughout the project: Sofia, Bulgaria (deg, deg, km)
+SOFIA = (42.7, 23.3, 0.0)
+
+
+def gmst(jd, fr=0.0):
+    """
+    Greenwich mean sidereal time in radians (IAU-82, UT1 taken as UTC) for
+    Julian dates split as `jd + fr`. Vectorized over both arguments.
+    """
+    tut1 = ((np.asarray(jd, dtype=float) - 2451545.0) + fr) / 36525.0
+    seconds = (67310.54841 + (876600.0 * 3600.0 + 8640184.812866) * tut1
+               + 0.093104 * tut1 ** 2 - 6.2e-6 * tut1 ** 3)
+    return np.mod(seconds * (2.0 * np.pi / 86400.0), 2.0 * np.pi)
+
+
+def teme_to_ecef(r_teme, jd, fr=0.0):
+    """
+    Rotate TEME positions (..., 3) into the Earth-fixed frame at the given
+    epochs (polar motion neglected). Epochs broadcast against r_teme[..., 0].
+    """
+    r = np.asarray(r_teme, dtype=float)
+    theta = gmst(jd, fr)
+    c, s = np.cos(theta), np.sin(theta)
+    out = np.empty(np.broadcast_shapes(r.shape, np.shape(theta) + (3,)))
+    out[..., 0] = c * r[..., 0] + s * r[..., 1]
+    out[..., 1] = -s * r[..., 0] + c * r[..., 1]
+    out[..., 2] = r[..., 2]
+    return out
+
+
+def geodetic_to_ecef(lat, lon, alt=0.0):
+    """Earth-fixed position (km) of a WGS-84 site given in degrees and km."""
+    phi, lam = np.radians(lat), np.radians(lon)
+    n = WGS84_A / np.sqrt(1.0 - WGS84_E2 * np.sin(phi) ** 2)
+    return np.stack([
+        (n + alt) * np.cos(phi) * np.cos(lam),
+        (n + alt) * np.cos(phi) * np.sin(lam),
+        (n * (1.0 - WGS84_E2) + alt) * np.sin(phi),
+    ], axis=-1)
+
+
+def _rotate_to_enu(d, lat, lon):
+    phi, lam = np.radians(lat), np.radians(lon)
+    sp, cp, sl, cl = np.sin(phi), np.cos(phi), np.sin(lam), np.cos(lam)
+    enu = np.empty(d.shape)
+    enu[..., 0] = -sl * d[..., 0] + cl * d[..., 1]
+    enu[..., 1] = -sp * cl * d[..., 0] - sp * sl * d[..., 1] + cp * d[..., 2]
+    enu[..., 2] = cp * cl * d[..., 0] + cp * sl * d[..., 1] + sp * d[..., 2]
+    return enu
+
+
+def ecef_to_enu(r_ecef, observer):
+    """
+    East/north/up components (..., 3) of Earth-fixed positions relative to
+    an `observer` given as (lat deg, lon deg, alt km).
+    """
+    lat, lon, alt = observer
+    d = np.asarray(r_ecef, dtype=float) - geodetic_to_ecef(lat, lon, alt)
+    return _rotate_to_enu(d, lat, lon)
+
+
+def ecef_to_sez(r_ecef, observer):
+    """South/east/zenith components (..., 3), the topocentric frame of Vallado."""
+    enu = ecef_to_enu(r_ecef, observer)
+    return np.stack([-enu[..., 1], enu[..., 0], enu[..., 2]], axis=-1)
+
+
+def enu_to_azel(enu):
+    """Azimuth (deg from north, clockwise), elevation (deg) and norm of ENU vectors."""
+    horizontal = np.hypot(enu[..., 0], enu[..., 1])
+    azimuth = np.degrees(np.arctan2(enu[..., 0], enu[..., 1])) % 360.0
+    elevation = np.degrees(np.arctan2(enu[..., 2], horizontal))
+    return azimuth, elevation, np.sqrt(horizontal ** 2 + enu[..., 2] ** 2)
+
+
+def look_angles(r_teme, jd, fr, observer):
+    """
+    Azimuth (deg from north, clockwise), elevation (deg) and range (km) of
+    TEME positions as seen from `observer` at the given epochs.
+    """
+    return enu_to_azel(ecef_to_enu(teme_to_ecef(r_teme, jd, fr), observer))
+
+
+def radec_to_azel(ra, dec, jd, fr, observer):
+    """
+    Azimuth and elevation (deg) of a direction at infinity given by right
+    ascension and declination (deg) of date, e.g. the vernal point at (0, 0).
+    Precession from J2000 is neglected (under 0.4 deg this decade) and there
+    is no parallax, so only the observer's latitude and longitude matter.
+    """
+    ra, dec = np.radians(ra), np.radians(dec)
+    direction = np.stack(np.broadcast_arrays(
+        np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)), axis=-1)
+    lat, lon, _ = observer
+    enu = _rotate_to_enu(teme_to_ecef(direction, jd, fr), lat, lon)
+    azimuth, elevation, _ = enu_to_azel(enu)
+    return azimuth, elevation
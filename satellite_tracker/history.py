@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class TrackHistory:
+    """
+    Fixed-capacity ring buffer of timestamped (x, y, z) samples.
+
+    Samples live in contiguous float64 arrays that are written twice (at slot
+    i and i + capacity), so the most recent `n` samples are always one
+    contiguous slice and `window()` can hand out views instead of copies.
+    """
+
+    def __init__(self, capacity=4096):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1.")
+        self.capacity = int(capacity)
+        self._times = np.zeros(2 * self.capacity)
+        self._points = np.zeros((2 * self.capacity, 3))
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, t, point):
+        i = self._head
+        self._times[i] = self._times[i + self.capacity] = t
+        self._points[i] = self._points[i + self.capacity] = point
+        self._head = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def extend(self, times, points):
+        times = np.asarray(times, dtype=float)
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if len(times) != len(points):
+            raise ValueError("Expected one timestamp per point.")
+        n = len(times)
+        if n > self.capacity:
+            # Only the newest samples survive, skip writing the rest.
+            self._head = (self._head + n - self.capacity) % self.capacity
+            self._count = self.capacity
+            times, points, n = times[-self.capacity:], points[-self.capacity:], self.capacity
+        idx = (self._head + np.arange(n)) % self.capacity
+        self._times[idx] = self._times[idx + self.capacity] = times
+        self._points[idx] = self._points[idx + self.capacity] = points
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    def window(self, n=None):
+        """
+        Return read-only views `(times, points)` of the newest `n` samples
+        (all stored samples by default), oldest first.
+        """
+        n = self._count if n is None else min(int(n), self._count)
+        end = self._head + self.capacity
+        times = self._times[end - n:end]
+        points = self._points[end - n:end]
+        times.flags.writeable = False
+        points.flags.writeable = False
+        return times, points
+
+    @property
+    def times(self):
+        return self.window()[0]
+
+    @property
+    def points(self):
+        return self.window()[1]
+
+    def latest(self):
+        if self._count == 0:
+            raise IndexError("History is empty.")
+        i = (self._head - 1) % self.capacity
+        return self._times[i], self._points[i]
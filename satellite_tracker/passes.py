@@ -0,0 +1,137 @@
+import numpy as np
+from sgp4.api import SatrecArray
+
+from .frames import look_angles
+from .propagation import epoch_grid, load_satellites, propagate
+
+RISE, CULMINATION, SET = 0, 1, 2
+EVENT_NAMES = ("rise", "culmination", "set")
+
+PASS_EVENT_DTYPE = np.dtype([
+    ("satellite", "i4"),    # index into the catalog passed in
+    ("satnum", "i4"),
+    ("event", "i1"),        # RISE, CULMINATION or SET
+    ("jd", "f8"),
+    ("fr", "f8"),
+    ("azimuth", "f8"),      # deg
+    ("elevation", "f8"),    # deg
+    ("range", "f8"),        # km
+])
+
+
+def _look(satellites, sat_idx, jd, fr, observer):
+    """Look angles of satellite `sat_idx[i]` at epoch `jd[i] + fr[i]`."""
+    r = np.full((len(sat_idx), 3), np.nan)
+    for s in np.unique(sat_idx):
+        rows = np.flatnonzero(sat_idx == s)
+        errors, positions, _ = satellites[s].sgp4_array(jd[rows], fr[rows])
+        positions[errors != 0] = np.nan
+        r[rows] = positions
+    az, el, rng = look_angles(r, jd, fr, observer)
+    return az, np.where(np.isnan(el), -90.0, el), rng
+
+
+def _refine_crossings(satellites, sat_idx, jd, fr_lo, fr_hi, observer, min_elevation, rising, tolerance):
+    """Bisect [fr_lo, fr_hi] brackets (days) down to `tolerance` seconds."""
+    span = np.max(fr_hi - fr_lo, initial=0.0) * 86400.0
+    for _ in range(int(np.ceil(np.log2(max(span / tolerance, 1.0))))):
+        mid = 0.5 * (fr_lo + fr_hi)
+        _, el, _ = _look(satellites, sat_idx, jd, mid, observer)
+        above = el >= min_elevation
+        # A rising bracket keeps the sample below the horizon in fr_lo.
+        move_hi = above == rising
+        fr_hi = np.where(move_hi, mid, fr_hi)
+        fr_lo = np.where(move_hi, fr_lo, mid)
+    return fr_hi if rising else fr_lo
+
+
+def _refine_maxima(satellites, sat_idx, jd, fr_lo, fr_hi, observer, tolerance):
+    """Bisect on the sign of the elevation rate to find each culmination."""
+    h = 0.5 * tolerance / 86400.0
+    span = np.max(fr_hi - fr_lo, initial=0.0) * 86400.0
+    for _ in range(int(np.ceil(np.log2(max(span / tolerance, 1.0))))):
+        mid = 0.5 * (fr_lo + fr_hi)
+        _, el_before, _ = _look(satellites, sat_idx, jd, mid - h, observer)
+        _, el_after, _ = _look(satellites, sat_idx, jd, mid + h, observer)
+        climbing = el_after > el_before
+        fr_lo = np.where(climbing, mid, fr_lo)
+        fr_hi = np.where(climbing, fr_hi, mid)
+    return 0.5 * (fr_lo + fr_hi)
+
+
+def predict_passes(satellites, observer, start, duration, step=60.0,
+                   min_elevation=0.0, tolerance=0.1):
+    """
+    Rise, culmination and set events of every satellite over `observer`
+    (lat deg, lon deg, alt km) between `start` and `start + duration` seconds.
+
+    The whole catalog is first sampled every `step` seconds in one vectorized
+    propagation; horizon crossings and elevation maxima bracketed by those
+    samples are then refined by bisection to `tolerance` seconds. Passes
+    shorter than `step` can be missed, so keep `step` below the shortest pass
+    of interest. Passes already in progress at `start` (or still in progress
+    at the end) have no rise (or set) event, and a culmination only if their
+    highest point falls inside the window. Returns a PASS_EVENT_DTYPE
+    array sorted by time.
+    """
+    satellites = load_satellites(satellites)
+    jd, fr = epoch_grid(start, duration, step)
+    # Keep one whole-day reference so brackets can be bisected on `fr` alone.
+    fr = fr + (jd - jd[0])
+    jd0 = jd[0]
+    eph = propagate(SatrecArray(satellites), np.full(len(fr), jd0), fr)
+    _, elevation, _ = look_angles(eph.positions, jd0, fr, observer)
+    visible = np.where(eph.failed, False, elevation >= min_elevation)
+
+    # Visible runs per satellite as [first, end) sample indices.
+    padded = np.zeros((len(satellites), len(fr) + 2), dtype=np.int8)
+    padded[:, 1:-1] = visible
+    edges = np.diff(padded, axis=1)
+    run_sat, run_first = np.nonzero(edges == 1)
+    _, run_end = np.nonzero(edges == -1)
+
+    n_samples = len(fr)
+    events = []
+
+    def add(kind, sat_idx, event_fr):
+        if len(sat_idx) == 0:
+            return
+        event_jd = np.full(len(sat_idx), jd0)
+        az, el, rng = _look(satellites, sat_idx, event_jd, event_fr, observer)
+        table = np.zeros(len(sat_idx), dtype=PASS_EVENT_DTYPE)
+        table["satellite"] = sat_idx
+        table["satnum"] = [satellites[s].satnum for s in sat_idx]
+        table["event"] = kind
+        whole = np.floor(event_fr)
+        table["jd"] = event_jd + whole
+        table["fr"] = event_fr - whole
+        table["azimuth"], table["elevation"], table["range"] = az, el, rng
+        events.append(table)
+
+    rises = run_first > 0
+    sat_idx = run_sat[rises]
+    add(RISE, sat_idx, _refine_crossings(
+        satellites, sat_idx, np.full(len(sat_idx), jd0),
+        fr[run_first[rises] - 1], fr[run_first[rises]],
+        observer, min_elevation, True, tolerance))
+
+    sets = run_end < n_samples
+    sat_idx = run_sat[sets]
+    add(SET, sat_idx, _refine_crossings(
+        satellites, sat_idx, np.full(len(sat_idx), jd0),
+        fr[run_end[sets] - 1], fr[run_end[sets]],
+        observer, min_elevation, False, tolerance))
+
+    peaks = np.array([first + np.argmax(elevation[s, first:end])
+                      for s, first, end in zip(run_sat, run_first, run_end)], dtype=np.intp)
+    # A pass already descending at the start (or still climbing at the end)
+    # peaks on the window edge; that is no culmination, only an edge sample.
+    inside = (peaks > 0) & (peaks < n_samples - 1)
+    peaks, sat_idx = peaks[inside], run_sat[inside]
+    add(CULMINATION, sat_idx, _refine_maxima(
+        satellites, sat_idx, np.full(len(sat_idx), jd0), fr[peaks - 1], fr[peaks + 1], observer, tolerance))
+
+    if not events:
+        return np.zeros(0, dtype=PASS_EVENT_DTYPE)
+    table = np.concatenate(events)
+    return table[np.lexsort((table["event"], table["fr"], table["jd"]))]
@@ -0,0 +1,60 @@
+from collections import namedtuple
+import datetime as dt
+import numpy as np
+from sgp4.api import Satrec, SatrecArray, jday
+
+Ephemeris = namedtuple("Ephemeris", ["positions", "velocities", "failed", "error_codes"])
+Ephemeris.__doc__ = """
+SGP4 output for S satellites at T epochs: TEME `positions` (km) and
+`velocities` (km/s) of shape (S, T, 3), a boolean `failed` mask of shape
+(S, T) and the raw SGP4 `error_codes` behind it. Failed entries are NaN.
+"""
+
+
+def load_satellites(tles):
+    """
+    Build Satrec objects from (line1, line2) pairs; Satrec objects are
+    passed through unchanged.
+    """
+    return [tle if isinstance(tle, Satrec) else Satrec.twoline2rv(tle[0], tle[1]) for tle in tles]
+
+
+def epoch_grid(start, duration, step):
+    """
+    Julian dates `(jd, fr)` from `start` over `duration` seconds every `step`
+    seconds. `start` is a UTC datetime or a `(jd, fr)` pair.
+    """
+    if isinstance(start, dt.datetime):
+        start = jday(start.year, start.month, start.day, start.hour, start.minute,
+                     start.second + start.microsecond * 1e-6)
+    jd0, fr0 = start
+    fr = fr0 + np.arange(0.0, duration + 0.5 * step, step) / 86400.0
+    whole = np.floor(fr)
+    return jd0 + whole, fr - whole
+
+
+def propagate(satellites, jd, fr):
+    """
+    Propagate every satellite to every epoch in one vectorized SGP4 call.
+    Returns an `Ephemeris` with (satellites x epochs x 3) arrays.
+    """
+    if not isinstance(satellites, SatrecArray):
+        satellites = SatrecArray(load_satellites(satellites))
+    jd = np.ravel(np.asarray(jd, dtype=float))
+    fr = np.ravel(np.asarray(fr, dtype=float))
+    codes, positions, velocities = satellites.sgp4(jd, fr)
+    return Ephemeris(positions, velocities, codes != 0, codes)
+
+
+def iter_propagate(satellites, jd, fr, chunk_size=3600):
+    """
+    Like `propagate` but yields `(first_epoch_index, Ephemeris)` for
+    `chunk_size` epochs at a time, so a day at one-second resolution for a
+    large catalog never has to be held in memory at once.
+    """
+    if not isinstance(satellites, SatrecArray):
+        satellites = SatrecArray(load_satellites(satellites))
+    jd = np.ravel(np.asarray(jd, dtype=float))
+    fr = np.ravel(np.asarray(fr, dtype=float))
+    for start in range(0, len(jd), chunk_size):
+        yield start, propagate(satellites, jd[start:start + chunk_size], fr[start:start + chunk_size])
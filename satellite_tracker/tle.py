@@ -1,3 +1,49 @@
+import hashlib
+import json
+import math
+import os
+import struct
+import numpy as np
+from sgp4.api import Satrec, WGS72, jday
+
+TLE_LINE_LENGTH = 69
+
+# Columnar layout of a parsed catalog, one record per satellite. Units follow
+# the TLE text: angles in degrees, mean motion in rev/day, its derivatives in
+# rev/day^2 (already halved) and rev/day^3 (already divided by six).
+TLE_DTYPE = np.dtype([
+    ("name", "S24"),
+    ("satnum", "i4"),
+    ("classification", "S1"),
+    ("intl_designator", "S8"),
+    ("epoch_year", "i2"),
+    ("epoch_day", "f8"),
+    ("mean_motion_dot", "f8"),
+    ("mean_motion_ddot", "f8"),
+    ("bstar", "f8"),
+    ("ephemeris_type", "i1"),
+    ("element_number", "i2"),
+    ("inclination", "f8"),
+    ("raan", "f8"),
+    ("eccentricity", "f8"),
+    ("arg_perigee", "f8"),
+    ("mean_anomaly", "f8"),
+    ("mean_motion", "f8"),
+    ("rev_number", "i4"),
+])
+
+# Binary cache layout: magic, little-endian uint32 header length, JSON
+# header, zero padding up to CACHE_ALIGN, then `count` raw TLE_DTYPE records.
+CACHE_MAGIC = b"FMSTLE01"
+CACHE_ALIGN = 64
+CACHE_SUFFIX = ".tlecache"
+
+# Alpha-5 catalog numbers replace the leading digit by a letter (I and O unused).
+_ALPHA5 = np.zeros(256, dtype=np.int32)
+_ALPHA5[ord("0"):ord("9") + 1] = np.arange(10)
+for _value, _letter in enumerate("ABCDEFGHJKLMNPQRSTUVWXYZ", start=10):
+    _ALPHA5[ord(_letter)] = _value
+
 def parse_tle_line2(line2):
     """
     Extracts 5 orbital parameters from TLE Line 2.
@@ -16,6 +62,434 @@ def parse_tle_line2(line2):
         "Mean Anomaly (deg)": mean_anomaly
     }
 
+
+def tle_checksum(line):
+    """
+    Modulo-10 checksum of the first 68 columns of a TLE line
+    (digits count their value, '-' counts 1, everything else 0).
+    """
+    return sum(int(c) if c.isdigit() else 1 if c == "-" else 0 for c in line[:68]) % 10
+
+
+def iter_tle_records(lines):
+    """
+    Yield `(name, line1, line2)` from an iterable of text lines in either
+    3-line (name first) or 2-line format; `name` is "" for 2-line records.
+    """
+    name = ""
+    line1 = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        if line.startswith("1 ") and line1 is None:
+            line1 = line
+        elif line.startswith("2 ") and line1 is not None:
+            yield name, line1, line
+            name, line1 = "", None
+        else:
+            name = line[2:].strip() if line.startswith("0 ") else line.strip()
+            line1 = None
+
+
+def _checksums_ok(raw):
+    digits = (raw[:, :68] >= ord("0")) & (raw[:, :68] <= ord("9"))
+    values = np.where(digits, raw[:, :68] - ord("0"), 0) + (raw[:, :68] == ord("-"))
+    return values.sum(axis=1) % 10 == raw[:, 68].astype(np.int64) - ord("0")
+
+
+def _text(raw, start, stop):
+    return np.ascontiguousarray(raw[:, start:stop]).view(f"S{stop - start}").ravel()
+
+
+def _column(raw, start, stop):
+    col = _text(raw, start, stop)
+    blank = (raw[:, start:stop] == ord(" ")).all(axis=1)
+    if blank.any():
+        col = col.copy()
+        col[blank] = b"0"
+    return col
+
+
+def _float(raw, start, stop):
+    return _column(raw, start, stop).astype(np.float64)
+
+
+def _int(raw, start, stop):
+    return _column(raw, start, stop).astype(np.int64)
+
+
+def _implied_decimal(raw, start):
+    """Fields like ' -11606-4' meaning -0.11606e-4 (sign, 5 digits, exponent)."""
+    sign = np.where(raw[:, start] == ord("-"), -1.0, 1.0)
+    mantissa = _int(raw, start + 1, start + 6) * 1e-5
+    exponent = _int(raw, start + 6, start + 8)
+    return sign * mantissa * 10.0 ** exponent
+
+
+def parse_tle_catalog(source, validate=True, strict=False):
+    """
+    Parse a TLE catalog into a structured array with TLE_DTYPE.
+
+    `source` is a path, an open text file or an iterable of lines (use
+    `text.splitlines()` for an in-memory string); 2-line and
+    3-line records may be mixed. With `validate`, records whose line numbers,
+    catalog numbers or checksums do not match are dropped (or raise
+    ValueError when `strict`). Lines are only collected while streaming, all
+    fields are then sliced out column-wise with NumPy.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="ascii", errors="replace") as f:
+            return parse_tle_catalog(f, validate, strict)
+
+    names, lines1, lines2 = [], [], []
+    for name, line1, line2 in iter_tle_records(source):
+        names.append(name.encode("ascii", "replace"))
+        lines1.append(line1.ljust(TLE_LINE_LENGTH)[:TLE_LINE_LENGTH])
+        lines2.append(line2.ljust(TLE_LINE_LENGTH)[:TLE_LINE_LENGTH])
+
+    catalog = np.zeros(len(names), dtype=TLE_DTYPE)
+    if not names:
+        return catalog
+    raw1 = np.frombuffer("".join(lines1).encode("ascii", "replace"), dtype=np.uint8).reshape(-1, TLE_LINE_LENGTH)
+    raw2 = np.frombuffer("".join(lines2).encode("ascii", "replace"), dtype=np.uint8).reshape(-1, TLE_LINE_LENGTH)
+
+    satnum = _ALPHA5[raw1[:, 2]] * 10000 + _int(raw1, 3, 7)
+    if validate:
+        ok = (
+            _checksums_ok(raw1) & _checksums_ok(raw2)
+            & (satnum == _ALPHA5[raw2[:, 2]] * 10000 + _int(raw2, 3, 7))
+        )
+        if not ok.all():
+            if strict:
+                bad = int(np.flatnonzero(~ok)[0])
+                raise ValueError(f"Invalid TLE record #{bad}: {lines1[bad]!r}")
+            raw1, raw2, satnum = raw1[ok], raw2[ok], satnum[ok]
+            names = [n for n, keep in zip(names, ok) if keep]
+            catalog = catalog[ok]
+
+    year = _int(raw1, 18, 20)
+    catalog["name"] = names
+    catalog["satnum"] = satnum
+    catalog["classification"] = _text(raw1, 7, 8)
+    catalog["intl_designator"] = np.char.strip(_text(raw1, 9, 17))
+    catalog["epoch_year"] = np.where(year < 57, 2000 + year, 1900 + year)
+    catalog["epoch_day"] = _float(raw1, 20, 32)
+    catalog["mean_motion_dot"] = _float(raw1, 33, 43)
+    catalog["mean_motion_ddot"] = _implied_decimal(raw1, 44)
+    catalog["bstar"] = _implied_decimal(raw1, 53)
+    catalog["ephemeris_type"] = _int(raw1, 62, 63)
+    catalog["element_number"] = _int(raw1, 64, 68)
+    catalog["inclination"] = _float(raw2, 8, 16)
+    catalog["raan"] = _float(raw2, 17, 25)
+    catalog["eccentricity"] = _int(raw2, 26, 33) * 1e-7
+    catalog["arg_perigee"] = _float(raw2, 34, 42)
+    catalog["mean_anomaly"] = _float(raw2, 43, 51)
+    catalog["mean_motion"] = _float(raw2, 52, 63)
+    catalog["rev_number"] = _int(raw2, 63, 68)
+    return catalog
+
+
+def satrecs_from_catalog(catalog, whichconst=WGS72):
+    """
+    Initialise one Satrec per catalog record, ready for propagation.
+    """
+    xpdotp = 1440.0 / (2.0 * math.pi)  # rev/day per rad/min
+    deg = math.pi / 180.0
+    satrecs = []
+    for rec in catalog:
+        jd, fr = jday(int(rec["epoch_year"]), 1, 1, 0, 0, 0)
+        epoch = (jd - 2433281.5) + fr + float(rec["epoch_day"]) - 1.0
+        sat = Satrec()
+        sat.sgp4init(
+            whichconst, "i", int(rec["satnum"]), epoch,
+            float(rec["bstar"]),
+            float(rec["mean_motion_dot"]) / (xpdotp * 1440.0),
+            float(rec["mean_motion_ddot"]) / (xpdotp * 1440.0 * 1440.0),
+            float(rec["eccentricity"]),
+            float(rec["arg_perigee"]) * deg,
+            float(rec["inclination"]) * deg,
+            float(rec["mean_anomaly"]) * deg,
+            float(rec["mean_motion"]) / xpdotp,
+            float(rec["raan"]) * deg,
+        )
+        satrecs.append(sat)
+    return satrecs
+
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_info(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": _file_digest(path)}
+
+
+def write_catalog_cache(catalog, path, source=None, validate=True):
+    """
+    Write `catalog` to a binary cache file that `open_catalog_cache` can map
+    without copying. `source` is the text file it was parsed from; its size,
+    mtime and hash are stored so stale caches can be detected.
+    """
+    catalog = np.ascontiguousarray(catalog, dtype=TLE_DTYPE)
+    _write_cache(catalog, path, validate, _source_info(source) if source is not None else None)
+
+
+def _write_cache(catalog, path, validate, source_info):
+    header = {
+        "dtype": str(TLE_DTYPE.descr),
+        "count": len(catalog),
+        "validate": bool(validate),
+        "source": source_info,
+    }
+    blob = json.dumps(header).encode("ascii")
+    offset = len(CACHE_MAGIC) + 4 + len(blob)
+    padding = -offset % CACHE_ALIGN
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(CACHE_MAGIC)
+        f.write(struct.pack("<I", len(blob)))
+        f.write(blob)
+        f.write(b"\0" * padding)
+        f.write(catalog.tobytes())
+    os.replace(tmp_path, path)  # readers never see a half-written cache
+
+
+def _read_cache_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+            raise ValueError(f"{path} is not a TLE catalog cache.")
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length))
+    offset = len(CACHE_MAGIC) + 4 + length
+    header["length"] = length
+    header["offset"] = offset + (-offset % CACHE_ALIGN)
+    if header["dtype"] != str(TLE_DTYPE.descr):
+        raise ValueError(f"{path} was written with a different record layout.")
+    return header
+
+
+def open_catalog_cache(path):
+    """
+    Map a cache file written by `write_catalog_cache` as a read-only
+    structured array (numpy.memmap) without parsing or copying it.
+    """
+    header = _read_cache_header(path)
+    if header["count"] == 0:
+        return np.zeros(0, dtype=TLE_DTYPE)
+    return np.memmap(path, dtype=TLE_DTYPE, mode="r", offset=header["offset"], shape=(header["count"],))
+
+
+def _update_cache_source(path, header, stat):
+    """
+    Record the source's current size and mtime in the cache header in place,
+    padding the JSON to its old length so the records do not move. Falls
+    back to rewriting the whole cache when the new header does not fit.
+    """
+    source = dict(header["source"], size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    fields = {key: value for key, value in header.items() if key not in ("length", "offset")}
+    blob = json.dumps(dict(fields, source=source)).encode("ascii")
+    if len(blob) > header["length"]:
+        _write_cache(np.array(open_catalog_cache(path)), path, header["validate"], source)
+        return
+    with open(path, "r+b") as f:
+        f.seek(len(CACHE_MAGIC) + 4)
+        f.write(blob.ljust(header["length"]))
+
+
+def _cache_is_fresh(header, source, validate, cache_path=None):
+    info = header.get("source")
+    if info is None or header.get("validate") != bool(validate):
+        return False
+    stat = os.stat(source)
+    if stat.st_size != info["size"]:
+        return False
+    if stat.st_mtime_ns == info["mtime_ns"]:
+        return True
+    # Touched but maybe not edited: only then pay for hashing the text.
+    if _file_digest(source) != info["sha1"]:
+        return False
+    if cache_path is not None:
+        try:
+            _update_cache_source(cache_path, header, stat)  # so the next load skips the hash
+        except OSError:
+            pass
+    return True
+
+
+def load_tle_catalog(source, cache_path=None, validate=True):
+    """
+    Load a TLE text file through its binary cache (`<source>.tlecache` by
+    default). The cache is rebuilt when the text file's size, mtime or
+    content hash no longer match; otherwise it is memory-mapped directly.
+    """
+    if cache_path is None:
+        cache_path = os.fspath(source) + CACHE_SUFFIX
+    try:
+        if _cache_is_fresh(_read_cache_header(cache_path), source, validate, cache_path):
+            return open_catalog_cache(cache_path)
+    except (OSError, ValueError, KeyError):
+        pass  # missing, foreign or corrupt cache: rebuild below
+
+    catalog = parse_tle_catalog(source, validate)
+    try:
+        write_catalog_cache(catalog, cache_path, source, validate)
+    except OSError:
+        return catalog  # read-only location, keep working from memory
+    return open_catalog_cache(cache_path)
+
+
+ALPHA5_MAX = 339999  # Z9999, the largest catalog number the 5-column field holds
+
+
+def _alpha5(satnum):
+    if satnum < 100000:
+        return "%05d" % satnum
+    return "ABCDEFGHJKLMNPQRSTUVWXYZ"[satnum // 10000 - 10] + "%04d" % (satnum % 10000)
+
+
+def _exponent_field(values, zero_exponent):
+    """
+    Split values for the ' 12345-5' style fields (0.12345e-5) into sign,
+    5-digit mantissa and signed exponent, all vectorized.
+    """
+    values = np.asarray(values, dtype=float)
+    magnitude = np.abs(values)
+    exponent = np.zeros(len(values), dtype=np.int64)
+    nonzero = magnitude > 0
+    exponent[nonzero] = np.floor(np.log10(magnitude[nonzero])).astype(np.int64) + 1
+    mantissa = np.rint(magnitude * 10.0 ** (5 - exponent)).astype(np.int64)
+    carry = mantissa >= 100000                 # e.g. 0.999995 rounds up to 1.0000
+    mantissa[carry] = np.rint(mantissa[carry] / 10.0).astype(np.int64)
+    exponent[carry] += 1
+    sign = np.where(values < 0, "-", " ")
+    exp_sign = np.where(exponent < 0, "-", "+")
+    exp_sign[exponent == 0] = zero_exponent
+    return sign.tolist(), mantissa.tolist(), exp_sign.tolist(), np.abs(exponent).tolist()
+
+
+def satrecs_to_catalog(satrecs, names=None):
+    """
+    Gather Satrec objects into a TLE_DTYPE array (the inverse of
+    `satrecs_from_catalog`), e.g. to export freshly fitted orbits.
+    """
+    xpdotp = 1440.0 / (2.0 * math.pi)
+    rad = 180.0 / math.pi
+    catalog = np.zeros(len(satrecs), dtype=TLE_DTYPE)
+    if names is not None:
+        catalog["name"] = [n.encode("ascii", "replace") for n in names]
+    year = np.array([sat.epochyr % 100 for sat in satrecs], dtype=np.int64)
+    catalog["satnum"] = [sat.satnum for sat in satrecs]
+    catalog["classification"] = [(getattr(sat, "classification", "U").strip() or "U").encode() for sat in satrecs]
+    catalog["intl_designator"] = [getattr(sat, "intldesg", "").encode() for sat in satrecs]
+    catalog["epoch_year"] = np.where(year < 57, 2000 + year, 1900 + year)
+    catalog["epoch_day"] = [sat.epochdays for sat in satrecs]
+    catalog["mean_motion_dot"] = [sat.ndot * xpdotp * 1440.0 for sat in satrecs]
+    catalog["mean_motion_ddot"] = [sat.nddot * xpdotp * 1440.0 * 1440.0 for sat in satrecs]
+    catalog["bstar"] = [sat.bstar for sat in satrecs]
+    catalog["ephemeris_type"] = [getattr(sat, "ephtype", 0) for sat in satrecs]
+    catalog["element_number"] = [getattr(sat, "elnum", 0) for sat in satrecs]
+    catalog["inclination"] = [sat.inclo * rad for sat in satrecs]
+    catalog["raan"] = [sat.nodeo * rad for sat in satrecs]
+    catalog["eccentricity"] = [sat.ecco for sat in satrecs]
+    catalog["arg_perigee"] = [sat.argpo * rad for sat in satrecs]
+    catalog["mean_anomaly"] = [sat.mo * rad for sat in satrecs]
+    catalog["mean_motion"] = [sat.no_kozai * xpdotp for sat in satrecs]
+    catalog["rev_number"] = [getattr(sat, "revnum", 0) for sat in satrecs]
+    return catalog
+
+
+_LINE1 = "1 %5s%s %-8s %02d%012.8f %s.%08d %s%05d%s%d %s%05d%s%d %d %4d"
+_LINE2 = "2 %5s %8.4f %8.4f %07d %8.4f %8.4f %11.8f%5d"
+
+
+def _encode_lines(catalog):
+    """Fixed-column line 1 / line 2 text of every record, checksums included."""
+    n = len(catalog)
+    out_of_range = (catalog["satnum"] < 0) | (catalog["satnum"] > ALPHA5_MAX)
+    if out_of_range.any():
+        bad = int(np.flatnonzero(out_of_range)[0])
+        raise ValueError(f"Catalog number {int(catalog['satnum'][bad])} of record #{bad} does not fit "
+                         f"the Alpha-5 field (0 to {ALPHA5_MAX}).")
+    satnum = [_alpha5(num) for num in catalog["satnum"].tolist()]
+    ndot = np.asarray(catalog["mean_motion_dot"], dtype=float)
+    ndot_sign = np.where(ndot < 0, "-", " ").tolist()
+    ndot_digits = np.rint(np.abs(ndot) * 1e8).astype(np.int64).tolist()
+    nddot = _exponent_field(catalog["mean_motion_ddot"], "-")
+    bstar = _exponent_field(catalog["bstar"], "+")
+
+    line1 = "".join(
+        _LINE1 % row for row in zip(
+            satnum,
+            np.char.decode(catalog["classification"], "ascii").tolist(),
+            np.char.decode(catalog["intl_designator"], "ascii").tolist(),
+            (catalog["epoch_year"] % 100).tolist(), catalog["epoch_day"].tolist(),
+            ndot_sign, ndot_digits, *nddot, *bstar,
+            catalog["ephemeris_type"].tolist(), catalog["element_number"].tolist(),
+        )
+    )
+    line2 = "".join(
+        _LINE2 % row for row in zip(
+            satnum,
+            catalog["inclination"].tolist(), catalog["raan"].tolist(),
+            np.rint(np.asarray(catalog["eccentricity"]) * 1e7).astype(np.int64).tolist(),
+            catalog["arg_perigee"].tolist(), catalog["mean_anomaly"].tolist(),
+            catalog["mean_motion"].tolist(), catalog["rev_number"].tolist(),
+        )
+    )
+    lines = []
+    for text in (line1, line2):
+        if len(text) != n * (TLE_LINE_LENGTH - 1):
+            raise ValueError("A TLE field does not fit its columns; check the element ranges.")
+        raw = np.frombuffer(text.encode("ascii"), dtype=np.uint8).reshape(n, TLE_LINE_LENGTH - 1)
+        out = np.empty((n, TLE_LINE_LENGTH + 1), dtype=np.uint8)
+        out[:, :-2] = raw
+        digits = (raw >= ord("0")) & (raw <= ord("9"))
+        checksum = (np.where(digits, raw - ord("0"), 0).sum(axis=1) + (raw == ord("-")).sum(axis=1)) % 10
+        out[:, -2] = checksum + ord("0")
+        out[:, -1] = ord("\n")
+        lines.append(out)
+    return lines
+
+
+def format_tle_catalog(records, names=True):
+    """
+    Encode a TLE_DTYPE array (or a sequence of Satrec objects) as TLE text in
+    one pass. Records with a name get a name line when `names` is true.
+    """
+    catalog = records if isinstance(records, np.ndarray) else satrecs_to_catalog(list(records))
+    if len(catalog) == 0:
+        return ""
+    line1, line2 = _encode_lines(catalog)
+    body = np.concatenate([line1, line2], axis=1).tobytes().decode("ascii")
+    if not names or not catalog["name"].any():
+        return body
+    width = 2 * (TLE_LINE_LENGTH + 1)
+    parts = []
+    for i, name in enumerate(catalog["name"].tolist()):
+        if name:
+            parts.append(name.decode("ascii", "replace") + "\n")
+        parts.append(body[i * width:(i + 1) * width])
+    return "".join(parts)
+
+
+def format_tle(satrec):
+    """Line 1 and line 2 of a single Satrec."""
+    line1, line2 = format_tle_catalog([satrec]).splitlines()
+    return line1, line2
+
+
+def export_tle_catalog(records, path, names=True):
+    """Write `format_tle_catalog(records, names)` to `path` in a single write."""
+    with open(path, "w", encoding="ascii", newline="\n") as f:
+        f.write(format_tle_catalog(records, names))
+
+
 def main():
     print("📥 Paste the full TLE block (3 lines). When you're done, type 'done' and press Enter.\n")
 
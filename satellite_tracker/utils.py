@@ -3,10 +3,131 @@ import numpy as np
 def distance(p1, p2):
     return np.linalg.norm(np.array(p1) - np.array(p2))
 
+def distances_to(point, points, out=None):
+    """
+    Distances from one point to every row of an (N, 3) array. Pass a
+    preallocated float64 `out` of length N to avoid allocating per call.
+    """
+    points = np.asarray(points, dtype=float)
+    diff = points - np.asarray(point, dtype=float)
+    np.multiply(diff, diff, out=diff)
+    out = np.sum(diff, axis=1, out=out)
+    return np.sqrt(out, out=out)
+
+def pairwise_distances(a, b, chunk_size=1024, out=None):
+    """
+    (M, N) distance matrix between the rows of `a` and `b`, computed
+    `chunk_size` rows of `a` at a time so temporaries stay at chunk_size x N.
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if out is None:
+        out = np.empty((len(a), len(b)))
+    b_sq = np.einsum("ij,ij->i", b, b)
+    for start in range(0, len(a), chunk_size):
+        block = a[start:start + chunk_size]
+        dst = out[start:start + len(block)]
+        np.dot(block, b.T, out=dst)
+        dst *= -2.0
+        dst += b_sq
+        dst += np.einsum("ij,ij->i", block, block)[:, None]
+        np.maximum(dst, 0.0, out=dst)
+        np.sqrt(dst, out=dst)
+    return out
+
+def nearest_neighbors(queries, points, chunk_size=1024):
+    """
+    For each row of `queries`, the index of and distance to the closest row
+    of `points`. Works in chunks so the full distance matrix is never held.
+    """
+    queries = np.asarray(queries, dtype=float)
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        raise ValueError("Cannot search an empty point set.")
+    indices = np.empty(len(queries), dtype=np.intp)
+    dists = np.empty(len(queries))
+    buf = np.empty((min(chunk_size, len(queries)), len(points)))
+    for start in range(0, len(queries), chunk_size):
+        block = queries[start:start + chunk_size]
+        d = pairwise_distances(block, points, chunk_size, out=buf[:len(block)])
+        idx = np.argmin(d, axis=1)
+        indices[start:start + len(block)] = idx
+        dists[start:start + len(block)] = d[np.arange(len(block)), idx]
+    return indices, dists
+
+def moving_average(points, window=3):
+    """
+    Moving average of an (N, D) track over `window` samples in O(N) using a
+    cumulative sum. Returns an (N - window + 1, D) array.
+    """
+    points = np.asarray(points, dtype=float)
+    if window < 1:
+        raise ValueError("Window must be at least 1.")
+    if len(points) < window:
+        return points[:0].copy()
+    # Centering first keeps the prefix sums small on long tracks.
+    offset = points[0]
+    csum = np.empty((len(points) + 1,) + points.shape[1:])
+    csum[0] = 0.0
+    np.cumsum(points - offset, axis=0, out=csum[1:])
+    smoothed = csum[window:] - csum[:-window]
+    smoothed /= window
+    smoothed += offset
+    return smoothed
+
 def smooth_path(points, window=3):
     if len(points) < window:
-        return points
-    return [
-        tuple(np.mean(points[i:i+window], axis=0))
-        for i in range(len(points) - window + 1)
-    ]
+        return np.asarray(points, dtype=float)
+    return moving_average(points, window)
+
+class MovingAverage:
+    """
+    Streaming moving average fed one point at a time.
+
+    The window and running sum are preallocated; `push` updates them in place
+    and writes the current mean into `value` (a reused array), so the hot loop
+    does not allocate. The sum is rebuilt from the window once per wrap-around
+    to stop rounding errors from piling up.
+    """
+
+    def __init__(self, window=3, dim=3):
+        if window < 1:
+            raise ValueError("Window must be at least 1.")
+        self.window = int(window)
+        self._buf = np.zeros((self.window, dim))
+        self._sum = np.zeros(dim)
+        self.value = np.zeros(dim)
+        self._i = 0
+        self._count = 0
+
+    @property
+    def ready(self):
+        return self._count >= self.window
+
+    def push(self, point):
+        """Add a point; return `value` once the window is full, else None."""
+        slot = self._buf[self._i]
+        self._sum -= slot
+        slot[:] = point
+        self._sum += slot
+        self._i += 1
+        if self._i == self.window:
+            self._i = 0
+            np.sum(self._buf, axis=0, out=self._sum)
+        if self._count < self.window:
+            self._count += 1
+            if self._count < self.window:
+                return None
+        np.divide(self._sum, self.window, out=self.value)
+        return self.value
+
+def smooth_stream(points, window=3, dim=3):
+    """
+    Generator version of `smooth_path` for live or very long tracks: yields
+    one smoothed tuple per input point once `window` points have been seen.
+    """
+    smoother = MovingAverage(window, dim)
+    for point in points:
+        value = smoother.push(point)
+        if value is not None:
+            yield tuple(value.tolist())
@@ -1,135 +1,128 @@
-import threading
-from time import sleep
-from time import time
 import sys
 import os
+from statistics import fmean, median
+import numpy as np
 import stepper
-import RPi.GPIO as GPIO
 import globalsConfig as gv
-from utils import lidar_reader
-from utils import set_angle
+from utils import lidar, hal, set_angle, get_clock
+from utils.fusion import PointingFusion
+from utils.background import BackgroundModel
 #from piConnection import pi_connection
 #CONFIGURATION
 size_of_array = 9
-sleep(3) # Wait for the GPIO to initialize properly
+columns = 7
+column_step = 30 # stepper degrees between columns
+servo_offset = 100 # servo angle of the first row
+max_range = 350 # cm, only objects closer than this count as detections
+az_cells = np.arange(columns) * column_step
+el_cells = np.arange(size_of_array) * 90/size_of_array
+
+# samples paired with where the head pointed when they were taken
+fusion = PointingFusion(lidar, hal.stepper.timeline, hal.servo.timeline, el_offset=servo_offset)
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__))) #remove "#"from the begining before flight
 
-# t_piCon = threading.Thread(target=pi_connection, daemon=True)
-# t_piCon.start()
-t_lidar = threading.Thread(target=lidar_reader, daemon=True)
-t_lidar.start()
-# while not gv.ready_state:
-#     print("Waiting for connection to laptop...")
-#     sleep(0.5)
-
-stepper.setup_stepper()
-i = 0
-notScannedEnv = 1
-readings = [[0 for x in range(size_of_array)] for y in range(7)] 
-curIteration = 0
-
-set_angle(185)
-gv.servo_pos = 0
-sleep(0.5)
-while notScannedEnv:   #SCAN ENV
-    #print(gv.latest_distance)
-    #sleep(1)
-    
-    if( i == 7):
-        stepper.stepper(-180)
-        gv.stepper_pos += -180
-        i = 0# Move stepper back to 0 position
-        notScannedEnv = 0
-
-    else:
-        for curAngle in range (0, size_of_array):
-            set_angle(100 + curAngle * 90/size_of_array)
-            gv.servo_pos += curAngle * 90/size_of_array
-            sleep(0.2)
-            readings[curIteration][curAngle] = gv.latest_distance
-            #print("Readings: ", readings)
-        i += 1  # Initialize stepper position to 0
-        if( i == 7):
+def point_servo(curAngle):
+    set_angle(servo_offset + curAngle * 90/size_of_array)
+    gv.servo_pos = curAngle * 90/size_of_array
+
+# Background: `sweeps` servo sweeps (alternating direction) per stepper
+# column into the per-cell statistics, then back to the first column
+def scan_environment(clock, sweeps=gv.BACKGROUND_SWEEPS):
+    model = BackgroundModel(az_cells, el_cells)
+
+    set_angle(185)
+    gv.servo_pos = 0
+    clock.sleep(0.5)
+    for curIteration in range(columns):
+        for sweepNo in range(sweeps):
+            angles = range(0, size_of_array) if sweepNo % 2 == 0 else range(size_of_array-1, -1, -1)
+            for curAngle in angles:
+                point_servo(curAngle)
+                samples = fusion.sample(clock=clock)
+                model.add(samples.az, samples.el, samples.distance, clock.now())
+        if curIteration == columns - 1:
+            break
+        stepper.stepper(column_step)
+        gv.stepper_pos += column_step
+
+    stepper.stepper(-180)
+    gv.stepper_pos += -180
+    return model
+
+# One servo sweep over a column, records the first detection at the angles
+# the head actually had while the detecting samples were taken
+def sweep(model, angles, clock, start_time):
+    seen = []
+    spotted = False
+    for curAngle in angles:
+        point_servo(curAngle)
+        samples = fusion.sample(clock=clock)
+        if not len(samples.distance):
             continue
-        stepper.stepper(30)
-        gv.stepper_pos += 30
-        curIteration += 1
-        sleep(0.2) 
-
-
-
-i = 0
-droneNotFound = 1
-curIteration = 0
-curTime = time()
-while notScannedEnv == 0: # COMPARE ENV
-    #print(gv.latest_distance)
-    sleep(0.2)
-    
-    if( i == 7):
-        print("GG")
-        stepper.stepper(-189)
-        gv.stepper_pos -= 189
-        sleep(1)
-        GPIO.cleanup()
-        for curPos in gv.det_pos:
-            print(curPos)
-        sys.exit(0)
-    else:
-        while droneNotFound:
-            print(f"Current Iteration: {curIteration}, Readings: {readings[curIteration]}")
-            print("curAngle: ", curAngle)
-            for curAngle in range (0, size_of_array):
-                if(curAngle == 0):
-                    set_angle(100 + curAngle * 90/size_of_array)
-                    gv.servo_pos = curAngle * 90/size_of_array
-                    sleep(0.07)
-                else:
-                    set_angle(100 + curAngle * 90/size_of_array)
-                    gv.servo_pos = curAngle * 90/size_of_array
-                    sleep(0.05)
-                
-                #print(curIteration, ":curIteration  curAngle:" ,curAngle, "read: ", gv.latest_distance)
-                #print(abs(gv.latest_distance - readings[curIteration][curAngle]))
-                if(abs(gv.latest_distance - readings[curIteration][curAngle]) > 70 and abs(gv.latest_distance - readings[curIteration][curAngle]) < 60000 and gv.latest_distance < 350):
-                    print("Object Spotted at angle: ", curAngle*17)
-                    print("curAngle: ", curAngle,"curIteration:", curIteration ,"compared to readings: ", readings[curIteration][curAngle])
-                    droneNotFound = 0
-                    with gv.lock:
-                        gv.target_found = 1
-                        pass
-                    gv.det_pos.append([gv.stepper_pos, gv.servo_pos,gv.latest_distance, round(time() - curTime,2)])
-                    break
-
-            if droneNotFound == 0:
+        seen.append(samples)
+        # a handful of samples per position, the stdlib beats numpy's call overhead
+        distance = median(samples.distance.tolist())
+        az, el = fmean(samples.az.tolist()), fmean(samples.el.tolist())
+        if distance < max_range and model.is_foreground(az, el, distance):
+            print("Object Spotted at angle: ", curAngle*17)
+            with gv.lock:
+                gv.target_found = 1
+            gv.det_pos.append([round(az, 2), round(el, 2), distance, round(clock.now() - start_time, 2)])
+            spotted = True
+            break
+
+    # let the background follow slow scene changes, except where a target is;
+    # once per sweep, each position is a different cell
+    if seen:
+        model.adapt(np.concatenate([s.az for s in seen]), np.concatenate([s.el for s in seen]),
+                    np.concatenate([s.distance for s in seen]), clock.now())
+    return spotted
+
+# Sweep each column back and forth until something stands out from the
+# background there, then move on; `duration` (seconds) stops an endless sweep
+def compare_environment(model, clock, duration=None):
+    start_time = clock.now()
+    for curIteration in range(columns):
+        while True:
+            print(f"Current Iteration: {curIteration}, Background: {np.round(model.mean[curIteration]).tolist()}")
+            if sweep(model, range(0, size_of_array), clock, start_time):
+                break
+            if sweep(model, range(size_of_array-1, -1, -1), clock, start_time):
                 break
-            
-            for curAngle in range (size_of_array-1, -1,-1):
-                if(curAngle == 0):
-                    set_angle(100 + curAngle * 90/size_of_array)
-                    gv.servo_pos = curAngle * 90/size_of_array
-                    sleep(0.07)
-                else:
-                    set_angle(100 + curAngle * 90/size_of_array)
-                    gv.servo_pos = curAngle * 90/size_of_array
-                    sleep(0.05)
-                #print(abs(gv.latest_distance - readings[curIteration][curAngle]))
-                if(abs(gv.latest_distance - readings[curIteration][curAngle]) > 70 and abs(gv.latest_distance - readings[curIteration][curAngle]) < 60000 and gv.latest_distance < 350):
-                    print("Object Spotted at angle: ", curAngle*17)
-                    droneNotFound = 0
-                    with gv.lock:
-                        gv.target_found = 1
-                        pass
-                    gv.det_pos.append([gv.stepper_pos, gv.servo_pos,gv.latest_distance, round(time() - curTime,2)])
-                    break
-            
-        i += 1 
+            if duration is not None and clock.now() - start_time >= duration:
+                return False
+
         set_angle(185)
         gv.servo_pos = 0
-        stepper.stepper(30)
-        gv.stepper_pos += 30
+        stepper.stepper(column_step)
+        gv.stepper_pos += column_step
         print("Drone Found")
-        droneNotFound = 1
-        curIteration += 1
-        
+
+    print("GG")
+    stepper.stepper(-189)
+    gv.stepper_pos -= 189
+    clock.sleep(1)
+    return True
+
+def main(duration=None):
+    clock = get_clock()
+    clock.sleep(3) # Wait for the GPIO to initialize properly
+
+    # t_piCon = threading.Thread(target=pi_connection, daemon=True)
+    # t_piCon.start()
+    lidar.start()
+    # while not gv.ready_state:
+    #     print("Waiting for connection to laptop...")
+    #     sleep(0.5)
+
+    stepper.setup_stepper()
+    model = scan_environment(clock)
+    compare_environment(model, clock, duration)
+
+    hal.cleanup()
+    for curPos in gv.det_pos:
+        print(curPos)
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else None)
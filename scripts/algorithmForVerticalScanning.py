@@ -1,11 +1,10 @@
-import serial
 import time
-import RPi.GPIO as GPIO
 import threading
+from utils import open_lidar_source, hal
+from utils.stepSync import StepHandshake
 
 # Global state variables
 curDeg = 1
-passedStep = 0
 objectSpotted = 0
 envScanned = 0
 searching = 1
@@ -14,18 +13,17 @@ dataOutput = []
 
 lock = threading.Lock()
 
-# GPIO setup
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(17, GPIO.OUT)
-GPIO.setup(18, GPIO.OUT)
-pwm = GPIO.PWM(18, 50)
-pwm.start(0)
+# servo step -> one LiDAR sample handshake, and the searching -> tracking hand-off
+handshake = StepHandshake()
+target_spotted = threading.Event()
+STEP_TIMEOUT = 0.5  # give up waiting for a sample after this long and move on
+
+# Servo and pins are driven through the HAL (utils/hal.py)
 
 # --- Utility functions ---
 
 def set_angle(angle):
-    duty = 1.5 + (angle / 180) * 10
-    pwm.ChangeDutyCycle(duty)
+    hal.servo.set_angle(angle)
     #time.sleep(0.1)
 
 def data_formatter(data_bytes):
@@ -49,18 +47,22 @@ def data_formatter(data_bytes):
 # --- Main Threads ---
 
 def run_lidar():
-    global dataOutput, passedStep, lock, envScanned, curDeg, searching, poi
-    ser = serial.Serial("/dev/serial0", 115200)
+    global dataOutput, lock, envScanned, searching, poi
+    lidar = open_lidar_source()
     curPos = 0
 
     while True:
-        try:
-            reading = data_formatter(ser.read(9))
-        except Exception:
-            continue  # Skip corrupted reads
+        if handshake.wait_step(timeout=STEP_TIMEOUT) is None:
+            continue  # Servo not stepping
+        t, distance, strength = lidar.read()
+        sample = handshake.offer(t, distance)
+        if sample is None:
+            time.sleep(lidar.poll_interval)
+            continue  # No frame since the step yet
+        reading = sample.distance
 
         with lock:
-            if envScanned == 1 and passedStep == 1:
+            if envScanned == 1:
                 if searching:
                     if curPos >= len(dataOutput):
                         curPos = 0
@@ -69,6 +71,7 @@ def run_lidar():
                     if diff > 65:
                         searching = 0
                         poi = curPos
+                        target_spotted.set()
                         print(f"OBJECT DETECTED at {poi*5}°")
                     else:
                         curPos += 1
@@ -84,38 +87,38 @@ def run_lidar():
                     curPos += 1
                     if curPos > max_poi:
                         curPos = min_poi
-                passedStep = 0
 
-            elif passedStep == 1:
+            else:
                 dataOutput.append(reading)
-                print(f"Scan@{curDeg}° = {reading}")
-                passedStep = 0
-                if curDeg >= 60:
+                print(f"Scan@{sample.angle}° = {reading}")
+                if sample.angle >= 60:
                     envScanned = 1
                     print("INITIAL SCAN COMPLETE — Entering Detection Mode")
 
+# Move to `degree` once the LiDAR has sampled the previous step
+def step_to(degree):
+    global curDeg
+    handshake.ready(timeout=STEP_TIMEOUT)
+    set_angle(degree)
+    curDeg = degree
+    handshake.announce(degree)
+
 def run_servo():
-    global passedStep, lock, curDeg, searching
+    global lock, searching
     try:
         while True:
             for degree in range(0, 65, 5):
                 with lock:
                     if searching == 0:
                         return
-                    while passedStep != 0:
-                        pass
-                set_angle(degree)
-                curDeg = degree
+                step_to(degree)
                 #time.sleep(0.1)
-                with lock:
-                    passedStep = 1
                 time.sleep(0.095)
     except KeyboardInterrupt:
-        pwm.stop()
-        GPIO.cleanup()
+        hal.cleanup()
 
 def seekAndDestroy():
-    global passedStep, lock, curDeg, searching, dataOutput, poi
+    global lock, searching, dataOutput, poi
     #samePoiCounter = 0
     #if (poi == lastPoi):
         #if(samePoiCounter == 3):
@@ -124,6 +127,7 @@ def seekAndDestroy():
                 #pass
         #samePoiCounter = samePoiCounter + 1
     while True:
+        target_spotted.wait()
         if searching == 0:
             print(f"TRACKING POI around {poi*5}°")
             #lastPoi = poi)
@@ -132,28 +136,14 @@ def seekAndDestroy():
             max_deg = min((poi * 5) +15, 60)
             degree = max_deg + 1
             for degree in range(max_deg + 1, min_deg, -5):
-                with lock:
-                    while passedStep != 0:
-                        pass
-                set_angle(degree)
-                curDeg = degree
+                step_to(degree)
                 #time.sleep(0.1)
-                with lock:
-                    passedStep = 1
-                    pass
                 time.sleep(0.06)
             min_deg = max((poi * 5) -15, 0)
             max_deg = min((poi * 5) +15, 60)
             for degree in range(min_deg, max_deg + 1, 5):
-                with lock:
-                    while passedStep != 0:
-                        pass
-                set_angle(degree)
-                curDeg = degree
+                step_to(degree)
                 #time.sleep(0.1)
-                with lock:
-                    passedStep = 1
-                    pass
                 time.sleep(0.06)
             
             min_deg = max((poi * 5) -15, 0)
@@ -182,6 +172,5 @@ try:
     t3.join()
 
 except KeyboardInterrupt:
-    pwm.stop()
-    GPIO.cleanup()
+    hal.cleanup()
     print("done")
@@ -1,3 +1,5 @@
+import logging
+from dataclasses import dataclass
 import numpy as np
 from sgp4.api import Satrec, jday, WGS72
 from sgp4 import exporter
@@ -8,10 +10,53 @@ import math
 MU_EARTH = 398600.4418  # km^3/s^2, standard gravitational parameter
 R_EARTH = 6378.137      # km, mean Earth radius
 TIME_SCALING = 200
+TLE_EPOCH = 27626.2997  # days since 1949 December 31 00:00 UT (2025.08.20 07:11:38 UTC)
+GIBBS_MIN_ANGLE = np.radians(5)  # below this separation Herrick-Gibbs is more accurate
 
 #  z-axis unit vector k vector
 k = np.array([0, 0, 1])
 
+# Diagnostics go through logging (DEBUG level) instead of print, so production
+# runs on the Pi don't pay for formatting arrays to the serial console.
+# Enable with logging.getLogger("create_tle").setLevel(logging.DEBUG) or pass a
+# TLETrace to calcTLE to keep every intermediate quantity in memory.
+logger = logging.getLogger("create_tle")  # not __name__, which is "__main__" when run as a script
+
+# All intermediate quantities of one calcTLE run, filled in when passed as `trace`.
+# Both modes fill the inputs, point_vector, the elements and the lines. The
+# circular mode estimates the elements from the middle waypoint (timestep is
+# its finite-difference step); mode="od" records the osculating elements of
+# the fitted orbit at the middle waypoint plus the fit residuals.
+@dataclass
+class TLETrace:
+    phi_rad: np.ndarray = None
+    theta_rad: np.ndarray = None
+    distance: np.ndarray = None
+    time: np.ndarray = None
+    timestep: np.ndarray = None
+    point_vector: np.ndarray = None
+    velocity: np.ndarray = None
+    angular_momentum: np.ndarray = None
+    inclination: float = None
+    eccentricity: float = None
+    eccentricity_vector: np.ndarray = None
+    sma: float = None
+    raan: float = None
+    aop: float = None
+    ta: float = None
+    mm: float = None
+    residuals: np.ndarray = None
+    line1: str = None
+    line2: str = None
+
+def _record(trace, **values):
+    if trace is not None:
+        for name, value in values.items():
+            setattr(trace, name, value)
+    if logger.isEnabledFor(logging.DEBUG):
+        for name, value in values.items():
+            logger.debug("%s: %s", name, value)
+
 # Function to read the array with the waypoints
 # Input: 
 #   waypoint[0,:] is the azimuth, the turn of the stepper
@@ -62,7 +107,6 @@ def calculateTimestep(time):
 # 
 
 def convertKOS(phi_rad, theta_rad, distance):
-    print(distance)
     x = distance * np.sin(theta_rad) * np.cos(phi_rad)
     y = distance * np.sin(theta_rad) * np.sin(phi_rad)
     z = distance * np.cos(theta_rad)
@@ -170,62 +214,328 @@ def calcTrueAnomaly(point_vector, eccentricity_vector):
 # pitput radians per minute, since then getting revs/day in the satrec function
 
 def calcMeanMotion(sma):
-    # sma is radius
-    n_rad_s = math.sqrt(MU_EARTH / (sma**3))   # rad/s
-    n_rev_day = n_rad_s * 86400 / (2 * math.pi)  # rev/day
-    mm = n_rev_day * 2 * math.pi / 1440.0  # radians per minute
+    # sma is radius, scalar or array
+    n_rad_s = np.sqrt(MU_EARTH / (np.asarray(sma)**3))   # rad/s
+    n_rev_day = n_rad_s * 86400 / (2 * np.pi)  # rev/day
+    mm = n_rev_day * 2 * np.pi / 1440.0  # radians per minute
     return mm
 
-def calcTLE(waypoints):
+# ---------------------------------------------------------------------------
+# Batched state vector <-> Keplerian element conversion
+# Angles in radians, distances in km, velocities in km/s, arrays of shape (..., 3)
+# Conventions for the singular cases (as in Vallado, Fundamentals of Astrodynamics):
+#   circular inclined:    aop = 0,    ta = argument of latitude
+#   elliptic equatorial:  raan = 0,   aop = longitude of periapsis
+#   circular equatorial:  raan = 0, aop = 0, ta = true longitude
+# so that coe2rv(*rv2coe(r, v)) gives back r and v in every case
+# ---------------------------------------------------------------------------
+
+SINGULAR_TOL = 1e-8
+
+def _signedAngle(a, b, h_hat):
+    # angle from a to b, measured positive around h_hat
+    return np.arctan2(np.sum(np.cross(a, b) * h_hat, axis=-1), np.sum(a * b, axis=-1))
+
+# Input: r, v arrays (..., 3)
+# Output: sma, ecc, inc, raan, aop, ta each of shape (...)
+
+def rv2coe(r, v):
+    r = np.asarray(r, dtype=float)
+    v = np.asarray(v, dtype=float)
+    rm = np.linalg.norm(r, axis=-1)
+    h = np.cross(r, v)
+    hm = np.linalg.norm(h, axis=-1)
+    h_hat = h / hm[..., None]
+    node = np.cross(k, h)
+    nm = np.linalg.norm(node, axis=-1)
+
+    rv = np.sum(r * v, axis=-1)
+    e_vec = ((np.sum(v * v, axis=-1) - MU_EARTH / rm)[..., None] * r - rv[..., None] * v) / MU_EARTH
+    ecc = np.linalg.norm(e_vec, axis=-1)
+    sma = 1.0 / (2.0 / rm - np.sum(v * v, axis=-1) / MU_EARTH)
+    inc = np.arccos(np.clip(h[..., 2] / hm, -1.0, 1.0))
+
+    circular = ecc < SINGULAR_TOL
+    equatorial = nm < SINGULAR_TOL * hm
+    x_hat = np.broadcast_to(np.array([1.0, 0.0, 0.0]), r.shape)
+
+    raan = np.where(equatorial, 0.0, np.arctan2(node[..., 1], node[..., 0]))
+    aop = np.where(equatorial, _signedAngle(x_hat, e_vec, h_hat), _signedAngle(node, e_vec, h_hat))
+    aop = np.where(circular, 0.0, aop)
+    ta = np.where(circular,
+                  np.where(equatorial, _signedAngle(x_hat, r, h_hat), _signedAngle(node, r, h_hat)),
+                  _signedAngle(e_vec, r, h_hat))
+
+    two_pi = 2 * np.pi
+    return sma, ecc, inc, raan % two_pi, aop % two_pi, ta % two_pi
+
+# Input: elements as returned by rv2coe (scalars or arrays), elliptical orbits
+# Output: r, v arrays (..., 3)
+
+def coe2rv(sma, ecc, inc, raan, aop, ta):
+    sma, ecc, inc, raan, aop, ta = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (sma, ecc, inc, raan, aop, ta)))
+    p = sma * (1 - ecc**2)
+    r_pf = p / (1 + ecc * np.cos(ta))
+    vs = np.sqrt(MU_EARTH / p)
+
+    co, so = np.cos(raan), np.sin(raan)
+    cw, sw = np.cos(aop), np.sin(aop)
+    ci, si = np.cos(inc), np.sin(inc)
+    p_hat = np.stack([co * cw - so * sw * ci, so * cw + co * sw * ci, sw * si], axis=-1)
+    q_hat = np.stack([-co * sw - so * cw * ci, -so * sw + co * cw * ci, cw * si], axis=-1)
+
+    r = (r_pf * np.cos(ta))[..., None] * p_hat + (r_pf * np.sin(ta))[..., None] * q_hat
+    v = (-vs * np.sin(ta))[..., None] * p_hat + (vs * (ecc + np.cos(ta)))[..., None] * q_hat
+    return r, v
+
+# Output: mean anomaly in radians for elliptical orbits (scalar or array)
+
+def trueToMeanAnomaly(ta, ecc):
+    ea = 2 * np.arctan2(np.sqrt(1 - ecc) * np.sin(ta / 2), np.sqrt(1 + ecc) * np.cos(ta / 2))
+    return (ea - ecc * np.sin(ea)) % (2 * np.pi)
+
+# ---------------------------------------------------------------------------
+# Orbit determination from N waypoints
+# Initial orbit from three of the points (Gibbs / Herrick-Gibbs), then a
+# batch least-squares differential correction of the SGP4 mean elements
+# against all points.
+# ---------------------------------------------------------------------------
+
+# Gibbs method: velocity at the middle of three position vectors
+# Output: velocity in km/s
+
+def gibbs(r1, r2, r3):
+    z12 = np.cross(r1, r2)
+    z23 = np.cross(r2, r3)
+    z31 = np.cross(r3, r1)
+    m1, m2, m3 = np.linalg.norm(r1), np.linalg.norm(r2), np.linalg.norm(r3)
+
+    n = m1 * z23 + m2 * z31 + m3 * z12
+    d = z12 + z23 + z31
+    s = (m2 - m3) * r1 + (m3 - m1) * r2 + (m1 - m2) * r3
+    b = np.cross(d, r2)
+    lg = np.sqrt(MU_EARTH / (np.linalg.norm(n) * np.linalg.norm(d)))
+
+    return lg / m2 * b + lg * s
+
+# Herrick-Gibbs: same as gibbs, for closely spaced points where gibbs breaks down
+# Output: velocity in km/s
+
+def herrickGibbs(r1, r2, r3, t1, t2, t3):
+    dt21 = t2 - t1
+    dt31 = t3 - t1
+    dt32 = t3 - t2
+    m1, m2, m3 = np.linalg.norm(r1), np.linalg.norm(r2), np.linalg.norm(r3)
+
+    return (-dt32 * (1 / (dt21 * dt31) + MU_EARTH / (12 * m1**3)) * r1
+            + (dt32 - dt21) * (1 / (dt21 * dt32) + MU_EARTH / (12 * m2**3)) * r2
+            + dt21 * (1 / (dt32 * dt31) + MU_EARTH / (12 * m3**3)) * r3)
+
+# state vector at the middle of the first, middle and last waypoint
+# Output: index of the middle point and its velocity in km/s
+
+def initialOrbit(point_vector, time):
+    i1, i2, i3 = 0, point_vector.shape[1] // 2, point_vector.shape[1] - 1
+    r1, r2, r3 = point_vector[:, i1], point_vector[:, i2], point_vector[:, i3]
+
+    def angle(a, b):
+        return np.arctan2(np.linalg.norm(np.cross(a, b)), np.dot(a, b))
+
+    if min(angle(r1, r2), angle(r2, r3)) > GIBBS_MIN_ANGLE:
+        v2 = gibbs(r1, r2, r3)
+    else:
+        v2 = herrickGibbs(r1, r2, r3, time[i1], time[i2], time[i3])
+    return i2, v2
+
+# mean-element vector used by the fit: [n (rad/min), e*cos(aop), e*sin(aop), inc, raan, M + aop]
+# the eccentricity-vector and mean-longitude form stays well defined for the
+# (near) circular orbits we produce
+# Output: element vector, falls back to a circular orbit if the state is not elliptical
+
+def _stateToElements(r, v):
+    sma, ecc, inc, raan, aop, ta = rv2coe(r, v)
+    if not sma > 0 or ecc >= 0.99:
+        # not a bound orbit (noisy or scaled waypoints): start from a circle through r
+        return np.array([calcMeanMotion(np.linalg.norm(r)), 0.0, 0.0, inc, raan, (aop + ta) % (2 * np.pi)])
+
+    mean_anomaly = trueToMeanAnomaly(ta, ecc)
+    return np.array([calcMeanMotion(sma), ecc * np.cos(aop), ecc * np.sin(aop),
+                     inc, raan, (mean_anomaly + aop) % (2 * np.pi)])
+
+def _satrecFromElements(elements, epoch):
+    mm, ex, ey, inc, raan, mean_longitude = elements
+    aop = np.arctan2(ey, ex)
+    satellite = Satrec()
+    satellite.sgp4init(
+        WGS72, 'i', 69420, epoch, 0.0, 0.0, 0.0,
+        float(np.hypot(ex, ey)), float(aop % (2 * np.pi)), float(inc),
+        float((mean_longitude - aop) % (2 * np.pi)), float(mm), float(raan % (2 * np.pi)),
+    )
+    return satellite
+
+def _clampElements(elements):
+    mm, ex, ey, inc, raan, mean_longitude = elements
+    ecc = np.hypot(ex, ey)
+    if ecc > 0.9:
+        ex, ey = ex * 0.9 / ecc, ey * 0.9 / ecc
+    return np.array([max(mm, 1e-4), ex, ey, np.clip(inc, 0.0, np.pi), raan, mean_longitude])
+
+# positions predicted by SGP4 for an element vector at seconds after the epoch
+# Output: (N, 3) positions in km, NaN where SGP4 fails
+
+def _predict(elements, epoch, seconds):
+    satellite = _satrecFromElements(elements, epoch)
+    jd = np.full(len(seconds), satellite.jdsatepoch)
+    fr = satellite.jdsatepochF + seconds / 86400.0
+    error, position, _ = satellite.sgp4_array(jd, fr)
+    position[error != 0] = np.nan
+    return position
+
+# finite difference steps for the element vector
+_DC_STEPS = np.array([1e-7, 1e-6, 1e-6, 1e-6, 1e-6, 1e-6])
+
+# batch least squares (Levenberg-Marquardt damped Gauss-Newton) on the SGP4 elements
+# Input: point_vector (3, N) in km, seconds since the first point, initial element vector
+# Output: fitted element vector and residuals (3, N) in km
+
+def differentialCorrection(point_vector, seconds, elements, epoch=TLE_EPOCH, max_iter=20, tol=1e-10):
+    observed = point_vector.T
+    residual = (observed - _predict(elements, epoch, seconds)).ravel()
+    cost = np.dot(residual, residual)
+    damping = 1e-3
+
+    for _ in range(max_iter):
+        base = observed.ravel() - residual
+        jac = np.empty((residual.size, 6))
+        for j, step in enumerate(_DC_STEPS):
+            shifted = elements.copy()
+            shifted[j] += step
+            jac[:, j] = (_predict(shifted, epoch, seconds).ravel() - base) / step
+        if not np.all(np.isfinite(jac)):
+            break
+        normal = jac.T @ jac
+        gradient = jac.T @ residual
+
+        improved = False
+        while damping < 1e10:
+            lhs = normal + damping * np.diag(np.diag(normal) + 1e-12)
+            candidate = _clampElements(elements + np.linalg.solve(lhs, gradient))
+            new_residual = (observed - _predict(candidate, epoch, seconds)).ravel()
+            new_cost = np.dot(new_residual, new_residual)
+            if np.isfinite(new_cost) and new_cost < cost:
+                improved = True
+                break
+            damping *= 10
+
+        if not improved:
+            break
+        converged = cost - new_cost <= tol * max(cost, 1e-30)
+        elements, residual, cost = candidate, new_residual, new_cost
+        damping = max(damping / 10, 1e-12)
+        if converged:
+            break
+
+    return elements, residual.reshape(-1, 3).T
+
+# fit an orbit through all given positions
+# Input: point_vector (3, N) in km, time in seconds, N >= 3
+# Output: Satrec and residuals (3, N) in km
+
+def fitOrbit(point_vector, time, epoch=TLE_EPOCH):
+    if point_vector.shape[1] < 3:
+        raise ValueError("Orbit determination needs at least 3 waypoints.")
+    seconds = np.asarray(time, dtype=float) - time[0]
+    i2, v2 = initialOrbit(point_vector, seconds)
+    elements = _stateToElements(point_vector[:, i2], v2)
+
+    # the initial state belongs to the middle point, move the mean longitude back to the epoch
+    elements[5] = (elements[5] - elements[0] * seconds[i2] / 60.0) % (2 * np.pi)
+
+    elements, residuals = differentialCorrection(point_vector, seconds, elements, epoch)
+    return _satrecFromElements(elements, epoch), residuals
+
+# orbit determination straight from the waypoint array (same layout as calcTLE)
+# Output: Satrec and residuals (3, N) in km
+
+def determineOrbit(waypoints, epoch=TLE_EPOCH, trace=None):
+    phi_rad, theta_rad, distance, time = read_points(waypoints)
+    point_vector = convertKOS(phi_rad, theta_rad, distance)
+    _record(trace, phi_rad=phi_rad, theta_rad=theta_rad, distance=distance, time=time,
+            point_vector=point_vector)
+    seconds = (time - time[0]) * TIME_SCALING
+    satellite, residuals = fitOrbit(point_vector, seconds, epoch)
+    if trace is not None or logger.isEnabledFor(logging.DEBUG):
+        _recordFit(trace, satellite, seconds[point_vector.shape[1] // 2])
+    return satellite, residuals
+
+# osculating elements of a fitted orbit at `seconds` after its epoch, recorded
+# under the same names the circular mode uses
+
+def _recordFit(trace, satellite, seconds):
+    _, r, v = satellite.sgp4(satellite.jdsatepoch, satellite.jdsatepochF + seconds / 86400.0)
+    r, v = np.array(r), np.array(v)
+    angular_momentum = np.cross(r, v)
+    sma, ecc, inc, raan, aop, ta = rv2coe(r, v)
+    eccentricity_vector = np.cross(v, angular_momentum) / MU_EARTH - r / np.linalg.norm(r)
+    _record(trace, velocity=v, angular_momentum=angular_momentum, inclination=float(inc),
+            eccentricity=float(ecc), eccentricity_vector=eccentricity_vector, sma=float(sma),
+            raan=float(raan), aop=float(aop), ta=float(ta), mm=float(calcMeanMotion(sma)))
+
+def calcTLE(waypoints, mode="circular", trace=None):
+
+    if mode == "od":
+        satellite, residuals = determineOrbit(waypoints, trace=trace)
+        line1, line2 = exporter.export_tle(satellite)
+        _record(trace, residuals=residuals, line1=line1, line2=line2)
+        return line1, line2
  
     phi_rad, theta_rad, distance, time = read_points(waypoints)
-    print(f"phi_rad: {phi_rad}, theta_rad: {theta_rad}, distance: {distance}, time: {time}")
+    _record(trace, phi_rad=phi_rad, theta_rad=theta_rad, distance=distance, time=time)
 
     timestep = calculateTimestep(time)
-    print(f"Timestep: {timestep}")
+    _record(trace, timestep=timestep)
 
     point_vector = convertKOS(phi_rad, theta_rad, distance)
-    print(f"Point Vector: {point_vector}")
+    _record(trace, point_vector=point_vector)
     
     velocity = calcVelocity(point_vector, timestep)
-    print(f"Velocity: {velocity}")
+    _record(trace, velocity=velocity)
 
     angular_momentum = calcAngularMomentum(point_vector, velocity)
-    print(f"Angular Momentum: {angular_momentum}")
+    _record(trace, angular_momentum=angular_momentum)
 
     # Keplerian Elements 
     
     # For a round orbit without inclination inc = 0
     #inclination = 0
     inclination = calcInclination(angular_momentum)
-    print(f"Inclination: {inclination}")
+    _record(trace, inclination=inclination)
 
     # For a circular orbit eccentricity = 0
     eccentricity = 0
     eccentricity_vector = [0,0,0]
     #eccentricity, eccentricity_vector = calcEccentricity(point_vector, velocity, angular_momentum)
-    print(f"Eccentricity: {eccentricity}")
-    print(f"Eccentricity Vector: {eccentricity_vector}")
+    _record(trace, eccentricity=eccentricity, eccentricity_vector=eccentricity_vector)
 
     # For a circular orbit this is the radius
     sma = distance[1]
     #sma = calcSemiMajorAxis(point_vector, velocity)
-    print(f"Semi-Major Axis: {sma}")
+    _record(trace, sma=sma)
 
     raan = calcRAAN(angular_momentum)
     raan = raan % (2 * math.pi) # wrap incase of negative angle
-    print(f"RAAN: {raan}")
+    _record(trace, raan=raan)
 
     # AOP: This quantity is undefined for circular orbits, but is often set to zero instead by convention
     aop = 0
     #aop = calcArgumentOfPeriapsis(eccentricity_vector, angular_momentum)
-    print(f"Argument of Periapsis: {aop}")
+    _record(trace, aop=aop)
 
     ta = calcTrueAnomaly(point_vector, eccentricity_vector)
-    print(f"True Anomaly: {ta}")
+    _record(trace, ta=ta)
 
     mm = calcMeanMotion(sma)
-    print(f"Mean Motion: {mm}")
+    _record(trace, mm=mm)
 
     #https://rhodesmill.org/skyfield/earth-satellites.html#generating-a-satellite-position
 
@@ -247,6 +557,7 @@ def calcTLE(waypoints):
     )
 
     line1, line2 = exporter.export_tle(foundmysatellite)
+    _record(trace, line1=line1, line2=line2)
 
     return line1, line2
 
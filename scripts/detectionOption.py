@@ -1,14 +1,7 @@
 from time import sleep
-import RPi.GPIO as GPIO
-import numpy as np
-import serial
-
-# ------------------- PINS -------------------
-ENABLE_PIN = 16
-STEP = 20
-DIR = 21
-MODE = (6, 19, 26)
-SERVO_PIN = 18
+import globalsConfig as gv
+from utils import open_lidar_source, open_hal
+from utils.background import AngleBaseline
 
 # ------------------- SETTINGS -------------------
 CW = 1
@@ -20,64 +13,40 @@ MAX_DISTANCE = 7.0   # ignore points beyond this
 NOISE_THRESHOLD = 0.2  # meters for detection
 SERVO_FIXED = 150     # fixed angle
 
-# ------------------- GPIO SETUP -------------------
-GPIO.cleanup()
-GPIO.setmode(GPIO.BCM)
-GPIO.setwarnings(False)
-
-GPIO.setup(DIR, GPIO.OUT)
-GPIO.setup(STEP, GPIO.OUT)
-GPIO.setup(ENABLE_PIN, GPIO.OUT)
-GPIO.setup(MODE, GPIO.OUT)
-RESOLUTION = {
-    'Full':  (0, 0, 0),
-    'Half':  (1, 0, 0),
-    '1/4':   (0, 1, 0),
-    '1/8':   (1, 1, 0),
-    '1/16':  (0, 0, 1),
-    '1/32':  (1, 0, 1)
-}
-GPIO.output(MODE, RESOLUTION['1/32'])
-
-GPIO.setup(SERVO_PIN, GPIO.OUT)
-servo = GPIO.PWM(SERVO_PIN, 50)
-servo.start(0)
+# ------------------- ACTUATOR SETUP -------------------
+# a head of its own with the 2.5-12.5 % duty calibration this scan uses,
+# the shared utils.hal keeps the default one (GPIO is only set up on use)
+hal = open_hal(min_duty=2.5)
+hal.stepper.setup('1/32')
 
 # ------------------- FUNCTIONS -------------------
 def move_stepper_one_step(direction):
-    GPIO.output(DIR, direction)
-    GPIO.output(ENABLE_PIN, GPIO.LOW)
-    GPIO.output(STEP, GPIO.HIGH)
-    sleep(DELAY)
-    GPIO.output(STEP, GPIO.LOW)
-    sleep(DELAY)
-    GPIO.output(ENABLE_PIN, GPIO.HIGH)
+    hal.stepper.enable()
+    hal.stepper.move(1 if direction == CW else -1, DELAY)
+    hal.stepper.disable()
 
 def set_servo_angle(angle):
-    duty = 2.5 + (angle / 180) * (12.5 - 2.5)
-    servo.ChangeDutyCycle(duty)
+    hal.servo.set_angle(angle)
     sleep(0.5)
-    servo.ChangeDutyCycle(0)
+    hal.servo.release()
 
 # ------------------- TFmini SETUP -------------------
-lidar = serial.Serial('/dev/ttyS0', 115200, timeout=0.1)
+lidar = open_lidar_source(port='/dev/ttyS0') if gv.LIDAR_SOURCE == "serial" else open_lidar_source()
 
 def read_lidar():
     """Read TFmini distance in meters"""
-    if lidar.in_waiting >= 9:
-        data = lidar.read(9)
-        if data[0] == 0x59 and data[1] == 0x59:
-            distance = data[2] + data[3]*256
-            return distance / 100.0
+    distance = lidar.read_one(timeout=0)
+    if distance is not None:
+        return distance / 100.0
     return None
 
 # ------------------- MAIN BASELINE -------------------
 try:
     print("Initializing baseline...")
-    baseline = []
-
     set_servo_angle(SERVO_FIXED)
     step_count = round((ANGLE / 360) * SPR)
+    # one bin per microstep, both sweeps averaged into it
+    baseline = AngleBaseline(0, ANGLE, ANGLE / step_count)
 
     # Two sweeps: 0->200 and 200->0
     for repeat in range(2):
@@ -90,10 +59,9 @@ try:
                 move_stepper_one_step(direction)
                 d = read_lidar()
                 if d is not None and d <= MAX_DISTANCE:
-                    baseline.append([round(current_angle,2), round(d,2)])
+                    baseline.add(current_angle, d)
                     print(f"Baseline - Stepper: {current_angle:.2f}°, Distance: {d:.2f} m")
 
-    baseline = np.array(baseline)
     print(f"Baseline initialized with {len(baseline)} points.")
 
     # ------------------- CONTINUOUS SCAN -------------------
@@ -107,8 +75,7 @@ try:
                 move_stepper_one_step(direction)
                 d = read_lidar()
                 if d is not None and d <= MAX_DISTANCE:
-                    idx = np.argmin(np.abs(baseline[:,0] - current_angle))
-                    baseline_distance = baseline[idx,1]
+                    baseline_distance, _ = baseline.lookup(current_angle)
 
                     print(f"Stepper: {current_angle:.2f}°, Distance: {d:.2f} m")
 
@@ -122,6 +89,5 @@ except KeyboardInterrupt:
     print("Scanning stopped.")
 
 finally:
-    servo.stop()
-    GPIO.cleanup()
+    hal.cleanup()
     lidar.close()
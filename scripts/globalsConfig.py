@@ -1,6 +1,5 @@
-import serial
+import os
 import time
-import RPi.GPIO as GPIO
 import threading
 
 curDeg = 1
@@ -14,21 +13,34 @@ poi = -1
 dataOutput = []
 globalReading = 0
 
-#Set up the pins of the raspberry
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(17, GPIO.OUT)
-GPIO.setup(18, GPIO.OUT)
-pwm = GPIO.PWM(18, 50)
-pwm.start(0)
-
 lock = threading.Lock()
 
 SCAN_MAX_DEG = 60  
 SCAN_STEP = 5
 LIDAR_DIFF_THRESHOLD = 60
+BACKGROUND_SIGMA = 4.0      # flag readings this many standard deviations off the background
+BACKGROUND_MIN_STD = 5.0    # cm, floor on a cell's standard deviation (TFmini noise)
+BACKGROUND_SWEEPS = 3       # baseline sweeps averaged into the background model
+BACKGROUND_TAU = 600.0      # s, time constant of the adaptive background update
+
+# "real" for hardware, "virtual" to run the scanners on the discrete-event
+# clock in utils/clock.py (use with FMS_HAL=sim and a replay/synthetic LiDAR)
+CLOCK = os.environ.get("FMS_CLOCK", "real")
 
 SERIAL_PORT = "/dev/serial0"
 SERIAL_BAUDRATE = 115200
+# Actuator backend: "rpi" drives the GPIO pins (set up on first use, not at
+# import), "sim" models the servo and stepper (see utils/hal.py)
+HAL_BACKEND = os.environ.get("FMS_HAL", "rpi")
+SERVO_SLEW_RATE = 600.0  # deg/s, about 0.1 s per 60 deg unloaded
+
+LIDAR_FRAME_RATE = 100  # TFmini output rate in Hz, used to count dropped frames
+
+# LiDAR backend: "serial" on the Pi, "replay" to play back a recorded .npz,
+# "synthetic" for the simulated scene (see utils/lidarSource.py)
+LIDAR_SOURCE = os.environ.get("FMS_LIDAR", "serial")
+LIDAR_REPLAY_FILE = os.environ.get("FMS_LIDAR_REPLAY", "")
+LIDAR_REPLAY_SPEED = float(os.environ.get("FMS_LIDAR_SPEED", "1"))
 
 # Global variables for GUI
 det_pos = []
@@ -1,35 +1,39 @@
 import sys
 import os
+import logging
 import threading
-from globalsConfig import GPIO
 from states.runLidar import SearchState
 from states.runServo import ScanState
 from states.seekAndDestroy import TrackState
 from utils.classes import Operator
 from globalsConfig import *
-from utils import lidar_reader
+from utils import lidar_reader, hal
 #sys.path.append(os.path.dirname(os.path.abspath(__file__))) #remove "#"from the begining before flight
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    op = None
     try:
         t_lidar = threading.Thread(target=lidar_reader, daemon=True)
         t_lidar.start()
         op = Operator(
             states={
-                "SEARCH": SearchState.execute(),
-                "TRACK": TrackState.execute(),
-                "SCAN": ScanState.execute()
+                "SEARCH": SearchState(),
+                "TRACK": TrackState(),
+                "SCAN": ScanState()
             },
             start_state="SEARCH"
         )
         op.run()
     except KeyboardInterrupt:
-        pwm.stop()
-        GPIO.cleanup()
+        hal.cleanup()
         print("done")
+    finally:
+        if op is not None:
+            op.report()
 
 # import threading
 # from globalsConfig import pwm,GPIO
-# from utils import lidar_reader
+# from utils import lidar_reader, hal
 # from utils import Operator
 # from states import runLidar
 # from states import seekAndDestroy
@@ -1,18 +1,19 @@
 # states/search_state.py
-import serial
-import time
 from utils import State
 from globalsConfig import *
-from utils import data_formatter, set_angle
+from utils import lidar, hal, set_angle, get_clock
+from utils.background import ew_alpha
+from utils.fusion import PointingFusion
 
 class SearchState(State):
     def __init__(self):
         super().__init__("SEARCH")
-        self.ser = serial.Serial(SERIAL_PORT, SERIAL_BAUDRATE)
+        self.pointing = PointingFusion(lidar, hal.stepper.timeline, hal.servo.timeline)
         self.cur_deg = 0
         self.cur_pos = 0
         self.baseline_scan_done = False
         self.detect_counter = 0  # new: consecutive detection counter
+        self.baseline_time = []  # when each baseline reading was last updated
 
     def execute(self):
         global dataOutput, poi, searching
@@ -22,17 +23,15 @@ class SearchState(State):
             self.cur_deg = 0
 
         set_angle(self.cur_deg)
-        time.sleep(0.1)  # give servo time to move
-
-        try:
-            reading = data_formatter(self.ser.read(9))
-        except Exception:
+        reading = self.pointing.distance()  # samples taken once the servo got there
+        if reading is None:
             self.cur_deg += SCAN_STEP
             return self.name
 
         # Baseline scan phase
         if not self.baseline_scan_done:
             dataOutput.append(reading)
+            self.baseline_time.append(get_clock().now())
             print(f"[SEARCH] Baseline Scan @ {self.cur_deg}° = {reading}")
             self.cur_deg += SCAN_STEP
             if self.cur_deg > SCAN_MAX_DEG:
@@ -58,6 +57,10 @@ class SearchState(State):
                 return "TRACK"
         else:
             self.detect_counter = 0
+            # follow slow scene changes: exponential average with time constant BACKGROUND_TAU
+            now = get_clock().now()
+            dataOutput[self.cur_pos] += ew_alpha(now - self.baseline_time[self.cur_pos], BACKGROUND_TAU) * (reading - baseline)
+            self.baseline_time[self.cur_pos] = now
 
         self.cur_pos += 1
         self.cur_deg += SCAN_STEP
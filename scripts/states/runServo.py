@@ -1,23 +1,23 @@
-import time
 from globalsConfig import *
-from utils import set_angle
+from utils import set_angle, get_clock, step_handshake
 from utils.classes import State
 
+STEP_TIMEOUT = 0.5  # move on if the LiDAR reader has not sampled the last step by then
+
 class ScanState(State):
     def __init__(self):
         super().__init__("SCAN")
 
     def execute(self):
-        global passedStep, curDeg, searching
+        global curDeg, searching
         for degree in range(0, SCAN_MAX_DEG + 5, SCAN_STEP):
             with lock:
                 if searching == 0:
                     return "TRACK"
-                while passedStep != 0:
-                    pass
+            # each step gets exactly one sample from the LiDAR reader thread
+            step_handshake.ready(timeout=STEP_TIMEOUT)
             set_angle(degree)
             curDeg = degree
-            with lock:
-                passedStep = 1
-            time.sleep(0.095)
+            step_handshake.announce(degree)
+            get_clock().sleep(0.095)
         return self.name
\ No newline at end of file
@@ -88,24 +88,23 @@
 #         print(f"[TRACK] LIDAR read error during POI update: {e}")
 
 
-import time
-import serial
 from utils import State
 from globalsConfig import *
-from utils import data_formatter, set_angle
+from utils import lidar, hal, set_angle, get_clock
+from utils.fusion import PointingFusion
 
 class TrackState(State):
     def __init__(self):
         super().__init__("TRACK")
-        self.ser = serial.Serial(SERIAL_PORT, SERIAL_BAUDRATE)
+        self.pointing = PointingFusion(lidar, hal.stepper.timeline, hal.servo.timeline)
         self.same_poi_counter = 0
         self.last_poi = None
-        self.last_switch_time = time.time()
+        self.last_switch_time = get_clock().now()
 
     def execute(self):
         global poi, searching, baseline_data
 
-        cooldown_active = (time.time() - self.last_switch_time) < 2
+        cooldown_active = (get_clock().now() - self.last_switch_time) < 2
 
         # Count same POI cycles
         if self.last_poi == poi:
@@ -118,7 +117,7 @@ class TrackState(State):
         if not cooldown_active and self.same_poi_counter >= 10:
             print("[TRACK] Lost target — switching to SEARCH")
             searching = True
-            self.last_switch_time = time.time()
+            self.last_switch_time = get_clock().now()
             return "SEARCH"
 
         # Define sweep limits
@@ -128,11 +127,8 @@ class TrackState(State):
         # Sweep max → min
         for degree in range(max_deg, min_deg - SCAN_STEP, -SCAN_STEP):
             set_angle(degree)
-            time.sleep(0.05)
-
-            try:
-                reading = data_formatter(self.ser.read(9))
-            except Exception:
+            reading = self.pointing.distance()
+            if reading is None:
                 continue
 
             baseline = baseline_data[degree // SCAN_STEP]
@@ -148,11 +144,8 @@ class TrackState(State):
         # Sweep min → max
         for degree in range(min_deg, max_deg + SCAN_STEP, SCAN_STEP):
             set_angle(degree)
-            time.sleep(0.05)
-
-            try:
-                reading = data_formatter(self.ser.read(9))
-            except Exception:
+            reading = self.pointing.distance()
+            if reading is None:
                 continue
 
             baseline = baseline_data[degree // SCAN_STEP]
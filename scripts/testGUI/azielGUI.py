@@ -7,7 +7,8 @@ from pcServer import communicate_with_pi
 import threading
 import findVernalPoint
 from matplotlib.widgets import Button
-from sgp4.api import Satrec, jday
+from sgp4.api import jday
+from satellite_tracker.tle import load_tle_catalog, satrecs_from_catalog
 import datetime as dt
 import time
 
@@ -64,14 +65,14 @@ def gui():
 
     def load_tle(event):
         try:
-            with open("C:\\xampp\\htdocs\\18122\\Python\\1.PrepClass\\stage\\FindMySatellite_SC25\\scripts\\testGUI\\TLE.txt", "r") as f:  # adjust your path if needed
-                lines = f.read().splitlines()
-            if len(lines) < 3:
-                print("TLE file must have 3 lines (name + 2 lines)")
+            # parsed once, later loads map the binary cache next to the file
+            catalog = load_tle_catalog("C:\\xampp\\htdocs\\18122\\Python\\1.PrepClass\\stage\\FindMySatellite_SC25\\scripts\\testGUI\\TLE.txt")  # adjust your path if needed
+            if len(catalog) == 0:
+                print("TLE file has no valid record (name line optional + 2 lines)")
                 return
 
-            name, line1, line2 = lines[0], lines[1], lines[2]
-            sat = Satrec.twoline2rv(line1, line2)
+            name = catalog["name"][0].decode("ascii")
+            sat = satrecs_from_catalog(catalog[:1])[0]
             start = dt.datetime.utcnow()
 
             ts = np.linspace(0, 24*60, 200)  # minutes
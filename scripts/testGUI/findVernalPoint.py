@@ -1,42 +1,19 @@
-from astropy.coordinates import SkyCoord, EarthLocation, AltAz
-from astropy.time import Time
-import astropy.units as u
+import datetime as dt
+from sgp4.api import jday
+from satellite_tracker.frames import SOFIA, radec_to_azel
 
 def findVernalPoint():
     """
     This function calculates the Vernal Point in AltAz coordinates for a given location and time.
     The Vernal Point is the point in the sky where the Sun crosses the celestial equator moving northward.
     """
-    # Define the Vernal Point in ICRS coordinates
-    vernal_point = SkyCoord(ra=0*u.hourangle, dec=0*u.deg, frame="icrs")
-    
-    # Location: Sofia, Bulgaria
-    sofia = EarthLocation(lat=42.7*u.deg, lon=23.3*u.deg, height=0*u.m)
-    
     # Current time
-    now = Time.now()
-    
-    # AltAz transformation
-    altaz_frame = AltAz(obstime=now, location=sofia)
-    vernal_altaz = vernal_point.transform_to(altaz_frame)
-    print("Azimuth (from North):", vernal_altaz.az.deg, "deg")
-    print("Altitude:", vernal_altaz.alt.deg, "deg")
-    return vernal_altaz.az.deg, vernal_altaz.alt.deg
-
-
-
-# # Define the Vernal Point in ICRS coordinates
-# vernal_point = SkyCoord(ra=0*u.hourangle, dec=0*u.deg, frame="icrs")
-
-# # Location: Sofia, Bulgaria
-# sofia = EarthLocation(lat=42.7*u.deg, lon=23.3*u.deg, height=0*u.m)
-
-# # Current time
-# now = Time.now()
-
-# # AltAz transformation
-# altaz_frame = AltAz(obstime=now, location=sofia)
-# vernal_altaz = vernal_point.transform_to(altaz_frame)
-
-# print("Altitude:", vernal_altaz.alt.deg, "deg")
-# print("Azimuth (from North):", vernal_altaz.az.deg, "deg")
+    now = dt.datetime.now(dt.timezone.utc)
+    jd, fr = jday(now.year, now.month, now.day, now.hour, now.minute,
+                  now.second + now.microsecond * 1e-6)
+
+    # The Vernal Point is RA 0h, Dec 0°; location: Sofia, Bulgaria
+    az, alt = radec_to_azel(0.0, 0.0, jd, fr, SOFIA)
+    print("Azimuth (from North):", float(az), "deg")
+    print("Altitude:", float(alt), "deg")
+    return float(az), float(alt)
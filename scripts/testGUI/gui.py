@@ -1,11 +1,11 @@
 from matplotlib.widgets import Button
-from sgp4.api import Satrec
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 (needed for 3D plot)
 import datetime as dt
-from sgp4.api import Satrec, jday
+from sgp4.api import jday
+from satellite_tracker.tle import load_tle_catalog, satrecs_from_catalog
 
 
 
@@ -31,17 +31,14 @@ def gui():
     # --- Load and plot TLE ---
     def load_tle(event):
         try:
-            with open("C:\\xampp\\htdocs\\18122\\Python\\1.PrepClass\\stage\\FindMySatellite_SC25\\scripts\\testGUI\\TLE.txt", "r") as f:
-                lines = f.read().splitlines()
-            if len(lines) < 3:
-                print("TLE file must have 3 lines (name + 2 lines)")
+            # parsed once, later loads map the binary cache next to the file
+            catalog = load_tle_catalog("C:\\xampp\\htdocs\\18122\\Python\\1.PrepClass\\stage\\FindMySatellite_SC25\\scripts\\testGUI\\TLE.txt")
+            if len(catalog) == 0:
+                print("TLE file has no valid record (name line optional + 2 lines)")
                 return
 
-            name = lines[0].strip()
-            line1 = lines[1].strip()
-            line2 = lines[2].strip()
-
-            sat = Satrec.twoline2rv(line1, line2)
+            name = catalog["name"][0].decode("ascii").strip()
+            sat = satrecs_from_catalog(catalog[:1])[0]
             start = dt.datetime.utcnow()
 
             ts = np.linspace(0, 24*60, 200)  # 24 hours, 200 samples
@@ -1,5 +1,9 @@
-from .lidarUtils import data_formatter
+from .lidarUtils import data_formatter, parse_frames
+from .clock import get_clock, set_clock
+from .hal import hal, open_hal
 from .servoUtils import set_angle
 from .classes import State
 from .classes import Operator
-from .lidar_reader import lidar_reader
\ No newline at end of file
+from .lidarSource import LidarSource, open_lidar_source
+from .stepSync import StepHandshake, TaggedSample
+from .lidar_reader import lidar_reader, lidar, step_handshake, LidarReader, SampleRing
\ No newline at end of file
@@ -0,0 +1,216 @@
+import math
+from bisect import bisect_left
+import numpy as np
+import globalsConfig as gv
+
+def ew_alpha(dt, tau):
+    """Weight of a new observation after `dt` seconds in an exponential average with time constant `tau`."""
+    return -np.expm1(-np.maximum(dt, 0.0) / tau)
+
+class BackgroundModel:
+    """
+    What the empty scene looks like: running mean, variance and sample
+    count of the LiDAR distance per cell of an azimuth x elevation grid
+    (cell centres in degrees, any spacing). Samples are merged in batches
+    with the parallel form of Welford's update, so a whole sweep is one
+    vectorized call. A sample is foreground when it is more than `sigma`
+    standard deviations from its cell's mean; `min_std` (cm) keeps cells
+    with a handful of identical readings from flagging sensor noise.
+
+    adapt() keeps the background current during long sessions: cells
+    follow the scene with an exponential average of time constant `tau`
+    (seconds), except cells that currently hold a target.
+    """
+
+    def __init__(self, az, el, sigma=gv.BACKGROUND_SIGMA, min_std=gv.BACKGROUND_MIN_STD, min_count=3,
+                 tau=gv.BACKGROUND_TAU):
+        self.az = np.asarray(az, dtype=float)
+        self.el = np.asarray(el, dtype=float)
+        self.sigma = sigma
+        self.min_std = min_std
+        self.min_count = min_count
+        self.tau = tau
+        shape = (len(self.az), len(self.el))
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.updated = np.full(shape, np.nan)  # clock time each cell last learned
+        self.flagged = np.zeros(shape, dtype=bool)
+        self._az_mid = (self.az[1:] + self.az[:-1]) / 2
+        self._el_mid = (self.el[1:] + self.el[:-1]) / 2
+        # scalar lookups run once per servo position, bisect skips the numpy call overhead
+        self._az_mid_list = self._az_mid.tolist()
+        self._el_mid_list = self._el_mid.tolist()
+
+    @property
+    def shape(self):
+        return self.count.shape
+
+    def index(self, az, el):
+        """Flat index of the nearest cell for each (az, el)."""
+        if np.ndim(az) == 0 and np.ndim(el) == 0:
+            return bisect_left(self._az_mid_list, az) * len(self.el) + bisect_left(self._el_mid_list, el)
+        i = np.searchsorted(self._az_mid, az)
+        j = np.searchsorted(self._el_mid, el)
+        return i * len(self.el) + j
+
+    def _batch(self, idx, distance):
+        # cells hit by the samples (flat indices `idx`) with their sample count, mean and M2
+        valid = np.isfinite(distance)
+        idx = idx[valid]
+        distance = distance[valid]
+        size = self.count.size
+        n_b = np.bincount(idx, minlength=size)
+        cells = np.flatnonzero(n_b)
+        n_b = n_b[cells]
+        mean_b = np.bincount(idx, weights=distance, minlength=size)[cells] / n_b
+        batch_mean = np.zeros(size)
+        batch_mean[cells] = mean_b
+        m2_b = np.bincount(idx, weights=(distance - batch_mean[idx]) ** 2, minlength=size)[cells]
+        return cells, n_b, mean_b, m2_b
+
+    def add(self, az, el, distance, t=None):
+        """Merge samples into their cells, taken at clock time `t` if given."""
+        distance = np.asarray(distance, dtype=float)
+        cells, n_b, mean_b, m2_b = self._batch(np.broadcast_to(self.index(az, el), distance.shape), distance)
+        self._merge(cells, n_b, mean_b, m2_b)
+        if t is not None:
+            self.updated.reshape(-1)[cells] = t
+
+    def _merge(self, cells, n_b, mean_b, m2_b):
+        count, mean, m2 = self.count.reshape(-1), self.mean.reshape(-1), self.m2.reshape(-1)
+        n_a = count[cells]
+        n = n_a + n_b
+        delta = mean_b - mean[cells]
+        mean[cells] += delta * n_b / n
+        m2[cells] += m2_b + delta ** 2 * n_a * n_b / n
+        count[cells] = n
+
+    def std(self):
+        """Per-cell sample standard deviation, floored at min_std."""
+        var = np.divide(self.m2, self.count - 1, out=np.zeros(self.shape), where=self.count > 1)
+        return np.maximum(np.sqrt(var), self.min_std)
+
+    def zscore(self, az, el, distance):
+        """Distance from the cell mean in standard deviations, NaN for cells without a baseline."""
+        return self._zscore(self.index(az, el), distance)
+
+    def _zscore(self, idx, distance):
+        if np.ndim(idx) == 0 and np.ndim(distance) == 0:
+            count = int(self.count.reshape(-1)[idx])
+            if count < self.min_count:
+                return math.nan
+            std = math.sqrt(self.m2.reshape(-1)[idx] / (count - 1)) if count > 1 else 0.0
+            return abs(float(distance) - float(self.mean.reshape(-1)[idx])) / max(std, self.min_std)
+        count = self.count.reshape(-1)[idx]
+        var = np.divide(self.m2.reshape(-1)[idx], count - 1, out=np.zeros(np.shape(idx)), where=count > 1)
+        z = np.abs(np.asarray(distance, dtype=float) - self.mean.reshape(-1)[idx]) / np.maximum(np.sqrt(var), self.min_std)
+        return np.where(count >= self.min_count, z, np.nan)
+
+    def is_foreground(self, az, el, distance):
+        with np.errstate(invalid="ignore"):
+            return self.zscore(az, el, distance) > self.sigma
+
+    def adapt(self, az, el, distance, t):
+        """
+        Learn from samples taken at clock time `t`. A cell with any
+        foreground sample is marked flagged and left alone; the others move
+        towards the new readings with weight 1 - exp(-dt / tau), dt being
+        the time since the cell last learned, and their variance follows the
+        same exponential weighting. Cells without a baseline yet just
+        accumulate. Returns the foreground mask of the samples.
+        """
+        distance = np.asarray(distance, dtype=float)
+        idx = np.broadcast_to(self.index(az, el), distance.shape)
+        with np.errstate(invalid="ignore"):
+            foreground = self._zscore(idx, distance) > self.sigma
+        flagged = self.flagged.reshape(-1)
+        flagged[idx] = False
+        flagged[idx[foreground]] = True
+
+        cells, n_b, mean_b, m2_b = self._batch(idx, distance)
+        count, mean, m2 = self.count.reshape(-1), self.mean.reshape(-1), self.m2.reshape(-1)
+        updated = self.updated.reshape(-1)
+        # the usual sweep has no target and no young cell, skip the selections then
+        skip = flagged[cells] | (count[cells] < self.min_count) | np.isnan(updated[cells])
+        if skip.any():
+            young = ~flagged[cells] & skip
+            self._merge(cells[young], n_b[young], mean_b[young], m2_b[young])
+            updated[cells[young]] = t
+            cells, n_b, mean_b, m2_b = cells[~skip], n_b[~skip], mean_b[~skip], m2_b[~skip]
+
+        alpha = ew_alpha(t - updated[cells], self.tau)
+        n = count[cells]
+        var = m2[cells] / np.maximum(n - 1, 1)
+        delta = mean_b - mean[cells]
+        mean[cells] += alpha * delta
+        var = (1 - alpha) * (var + alpha * delta ** 2) + alpha * m2_b / n_b
+        m2[cells] = var * np.maximum(n - 1, 1)
+        updated[cells] = t
+        return foreground
+
+class AngleBaseline:
+    """
+    Baseline distance along one axis, binned by angle: running mean and
+    variance per bin of `resolution` degrees from `start` to `stop`, so
+    repeated baseline sweeps merge into one set of statistics and a lookup
+    is an index computation instead of a search over every recorded sample.
+    Lookups fall back to the nearest bin that has samples.
+    """
+
+    def __init__(self, start, stop, resolution):
+        self.start = start
+        self.resolution = resolution
+        bins = int(round((stop - start) / resolution)) + 1
+        self.count = np.zeros(bins, dtype=np.int64)
+        self.mean = np.zeros(bins)
+        self.m2 = np.zeros(bins)
+        self._nearest = None
+
+    def index(self, angle):
+        """Bin of each angle, clipped to the covered range."""
+        i = np.rint((np.asarray(angle, dtype=float) - self.start) / self.resolution).astype(np.int64)
+        return np.clip(i, 0, len(self.count) - 1)
+
+    def add(self, angle, distance):
+        """Merge one sample into its bin (Welford)."""
+        i = self._bin(angle)
+        self.count[i] += 1
+        delta = distance - self.mean[i]
+        self.mean[i] += delta / self.count[i]
+        self.m2[i] += delta * (distance - self.mean[i])
+        self._nearest = None
+
+    def __len__(self):
+        return int(self.count.sum())
+
+    def _bin(self, angle):
+        # scalar index() without the numpy call overhead, lookups run once per sample
+        return min(max(int(round((angle - self.start) / self.resolution)), 0), len(self.count) - 1)
+
+    def nearest(self, angle):
+        """Index of the filled bin nearest to each angle, -1 while the baseline is empty."""
+        if self._nearest is None:
+            filled = np.flatnonzero(self.count)
+            bins = np.arange(len(self.count))
+            if not len(filled):
+                self._nearest = np.full(len(bins), -1)
+            else:
+                hi = np.minimum(np.searchsorted(filled, bins), len(filled) - 1)
+                lo = np.maximum(hi - 1, 0)
+                self._nearest = np.where(bins - filled[lo] <= filled[hi] - bins, filled[lo], filled[hi])
+        if np.ndim(angle) == 0:
+            return int(self._nearest[self._bin(angle)])
+        return self._nearest[self.index(angle)]
+
+    def lookup(self, angle):
+        """Mean baseline distance and its standard deviation at `angle`, NaN while empty."""
+        i = self.nearest(angle)
+        if np.ndim(angle) == 0:
+            if i < 0:
+                return np.nan, np.nan
+            n = int(self.count[i])
+            return float(self.mean[i]), math.sqrt(self.m2[i] / (n - 1)) if n > 1 else 0.0
+        n = self.count[i]
+        std = np.sqrt(np.divide(self.m2[i], n - 1, out=np.zeros(len(i)), where=n > 1))
+        return np.where(i >= 0, self.mean[i], np.nan), np.where(i >= 0, std, np.nan)
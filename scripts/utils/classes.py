@@ -1,43 +1,190 @@
+import logging
+import queue
+from collections import Counter
+import numpy as np
+from utils.clock import get_clock
+
+logger = logging.getLogger(__name__)
+
+# execute() latency histogram bin edges in seconds, 100 us .. 10 s
+LATENCY_BINS = np.logspace(-4, 1, 21)
+
 class State:
     def __init__(self, name):
         self.name = name
 
+    def enter(self):
+        """Called when the operator switches to this state."""
+
+    def exit(self):
+        """Called when the operator leaves this state."""
+
+    def handle(self, event):
+        """React to an event posted to the operator.
+        Return the name of the next state, or None to ignore it."""
+        return None
+
     def execute(self):
         """Run the state logic.
         Return the name of the next state."""
         raise NotImplementedError
 
+class StateStats:
+    """ Time spent in one state and how long its execute() calls take """
+
+    def __init__(self):
+        self.visits = 0
+        self.dwell = 0.0
+        self.executions = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_hist = np.zeros(len(LATENCY_BINS) + 1, dtype=np.int64)
+
+    def record(self, latency):
+        self.executions += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.latency_hist[np.searchsorted(LATENCY_BINS, latency)] += 1
+
+    def latency_percentile(self, q):
+        """Upper edge of the histogram bin holding the q-th percentile (0-100), capped at the max."""
+        if not self.executions:
+            return 0.0
+        idx = int(np.searchsorted(np.cumsum(self.latency_hist), q / 100 * self.executions))
+        return min(float(LATENCY_BINS[idx]), self.latency_max) if idx < len(LATENCY_BINS) else self.latency_max
 
 class Operator:
-    def __init__(self, states, start_state):
+    """
+    Runs one state at a time. With `tick` (seconds) execute() is called on
+    a fixed schedule, otherwise back to back; posted events are delivered
+    to the current state in between. `guards` maps (from, to) to a callable
+    that must return True for that transition to happen, `timeouts` maps a
+    state to (seconds, next state) for leaving it after that long.
+    """
+
+    def __init__(self, states, start_state, tick=None, guards=None, timeouts=None, clock=None):
         self.states = states
         self.state_name = start_state
+        self.tick = tick
+        self.guards = guards or {}
+        self.timeouts = timeouts or {}
+        self.clock = clock or get_clock()
+        self.stats = {name: StateStats() for name in states}
+        self.transitions = Counter()
+        self.blocked = Counter()
+        self._events = queue.Queue()
+        self._running = False
+        self._entered = None
+
+    def post(self, event):
+        """Queue an event for the current state, safe to call from other threads."""
+        self._events.put(event)
 
-    def run(self):
+    def stop(self):
+        self._running = False
+
+    def transition(self, next_state, reason="execute"):
+        if next_state == self.state_name:
+            return False
+        if next_state not in self.states:
+            raise KeyError(f"State '{self.state_name}' returned unknown state '{next_state}'")
+        guard = self.guards.get((self.state_name, next_state))
+        if guard is not None and not guard():
+            self.blocked[(self.state_name, next_state)] += 1
+            return False
+
+        now = self.clock.now()
+        self.stats[self.state_name].dwell += now - self._entered
+        self.states[self.state_name].exit()
+        logger.info("[STATE CHANGE] %s → %s (%s)", self.state_name, next_state, reason)
+        self.transitions[(self.state_name, next_state)] += 1
+        self.state_name = next_state
+        self._enter(now)
+        return True
+
+    def _enter(self, now):
+        self._entered = now
+        self.stats[self.state_name].visits += 1
+        self.states[self.state_name].enter()
+
+    def _dispatch(self, event):
+        next_state = self.states[self.state_name].handle(event)
+        if next_state is not None:
+            self.transition(next_state, f"event {event!r}")
+
+    def _drain_events(self):
         while True:
-            state_obj = self.states[self.state_name]
-            next_state = state_obj.execute()
-            if next_state != self.state_name:
-                print(f"[STATE CHANGE] {self.state_name} → {next_state}")
-            self.state_name = next_state
-
-# class State:
-#     def __init__(self, name):
-#         self.name = name
-
-#     def execute(self):
-#         raise NotImplementedError
-
-# class Operator:
-#     def __init__(self, states, start_state):
-#         self.states = states
-#         self.state_name = start_state
-
-#     def run(self):
-#         while True:
-#             state_obj = self.states[self.state_name]
-#             next_state = state_obj.execute()
-#             if next_state != self.state_name:
-#                 print(f"[STATE CHANGE] {self.state_name} → {next_state}")
-#             self.state_name = next_state
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                return
+            self._dispatch(event)
+
+    def _wait(self, delay):
+        # on the real clock an event cuts the wait short, the virtual clock has no other threads
+        if self.clock.virtual:
+            self.clock.sleep(delay)
+            return
+        deadline = self.clock.now() + delay
+        while delay > 0:
+            try:
+                self._dispatch(self._events.get(timeout=delay))
+            except queue.Empty:
+                return
+            delay = deadline - self.clock.now()
+
+    def step(self):
+        """Deliver pending events, apply the current state's timeout, then execute it once."""
+        if self._entered is None:
+            self._enter(self.clock.now())
+        self._drain_events()
+
+        timeout = self.timeouts.get(self.state_name)
+        if timeout is not None and self.clock.now() - self._entered >= timeout[0]:
+            if self.transition(timeout[1], "timeout"):
+                return
+
+        state_name = self.state_name
+        start = self.clock.now()
+        next_state = self.states[state_name].execute()
+        self.stats[state_name].record(self.clock.now() - start)
+        self.transition(next_state)
+
+    def run(self, duration=None):
+        """Run until stop() or for `duration` seconds of clock time."""
+        self._running = True
+        start = next_tick = self.clock.now()
+        try:
+            while self._running:
+                self.step()
+                now = self.clock.now()
+                if duration is not None and now - start >= duration:
+                    break
+                if self.tick:
+                    next_tick = max(next_tick + self.tick, now)
+                    self._wait(next_tick - now)
+        finally:
+            self._running = False
+            if self._entered is not None:
+                now = self.clock.now()
+                self.stats[self.state_name].dwell += now - self._entered
+                self._entered = now
 
+    def report(self):
+        """Per-state dwell time, execute() latency and transition counts as text, also logged."""
+        total = sum(s.dwell for s in self.stats.values()) or 1.0
+        lines = [f"{'state':<10}{'visits':>7}{'dwell s':>10}{'share':>7}{'execs':>8}"
+                 f"{'mean ms':>9}{'p50 ms':>8}{'p95 ms':>8}{'max ms':>9}"]
+        for name, s in self.stats.items():
+            mean = s.latency_total / s.executions if s.executions else 0.0
+            lines.append(f"{name:<10}{s.visits:>7}{s.dwell:>10.2f}{s.dwell / total:>7.0%}{s.executions:>8}"
+                         f"{mean * 1e3:>9.2f}{s.latency_percentile(50) * 1e3:>8.1f}"
+                         f"{s.latency_percentile(95) * 1e3:>8.1f}{s.latency_max * 1e3:>9.2f}")
+        for (a, b), n in sorted(self.transitions.items()):
+            lines.append(f"{a} → {b}: {n}" + (f" ({self.blocked[(a, b)]} blocked)" if self.blocked[(a, b)] else ""))
+        for (a, b), n in sorted(self.blocked.items()):
+            if (a, b) not in self.transitions:
+                lines.append(f"{a} → {b}: 0 ({n} blocked)")
+        text = "\n".join(lines)
+        logger.info("Operator report\n%s", text)
+        return text
@@ -0,0 +1,118 @@
+import heapq
+import itertools
+import threading
+import time
+import globalsConfig as gv
+
+class RealClock:
+    """ Wall time on the monotonic clock; scheduled callbacks run on timer threads """
+    virtual = False
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def schedule(self, delay, callback):
+        timer = threading.Timer(max(delay, 0), callback)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def every(self, interval, callback):
+        return _Repeater(interval, callback)
+
+class _Repeater(threading.Thread):
+    def __init__(self, interval, callback):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.callback = callback
+        self._cancelled = threading.Event()
+        self.start()
+
+    def run(self):
+        while not self._cancelled.wait(self.interval):
+            self.callback()
+
+    def cancel(self):
+        self._cancelled.set()
+
+class _Event:
+    __slots__ = ("callback", "interval", "cancelled")
+
+    def __init__(self, callback, interval):
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class VirtualClock:
+    """
+    Discrete-event clock for simulation. Time only moves when someone
+    sleeps: sleep() jumps straight to the next scheduled event, runs it, and
+    so on until the wake-up time, so a long session costs only as much CPU
+    as the events in it. Everything runs on the calling thread.
+
+    on_advance() callbacks run every time the clock moves forward, which is
+    how lazily driven processes (e.g. the LiDAR reader) catch up to now.
+    """
+    virtual = True
+
+    def __init__(self, start=0.0):
+        self._now = start
+        self._queue = []
+        self._seq = itertools.count()
+        self._watchers = []
+
+    def now(self):
+        return self._now
+
+    def schedule(self, delay, callback):
+        return self._push(self._now + max(delay, 0), _Event(callback, None))
+
+    def every(self, interval, callback):
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        return self._push(self._now + interval, _Event(callback, interval))
+
+    def on_advance(self, callback):
+        self._watchers.append(callback)
+
+    def _push(self, when, event):
+        heapq.heappush(self._queue, (when, next(self._seq), event))
+        return event
+
+    def _advance(self, t):
+        if t > self._now:
+            self._now = t
+            for callback in self._watchers:
+                callback()
+
+    def run_until(self, t):
+        while self._queue and self._queue[0][0] <= t:
+            when, _, event = heapq.heappop(self._queue)
+            if event.cancelled:
+                continue
+            self._advance(when)
+            if event.interval:
+                self._push(when + event.interval, event)
+            event.callback()
+        self._advance(t)
+
+    def sleep(self, seconds):
+        self.run_until(self._now + max(seconds, 0))
+
+_clock = VirtualClock() if gv.CLOCK == "virtual" else RealClock()
+
+def get_clock():
+    return _clock
+
+def set_clock(clock):
+    """ Swap the clock used by the actuators, LiDAR sources and scanners; returns the previous one """
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
@@ -0,0 +1,110 @@
+from collections import namedtuple
+import numpy as np
+import globalsConfig as gv
+from .clock import get_clock
+
+class AxisTimeline:
+    """
+    Where one actuator axis pointed over time, as breakpoints for np.interp.
+    Each command adds a ramp from the angle at the command time to the
+    target, taking `duration` seconds; a command issued mid-move cuts the
+    previous ramp short. Only the most recent `capacity` breakpoints are
+    kept, which at a few commands per second covers well over the LiDAR
+    sample ring.
+    """
+
+    def __init__(self, angle=0.0, capacity=4096):
+        self.t = np.zeros(capacity)
+        self.angle = np.zeros(capacity)
+        self.angle[0] = angle
+        self.count = 1
+        self._ramp = (0.0, float(angle), 0.0, float(angle))  # last ramp as Python floats
+
+    def angle_at(self, t):
+        """Angle at time(s) t, held constant before the first and after the last breakpoint."""
+        if not isinstance(t, np.ndarray):
+            # scalar queries (every command asks) nearly always fall on the last ramp
+            t0, a0, t1, a1 = self._ramp
+            if t >= t1:
+                return a1
+            if t >= t0:
+                return a0 + (a1 - a0) * (t - t0) / (t1 - t0)
+        angle = np.interp(t, self.t[:self.count], self.angle[:self.count])
+        return float(angle) if np.ndim(angle) == 0 else angle
+
+    def settled(self):
+        """Time the last commanded move ends."""
+        return float(self.t[self.count - 1])
+
+    def command(self, t, target, duration=0.0, rate=None):
+        """Ramp to `target` from time t over `duration` seconds, or at `rate` deg/s if given."""
+        current = self.angle_at(t)
+        if rate is not None:
+            duration = abs(target - current) / rate
+        if t >= self._ramp[2]:
+            n = self.count
+        else:
+            n = int(np.searchsorted(self.t[:self.count], t, side="right"))
+        if n + 2 > len(self.t):
+            keep = len(self.t) // 2
+            self.t[:keep] = self.t[n - keep:n]
+            self.angle[:keep] = self.angle[n - keep:n]
+            n = keep
+        end = t + max(duration, 1e-9)
+        self.t[n], self.angle[n] = t, current
+        self.t[n + 1], self.angle[n + 1] = end, target
+        self.count = n + 2
+        self._ramp = (float(t), float(current), float(end), float(target))
+
+# LiDAR samples with the pointing interpolated at each sample time (deg)
+FusedSamples = namedtuple("FusedSamples", ["t", "az", "el", "distance", "strength"])
+
+class PointingFusion:
+    """
+    Pairs LiDAR samples from a LidarReader with the azimuth/elevation the
+    head actually had when each was taken, from the actuator timelines
+    (e.g. hal.stepper.timeline, hal.servo.timeline). The offsets convert
+    actuator angles to the scanner's frame.
+    """
+
+    def __init__(self, reader, az_axis, el_axis, az_offset=0.0, el_offset=0.0, window=None):
+        self.reader = reader
+        self.az_axis = az_axis
+        self.el_axis = el_axis
+        self.az_offset = az_offset
+        self.el_offset = el_offset
+        self.window = 2.0 / gv.LIDAR_FRAME_RATE if window is None else window
+
+    def between(self, t0, t1):
+        t, distance, strength = self.reader.between(t0, t1)
+        az, el = self.az_axis.angle_at(t), self.el_axis.angle_at(t)
+        if self.az_offset:
+            az -= self.az_offset
+        if self.el_offset:
+            el -= self.el_offset
+        return FusedSamples(t, az, el, distance, strength)
+
+    def settled(self):
+        return max(self.az_axis.settled(), self.el_axis.settled())
+
+    def sample(self, window=None, clock=None):
+        """
+        Samples taken since both axes reached their last commanded angle,
+        waiting only as long as the move still needs plus `window` seconds
+        of samples (two frames by default), instead of a fixed settle sleep.
+        """
+        clock = clock or get_clock()
+        window = self.window if window is None else window
+        t0 = self.settled()
+        clock.sleep(t0 + window - clock.now())
+        samples = self.between(t0, clock.now())
+        if not len(samples.t):
+            # the reader can be a poll behind the sensor, give it one more window
+            clock.sleep(window)
+            samples = self.between(t0, clock.now())
+        return samples
+
+    def distance(self, window=None, clock=None):
+        """Median distance seen at the current pointing, or None without samples."""
+        samples = self.sample(window, clock)
+        return float(np.median(samples.distance)) if len(samples.distance) else None
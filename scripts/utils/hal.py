@@ -0,0 +1,266 @@
+import time
+import globalsConfig as gv
+from utils.clock import get_clock
+from utils.fusion import AxisTimeline
+
+# BCM pin numbers of the scanner head
+SERVO_PIN = 18
+AUX_PIN = 17
+ENABLE_PIN = 16
+STEP_PIN = 20
+DIR_PIN = 21
+MODE_PINS = (6, 19, 26)
+
+CW = 1
+ACW = 0
+FULL_STEPS_PER_REV = 200
+
+RESOLUTION = {
+    'Full': (0, 0, 0),
+    'Half': (1, 0, 0),
+    '1/4':  (0, 1, 0),
+    '1/8':  (1, 1, 0),
+    '1/16': (0, 0, 1),
+    '1/32': (1, 0, 1)
+}
+MICROSTEPS = {'Full': 1, 'Half': 2, '1/4': 4, '1/8': 8, '1/16': 16, '1/32': 32}
+
+class Servo:
+    """
+    Hobby servo on a 50 Hz PWM pin. Angles map linearly to duty cycle
+    (duty = min_duty + angle / 180 * span); backends implement _write_duty.
+    Every command is recorded in `timeline` as a ramp at `slew_rate` deg/s,
+    the servo has no position feedback so that is the best estimate of
+    where it points.
+    """
+
+    def __init__(self, min_duty=1.5, span=10.0, slew_rate=gv.SERVO_SLEW_RATE):
+        self.min_duty = min_duty
+        self.span = span
+        self.slew_rate = slew_rate
+        self.angle = None  # last commanded angle
+        self.timeline = AxisTimeline()
+
+    def duty_for(self, angle):
+        return self.min_duty + (angle / 180) * self.span
+
+    def angle_for(self, duty):
+        return (duty - self.min_duty) / self.span * 180
+
+    def set_duty(self, duty):
+        self._write_duty(duty)
+        if duty:
+            self.angle = self.angle_for(duty)
+            self.timeline.command(get_clock().now(), self.angle, rate=self.slew_rate)
+
+    def set_angle(self, angle):
+        self.set_duty(self.duty_for(angle))
+
+    def release(self):
+        """Stop driving the servo (duty 0), it holds position mechanically."""
+        self._write_duty(0)
+
+    def _write_duty(self, duty):
+        raise NotImplementedError
+
+class Stepper:
+    """
+    Step/dir driver with microstep mode pins and an active-low enable.
+    `position` counts microsteps since start, positive is CW; `timeline`
+    records the angle over time, each move ramping over its pulse time.
+    """
+
+    def __init__(self):
+        self.resolution = '1/8'
+        self.position = 0
+        self.timeline = AxisTimeline()
+
+    @property
+    def steps_per_rev(self):
+        return FULL_STEPS_PER_REV * MICROSTEPS[self.resolution]
+
+    def setup(self, resolution='1/8'):
+        self.resolution = resolution
+        self._setup(RESOLUTION[resolution])
+        self.disable()
+
+    def enable(self):
+        self._enable(True)
+
+    def disable(self):
+        self._enable(False)
+
+    def move(self, steps, delay=0.0005):
+        """Pulse `steps` microsteps (signed), each taking 2 * delay seconds. The driver must be enabled."""
+        if steps == 0:
+            return
+        target = (self.position + steps) * 360 / self.steps_per_rev
+        self.timeline.command(get_clock().now(), target, abs(steps) * 2 * delay)
+        self._pulse(abs(steps), CW if steps > 0 else ACW, delay)
+        self.position += steps
+
+    def angle(self):
+        return self.position * 360 / self.steps_per_rev
+
+    def _setup(self, mode):
+        raise NotImplementedError
+
+    def _enable(self, on):
+        raise NotImplementedError
+
+    def _pulse(self, count, direction, delay):
+        raise NotImplementedError
+
+class HAL:
+    """ The actuators of one scanner head plus plain digital outputs """
+
+    def output(self, pin, value):
+        raise NotImplementedError
+
+    def cleanup(self):
+        pass
+
+# ------------------- RPi backend -------------------
+
+class RPiServo(Servo):
+    def __init__(self, hal, **kwargs):
+        super().__init__(**kwargs)
+        self.hal = hal
+
+    def _write_duty(self, duty):
+        self.hal.gpio()
+        self.hal.pwm.ChangeDutyCycle(duty)
+
+class RPiStepper(Stepper):
+    def __init__(self, hal):
+        super().__init__()
+        self.hal = hal
+
+    def _setup(self, mode):
+        GPIO = self.hal.gpio()
+        GPIO.setup(DIR_PIN, GPIO.OUT)
+        GPIO.setup(STEP_PIN, GPIO.OUT)
+        GPIO.setup(ENABLE_PIN, GPIO.OUT)
+        GPIO.setup(MODE_PINS, GPIO.OUT)
+        GPIO.output(MODE_PINS, mode)
+
+    def _enable(self, on):
+        GPIO = self.hal.gpio()
+        GPIO.output(ENABLE_PIN, GPIO.LOW if on else GPIO.HIGH)
+
+    def _pulse(self, count, direction, delay):
+        GPIO = self.hal.gpio()
+        GPIO.output(DIR_PIN, direction)
+        for _ in range(count):
+            GPIO.output(STEP_PIN, GPIO.HIGH)
+            time.sleep(delay)
+            GPIO.output(STEP_PIN, GPIO.LOW)
+            time.sleep(delay)
+
+class RPiHAL(HAL):
+    """
+    Raspberry Pi GPIO. RPi.GPIO is imported and the pins set up on first
+    use, not at import. Keyword arguments calibrate the servo (min_duty, span).
+    """
+
+    def __init__(self, **servo):
+        self.GPIO = None
+        self.pwm = None
+        self.servo = RPiServo(self, **servo)
+        self.stepper = RPiStepper(self)
+
+    def gpio(self):
+        if self.GPIO is None:
+            import RPi.GPIO as GPIO
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(AUX_PIN, GPIO.OUT)
+            GPIO.setup(SERVO_PIN, GPIO.OUT)
+            self.pwm = GPIO.PWM(SERVO_PIN, 50)
+            self.pwm.start(0)
+            self.GPIO = GPIO
+        return self.GPIO
+
+    def output(self, pin, value):
+        GPIO = self.gpio()
+        GPIO.setup(pin, GPIO.OUT)
+        GPIO.output(pin, value)
+
+    def cleanup(self):
+        if self.GPIO is not None:
+            self.pwm.stop()
+            self.GPIO.cleanup()
+            self.GPIO = None
+
+# ------------------- Simulated backend -------------------
+
+class SimServo(Servo):
+    """ Servo that slews towards the commanded angle at `slew_rate` deg/s, exactly as its timeline says """
+
+    def __init__(self, clock, **kwargs):
+        super().__init__(**kwargs)
+        self.clock = clock
+
+    def _write_duty(self, duty):
+        pass
+
+    def position(self, t=None):
+        """Mechanical angle at time t (now by default), t may be an array of times."""
+        return self.timeline.angle_at(self.clock() if t is None else t)
+
+class SimStepper(Stepper):
+    """ Stepper whose moves take the real pulse time on the injected clock """
+
+    def __init__(self, clock, sleep):
+        super().__init__()
+        self.clock = clock
+        self.sleep = sleep
+        self.enabled = False
+        self.skipped = 0  # steps commanded while the driver was disabled
+
+    def _setup(self, mode):
+        pass
+
+    def _enable(self, on):
+        self.enabled = on
+
+    def move(self, steps, delay=0.0005):
+        if not self.enabled:
+            self.skipped += abs(steps)
+            return
+        super().move(steps, delay)
+
+    def _pulse(self, count, direction, delay):
+        self.sleep(count * 2 * delay)
+
+class SimHAL(HAL):
+    """
+    Simulated scanner head for running the scanners off the Pi. Positions
+    are computed from `clock` and blocking moves wait on `sleep`, both the
+    shared clock from utils.clock by default, so on the virtual clock a scan
+    runs as fast as the CPU allows. Other keyword arguments calibrate the
+    servo like on the Pi.
+    """
+
+    def __init__(self, clock=None, sleep=None, **servo):
+        clock = clock or (lambda: get_clock().now())
+        sleep = sleep or (lambda seconds: get_clock().sleep(seconds))
+        self.servo = SimServo(clock, **servo)
+        self.stepper = SimStepper(clock, sleep)
+        self.pins = {}
+
+    def output(self, pin, value):
+        self.pins[pin] = value
+
+def open_hal(kind=None, **servo):
+    """
+    Backend selected by `kind` or HAL_BACKEND in globalsConfig: "rpi" or
+    "sim". `servo` keywords (min_duty, span) set the servo calibration.
+    """
+    kind = kind or gv.HAL_BACKEND
+    if kind == "rpi":
+        return RPiHAL(**servo)
+    if kind == "sim":
+        return SimHAL(**servo)
+    raise ValueError(f"Unknown HAL backend '{kind}'")
+
+hal = open_hal()
@@ -0,0 +1,216 @@
+from collections import namedtuple
+import numpy as np
+import globalsConfig as gv
+from .lidarUtils import FRAME_SIZE, parse_frames
+from .clock import get_clock
+
+EMPTY = (np.zeros(0), np.zeros(0), np.zeros(0))
+
+class LidarSource:
+    """
+    Where LiDAR samples come from. read() returns (t, distance, strength)
+    arrays of every sample that became available since the last call, with
+    t on the monotonic clock and distance in cm like the TFmini reports it.
+    """
+    corrupt = 0
+    poll_interval = 0.002
+
+    def clock(self):
+        return get_clock().now()
+
+    def sleep(self, seconds):
+        get_clock().sleep(seconds)
+
+    def read(self):
+        raise NotImplementedError
+
+    def read_one(self, timeout=0.1):
+        """Distance of the newest sample available within `timeout` seconds, or None."""
+        deadline = self.clock() + timeout
+        while True:
+            t, distance, strength = self.read()
+            if len(distance):
+                return distance[-1]
+            if self.clock() >= deadline:
+                return None
+            self.sleep(self.poll_interval)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SerialLidarSource(LidarSource):
+    """ TFmini on a serial port, opened on the first read so it can be retried after errors """
+
+    def __init__(self, port=gv.SERIAL_PORT, baudrate=gv.SERIAL_BAUDRATE, frame_rate=gv.LIDAR_FRAME_RATE):
+        self.port = port
+        self.baudrate = baudrate
+        self.frame_period = 1.0 / frame_rate
+        self.ser = None
+        self.corrupt = 0
+        self._pending = b""
+        self._last_t = None
+
+    def open(self):
+        import serial
+        self.ser = serial.Serial(self.port, self.baudrate, timeout=0)
+
+    def close(self):
+        if self.ser is not None:
+            self.ser.close()
+            self.ser = None
+        self._pending = b""
+
+    def read(self):
+        if self.ser is None:
+            self.open()
+        waiting = self.ser.in_waiting
+        if not waiting:
+            return EMPTY
+        chunk = self.ser.read(waiting)
+        now = self.clock()
+        buf = self._pending + chunk
+        frames = parse_frames(buf)
+        self._pending = bytes(buf[frames.consumed:])
+        self.corrupt += frames.corrupt
+        n = len(frames.distance)
+        if not n:
+            return EMPTY
+        # the newest frame ended as many byte times (start + 8 data + stop
+        # bits) before `now` as there are bytes after it; the sensor sent the
+        # ones queued before it one frame period apart
+        last = now - (len(buf) - (frames.offsets[-1] + FRAME_SIZE)) * (10.0 / self.baudrate)
+        t = last - np.arange(n - 1, -1, -1) * self.frame_period
+        if self._last_t is not None and t[0] <= self._last_t:
+            # more frames queued than periods since the previous batch (a burst
+            # after a stall): spread them evenly after its last sample instead
+            last = max(last, self._last_t + n * 1e-6)
+            t = self._last_t + (last - self._last_t) * np.arange(1, n + 1) / n
+        self._last_t = t[-1]
+        return t, frames.distance, frames.strength
+
+def save_recording(path, t, distance, strength):
+    """ Store samples in the .npz layout ReplayLidarSource plays back """
+    np.savez(path, t=np.asarray(t, dtype=float), distance=np.asarray(distance, dtype=float),
+             strength=np.asarray(strength, dtype=float))
+
+class ReplayLidarSource(LidarSource):
+    """
+    Plays a recording (.npz with t, distance and optionally strength) back
+    against the clock. `speed` > 1 plays faster than real time; speed=0
+    ignores the clock and hands out `chunk_size` samples per read, which is
+    what throughput benchmarks want. Timestamps are shifted to start now and
+    scaled by the speed so consumers see a live-looking stream.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False, chunk_size=1024):
+        with np.load(path) as data:
+            self.t = np.asarray(data["t"], dtype=float)
+            self.distance = np.asarray(data["distance"], dtype=float)
+            self.strength = (np.asarray(data["strength"], dtype=float) if "strength" in data.files
+                             else np.zeros_like(self.distance))
+        self.t = self.t - self.t[0] if len(self.t) else self.t
+        self.speed = speed
+        self.loop = loop
+        self.chunk_size = chunk_size
+        self.position = 0
+        self.start = self.clock()
+
+    @property
+    def exhausted(self):
+        return not self.loop and self.position >= len(self.t)
+
+    def read(self):
+        if self.position >= len(self.t):
+            if not self.loop or not len(self.t):
+                return EMPTY
+            self.position = 0
+            self.start += self.t[-1] / (self.speed or 1.0)
+
+        scale = self.speed or 1.0
+        if self.speed:
+            end = np.searchsorted(self.t, (self.clock() - self.start) * self.speed, side="right")
+        else:
+            end = min(self.position + self.chunk_size, len(self.t))
+        sl = slice(self.position, max(end, self.position))
+        self.position = sl.stop
+        return self.start + self.t[sl] / scale, self.distance[sl], self.strength[sl]
+
+# angular position (deg) at the source's start time, angular rates (deg/s),
+# range (cm) and angular radius (deg) of a simulated target
+SyntheticTarget = namedtuple("SyntheticTarget", ["az", "el", "az_rate", "el_rate", "distance", "radius"])
+
+def default_scene(az, el):
+    """ Smooth static background, a room roughly 4-8 m away """
+    return 600.0 + 200.0 * np.cos(np.radians(2.0 * az)) + 2.0 * el
+
+def current_pointing(t):
+    """ Where the scanner points now, from the positions the actuators publish """
+    return gv.stepper_pos, gv.servo_pos
+
+class SyntheticLidarSource(LidarSource):
+    """
+    Simulated TFmini: samples at `rate` Hz of a static scene plus moving
+    targets, seen along the direction `pointing(t)` returns as (az, el) in
+    degrees for an array of sample times.
+    """
+
+    def __init__(self, pointing=current_pointing, scene=default_scene, targets=(), rate=gv.LIDAR_FRAME_RATE,
+                 noise=1.0, strength=1000.0, seed=None):
+        self.pointing = pointing
+        self.scene = scene
+        self.targets = list(targets)
+        self.period = 1.0 / rate
+        self.noise = noise
+        self.strength = strength
+        self.rng = np.random.default_rng(seed)
+        self.start = self.clock()
+        self.next_t = self.start
+
+    def sample(self, t):
+        """ Distance and strength seen at sample times t """
+        # pointing may be scalars (the usual gv positions) or arrays over t;
+        # scalars stay Python floats, much cheaper than 0-d arrays in the scene
+        az, el = self.pointing(t)
+        distance = np.empty(t.shape)
+        distance[...] = self.scene(az, el)
+        for target in self.targets:
+            target_az = target.az + target.az_rate * (t - self.start)
+            target_el = target.el + target.el_rate * (t - self.start)
+            hit = np.hypot(az - target_az, el - target_el) <= target.radius
+            np.minimum(distance, np.where(hit, target.distance, np.inf), out=distance)
+        if self.noise:
+            distance += self.rng.normal(0.0, self.noise, t.shape)
+        np.maximum(distance, 0.0, out=distance)
+        return np.round(distance, out=distance), np.full(t.shape, self.strength)
+
+    def read(self):
+        now = self.clock()
+        if now < self.next_t:
+            return EMPTY
+        n = int((now - self.next_t) / self.period) + 1
+        t = self.next_t + np.arange(n) * self.period
+        self.next_t = t[-1] + self.period
+        distance, strength = self.sample(t)
+        return t, distance, strength
+
+def open_lidar_source(kind=None, **kwargs):
+    """
+    Source selected by `kind` or LIDAR_SOURCE in globalsConfig: "serial",
+    "replay" (LIDAR_REPLAY_FILE at LIDAR_REPLAY_SPEED) or "synthetic".
+    """
+    kind = kind or gv.LIDAR_SOURCE
+    if kind == "serial":
+        return SerialLidarSource(**kwargs)
+    if kind == "replay":
+        kwargs.setdefault("path", gv.LIDAR_REPLAY_FILE)
+        kwargs.setdefault("speed", gv.LIDAR_REPLAY_SPEED)
+        return ReplayLidarSource(**kwargs)
+    if kind == "synthetic":
+        return SyntheticLidarSource(**kwargs)
+    raise ValueError(f"Unknown LiDAR source '{kind}'")
@@ -1,3 +1,9 @@
+from collections import namedtuple
+import numpy as np
+
+FRAME_SIZE = 9
+FRAME_HEADER = 0x59
+
 def data_formatter(data_bytes):
     if isinstance(data_bytes, bytes):
         data = list(data_bytes)
@@ -15,3 +21,70 @@ def data_formatter(data_bytes):
 
     distance = float((data[3] << 8) | data[2])
     return distance
+
+# distance (cm), strength, temperature (deg C) of every valid frame, the byte
+# offset where each frame starts, how many bytes of the chunk were used up
+# (keep chunk[consumed:] for the next read) and how many frames were corrupt
+LidarFrames = namedtuple("LidarFrames", ["distance", "strength", "temperature", "offsets", "consumed", "corrupt"])
+
+def parse_frames(chunk):
+    """
+    Parse every TFmini frame in an arbitrary bytes/bytearray/memoryview chunk.
+
+    Frames are found by their 0x59 0x59 header, checksums are verified for
+    all candidates at once with NumPy, and overlapping candidates (a header
+    pattern inside a real frame) are resolved in stream order. A partial
+    frame at the end of the chunk is left unconsumed. `corrupt` counts the
+    skipped byte spans, not every failed header candidate inside them.
+    """
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    n = len(data)
+    empty = np.zeros(0)
+    if n < 2:
+        return LidarFrames(empty, empty, empty, np.zeros(0, dtype=np.intp), 0, 0)
+
+    header = (data[:-1] == FRAME_HEADER) & (data[1:] == FRAME_HEADER)
+    candidates = np.flatnonzero(header[:max(n - FRAME_SIZE + 1, 0)])
+
+    if len(candidates):
+        windows = np.lib.stride_tricks.sliding_window_view(data, FRAME_SIZE)[candidates].astype(np.int64)
+        valid = (windows[:, :8].sum(axis=1) & 0xFF) == windows[:, 8]
+        starts = candidates[valid]
+        if len(starts) > 1 and np.any(np.diff(starts) < FRAME_SIZE):
+            keep = []
+            next_free = 0
+            for start in starts.tolist():
+                if start >= next_free:
+                    keep.append(start)
+                    next_free = start + FRAME_SIZE
+            starts = np.array(keep, dtype=np.intp)
+        frames = np.lib.stride_tricks.sliding_window_view(data, FRAME_SIZE)[starts].astype(np.int64)
+
+        # failed candidates inside a valid frame are payload bytes, the rest
+        # are skipped while resyncing; overlapping ones (a 0x59 run) between
+        # the same two valid frames are one skipped span, one corrupt frame
+        failed = candidates[~valid]
+        idx = np.searchsorted(starts, failed, side="right") - 1
+        if len(starts):
+            outside = (idx < 0) | (failed >= starts[np.maximum(idx, 0)] + FRAME_SIZE)
+            failed, idx = failed[outside], idx[outside]
+        corrupt = int(len(failed) > 0) + int(np.count_nonzero((np.diff(failed) >= FRAME_SIZE) | (np.diff(idx) != 0)))
+    else:
+        starts = np.zeros(0, dtype=np.intp)
+        frames = np.zeros((0, FRAME_SIZE), dtype=np.int64)
+        corrupt = 0
+
+    # Keep a trailing partial frame (or a lone header byte) for the next chunk.
+    last_end = int(starts[-1]) + FRAME_SIZE if len(starts) else 0
+    tail_from = max(last_end, n - FRAME_SIZE + 1)
+    for pos in (tail_from + np.flatnonzero(data[tail_from:] == FRAME_HEADER)).tolist():
+        if pos == n - 1 or data[pos + 1] == FRAME_HEADER:
+            consumed = pos
+            break
+    else:
+        consumed = n
+
+    distance = (frames[:, 3] << 8 | frames[:, 2]).astype(float)
+    strength = (frames[:, 5] << 8 | frames[:, 4]).astype(float)
+    temperature = (frames[:, 7] << 8 | frames[:, 6]) / 8.0 - 256.0
+    return LidarFrames(distance, strength, temperature, starts, consumed, corrupt)
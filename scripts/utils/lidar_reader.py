@@ -1,16 +1,215 @@
-import serial
+import logging
+import threading
+import numpy as np
 from globalsConfig import *
 import globalsConfig as gv
-from utils import data_formatter
+from utils.lidarSource import open_lidar_source
+from utils.clock import get_clock
+from utils.stepSync import StepHandshake
+
+logger = logging.getLogger(__name__)
+
+class SampleRing:
+    """
+    Ring buffer of timestamped LiDAR samples for one writer thread and any
+    number of readers. The writer announces the slots it is about to
+    overwrite (`_writing`) before touching them and publishes `count` after,
+    so readers never take a lock and simply discard samples that were
+    overwritten while they were copying.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        self.capacity = int(capacity)
+        self.t = np.zeros(self.capacity)
+        self.distance = np.zeros(self.capacity)
+        self.strength = np.zeros(self.capacity)
+        self.count = 0      # samples ever written
+        self._writing = 0   # samples ever written, including the batch in flight
+
+    def push(self, t, distance, strength):
+        n = len(t)
+        if n == 0:
+            return
+        if n > self.capacity:
+            t, distance, strength = t[-self.capacity:], distance[-self.capacity:], strength[-self.capacity:]
+            self.count += n - self.capacity
+            n = self.capacity
+        self._writing = self.count + n
+        start = self.count % self.capacity
+        if start + n <= self.capacity:
+            idx = slice(start, start + n)
+        else:
+            idx = (self.count + np.arange(n)) % self.capacity
+        self.t[idx] = t
+        self.distance[idx] = distance
+        self.strength[idx] = strength
+        self.count += n
+
+    def _logical_search(self, first, last, value, side):
+        # first logical sample index in [first, last) at or after `value`
+        # (after, for side="right"). Readers nearly always want the newest
+        # samples, so gallop back from the end to bracket it, then bisect.
+        lo, hi, step = first, last, 1
+        while hi - step >= lo:
+            probe = hi - step
+            t = self.t[probe % self.capacity]
+            if t < value or (side == "right" and t == value):
+                lo = probe + 1
+                break
+            hi = probe
+            step *= 2
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = self.t[mid % self.capacity]
+            if t < value or (side == "right" and t == value):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def between(self, t0, t1):
+        """Copies of (t, distance, strength) for every stored sample with t0 <= t <= t1."""
+        count = self.count
+        first = max(0, count - self.capacity)
+        lo = self._logical_search(first, count, t0, "left")
+        hi = self._logical_search(lo, count, t1, "right")
+        return self._copy(lo, hi)
+
+    def latest(self, n=1):
+        count = self.count
+        return self._copy(max(count - n, count - self.capacity, 0), count)
+
+    def _copy(self, lo, hi):
+        # samples [lo, hi) as copies, minus the oldest ones if the writer got to them meanwhile
+        start = lo % self.capacity
+        if start + (hi - lo) <= self.capacity:
+            sl = slice(start, start + hi - lo)
+            t, distance, strength = self.t[sl].copy(), self.distance[sl].copy(), self.strength[sl].copy()
+        else:
+            slots = np.arange(lo, hi) % self.capacity
+            t, distance, strength = self.t[slots], self.distance[slots], self.strength[slots]
+        stale = self._writing - self.capacity - lo
+        if stale > 0:
+            return t[stale:], distance[stale:], strength[stale:]
+        return t, distance, strength
+
+class LidarReader:
+    """
+    Drains a LidarSource in bulk and stores every timestamped sample in a
+    SampleRing, so scanners can ask what the LiDAR saw between two instants.
+
+    Counters: `frames` stored, `corrupt` frames rejected by the source,
+    `dropped` frames missing from the stream (gaps longer than one frame
+    period at `frame_rate`), `errors` read failures.
+
+    With a StepHandshake, every batch is offered to it so a pending servo
+    step gets the first sample taken after it.
+
+    On a virtual clock there is no reader thread: the reader catches up
+    when samples are asked for and, while a servo step waits for its
+    sample, whenever simulated time moves.
+    """
+
+    def __init__(self, source=None, capacity=1 << 16, frame_rate=LIDAR_FRAME_RATE, poll_interval=0.002,
+                 handshake=None):
+        self.source = source
+        self.handshake = handshake
+        self.samples = SampleRing(capacity)
+        self.frame_period = 1.0 / frame_rate
+        self.poll_interval = poll_interval
+        self.frames = 0
+        self.dropped = 0
+        self.errors = 0
+        self._last_t = None
+        self._lazy = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def corrupt(self):
+        return self.source.corrupt if self.source is not None else 0
+
+    def poll(self):
+        """Read whatever the source has and store it; returns how many samples."""
+        if self.source is None:
+            self.source = open_lidar_source()
+        t, distance, strength = self.source.read()
+        n = len(t)
+        if n == 0:
+            return 0
+
+        # frames the sensor must have sent since the last batch, minus the ones we got
+        last = float(t[-1])
+        start = float(t[0]) if self._last_t is None else self._last_t
+        expected = round((last - start) / self.frame_period) + (self._last_t is None)
+        self.dropped += max(expected - n, 0)
+        self._last_t = last
+
+        self.samples.push(t, distance, strength)
+        self.frames += n
+        if self.handshake is not None and self.handshake.pending:
+            self.handshake.offer(t, distance)
+        with lock:
+            gv.latest_distance = float(distance[-1])
+        return n
+
+    def between(self, t0, t1):
+        if self._lazy:
+            self.poll()
+        return self.samples.between(t0, t1)
+
+    def _advanced(self):
+        if self.handshake.pending:
+            self.poll()
+
+    def stats(self):
+        return {"frames": self.frames, "corrupt": self.corrupt, "dropped": self.dropped, "errors": self.errors}
+
+    def run(self):
+        """Reader loop, closes the source after read errors so it reopens instead of dying."""
+        self._stop.clear()
+        while not self._stop.is_set():
+            try:
+                if not self.poll():
+                    get_clock().sleep(self.poll_interval)
+            except OSError as exc:
+                self.errors += 1
+                logger.warning("LiDAR read error (%d so far): %s", self.errors, exc)
+                self.source.close()
+                get_clock().sleep(0.5)
+
+    def start(self):
+        """
+        Reader thread on the real clock. On a virtual clock there are no
+        threads: between() polls first, and so does every clock advance
+        while the handshake has a step waiting.
+        """
+        clock = get_clock()
+        if clock.virtual:
+            if not self._lazy:
+                self._lazy = True
+                if self.handshake is not None:
+                    clock.on_advance(self._advanced)
+            return self
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.source is not None:
+            self.source.close()
+
+# shared reader used by the scanners: `lidar.between(t0, t1)`, and the
+# handshake it answers servo steps on
+step_handshake = StepHandshake()
+lidar = LidarReader(handshake=step_handshake)
 
 def lidar_reader():
     """ Continuously reads LIDAR and stores the latest distance """
-    ser = serial.Serial(SERIAL_PORT, SERIAL_BAUDRATE)
-    while True:
-        try:
-            reading = data_formatter(ser.read(9))
-            with lock:
-                gv.latest_distance = reading
-                pass
-        except Exception:
-            continue
\ No newline at end of file
+    if get_clock().virtual:
+        lidar.start()
+        return
+    lidar.run()
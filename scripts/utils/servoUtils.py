@@ -1,5 +1,5 @@
-from globalsConfig import pwm
-import time
+from utils.hal import hal
+from utils.clock import get_clock
 # script.py
 import sys
 import os
@@ -10,6 +10,5 @@ parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(parent_dir)
 
 def set_angle(angle):
-    duty = 1.5 + (angle / 180) * 10
-    pwm.ChangeDutyCycle(duty)
-    time.sleep(0.025)
\ No newline at end of file
+    hal.servo.set_angle(angle)
+    get_clock().sleep(0.025)
\ No newline at end of file
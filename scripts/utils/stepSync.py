@@ -0,0 +1,109 @@
+import threading
+from collections import deque, namedtuple
+import numpy as np
+from .clock import get_clock
+
+# one LiDAR sample taken for one servo step: step number, commanded angle,
+# distance (cm) and when the step was commanded / the sample was taken
+TaggedSample = namedtuple("TaggedSample", ["seq", "angle", "distance", "t_step", "t_sample"])
+
+Step = namedtuple("Step", ["seq", "angle", "t"])
+
+class StepHandshake:
+    """
+    Servo/LiDAR step handshake on a condition variable instead of a spin
+    loop. The servo side waits in ready() until the previous step has its
+    sample, moves, then announce()s the step. The LiDAR side blocks in
+    wait_step() and answers with complete(distance), or the LidarReader
+    calls offer() with every batch it reads. Each step gets exactly one
+    TaggedSample; steps that time out unanswered are counted in `missed`.
+
+    Timeouts run on the shared clock. On the real clock that is a plain
+    condition wait; on the virtual clock the waiter sleeps the clock forward
+    in `poll_interval` steps, so a simulated reader gets the chance to
+    answer and a step that never is answered costs `timeout` of clock time,
+    not wall time.
+    """
+    poll_interval = 0.001
+
+    def __init__(self, history=256):
+        self._cond = threading.Condition()
+        self._step = None
+        self._seq = 0
+        self.samples = deque(maxlen=history)
+        self.missed = 0
+        self.closed = False
+
+    @property
+    def pending(self):
+        """A step is waiting for its sample."""
+        return self._step is not None
+
+    def ready(self, timeout=None):
+        """Servo side: wait until the pending step (if any) has its sample."""
+        with self._cond:
+            return self._wait(lambda: self._step is None or self.closed, timeout)
+
+    def announce(self, angle):
+        """Servo side: the servo has been commanded to `angle`, sample it. Returns the step number."""
+        with self._cond:
+            if self._step is not None:
+                self.missed += 1
+            self._seq += 1
+            self._step = Step(self._seq, angle, get_clock().now())
+            self._cond.notify_all()
+            return self._seq
+
+    def wait_step(self, timeout=None):
+        """LiDAR side: the step waiting for a sample, or None after `timeout` or close()."""
+        with self._cond:
+            self._wait(lambda: self._step is not None or self.closed, timeout)
+            return None if self.closed else self._step
+
+    def complete(self, distance, t=None):
+        """LiDAR side: answer the pending step with one sample."""
+        with self._cond:
+            return self._complete(distance, get_clock().now() if t is None else t)
+
+    def offer(self, t, distance):
+        """Answer the pending step with the first sample of a batch taken at or after it."""
+        with self._cond:
+            if self._step is None:
+                return None
+            i = int(np.searchsorted(t, self._step.t))
+            if i == len(t):
+                return None
+            return self._complete(distance[i], t[i])
+
+    def _wait(self, predicate, timeout):
+        # called with the condition held, like Condition.wait_for
+        clock = get_clock()
+        if not clock.virtual:
+            return self._cond.wait_for(predicate, timeout)
+        deadline = None if timeout is None else clock.now() + timeout
+        while not predicate():
+            step = self.poll_interval
+            if deadline is not None:
+                step = min(step, deadline - clock.now())
+                if step <= 0:
+                    return predicate()
+            self._cond.release()
+            try:
+                clock.sleep(step)
+            finally:
+                self._cond.acquire()
+        return True
+
+    def _complete(self, distance, t):
+        if self._step is None:
+            return None
+        sample = TaggedSample(self._step.seq, self._step.angle, float(distance), self._step.t, float(t))
+        self.samples.append(sample)
+        self._step = None
+        self._cond.notify_all()
+        return sample
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
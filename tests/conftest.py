@@ -0,0 +1,10 @@
+import os
+import sys
+
+# scripts/ is run from its own directory on the Pi (flat imports such as
+# `import globalsConfig`); tests run its modules on the simulated stack
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+sys.path.insert(0, SCRIPTS)
+os.environ.setdefault("FMS_HAL", "sim")
+os.environ.setdefault("FMS_LIDAR", "synthetic")
+os.environ.setdefault("FMS_CLOCK", "virtual")
@@ -0,0 +1,196 @@
+import unittest
+import numpy as np
+from utils.background import AngleBaseline, BackgroundModel, ew_alpha
+
+AZ = np.arange(4) * 30.0
+EL = np.arange(3) * 10.0
+
+class TestBackgroundModel(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(4)
+        self.model = BackgroundModel(AZ, EL, sigma=3.0, min_std=1.0, min_count=3)
+
+    def sweep(self, n):
+        """ n samples near random cell centres, with the cell each belongs to """
+        i = self.rng.integers(0, len(AZ), n)
+        j = self.rng.integers(0, len(EL), n)
+        az = AZ[i] + self.rng.uniform(-14, 14, n)
+        el = EL[j] + self.rng.uniform(-4.9, 4.9, n)
+        distance = 500 + 50 * i + 5 * j + self.rng.normal(0, 3 + j, n)
+        return az, el, distance, i * len(EL) + j
+
+    def test_batched_add_matches_numpy(self):
+        cells, values = [], []
+        for n in (7, 40, 1, 120, 33):
+            az, el, distance, cell = self.sweep(n)
+            self.model.add(az, el, distance)
+            cells.append(cell)
+            values.append(distance)
+        cells, values = np.concatenate(cells), np.concatenate(values)
+
+        count, mean, m2 = (a.reshape(-1) for a in (self.model.count, self.model.mean, self.model.m2))
+        for c in range(len(AZ) * len(EL)):
+            with self.subTest(cell=c):
+                v = values[cells == c]
+                self.assertEqual(count[c], len(v))
+                self.assertAlmostEqual(mean[c], np.mean(v), places=9)
+                self.assertAlmostEqual(m2[c] / (count[c] - 1), np.var(v, ddof=1), places=7)
+        expected_std = np.maximum([np.std(values[cells == c], ddof=1) for c in range(12)], 1.0)
+        np.testing.assert_allclose(self.model.std().reshape(-1), expected_std)
+
+    def test_index_picks_nearest_cell(self):
+        idx = self.model.index(np.array([-50, 14, 16, 200]), np.array([-1, 4.9, 5.1, 99]))
+        np.testing.assert_array_equal(idx, [0 * 3 + 0, 0 * 3 + 0, 1 * 3 + 1, 3 * 3 + 2])
+
+    def test_non_finite_samples_are_dropped(self):
+        self.model.add([0, 0, 0, 0, 30], [0, 0, 0, 0, 10], [100.0, np.nan, np.inf, 104.0, -np.inf])
+        self.assertEqual(self.model.count[0, 0], 2)
+        self.assertEqual(self.model.mean[0, 0], 102.0)
+        self.assertEqual(self.model.count.sum(), 2)
+
+    def test_young_cells_have_no_zscore(self):
+        self.model.add([0, 0], [0, 0], [100.0, 101.0])
+        self.assertTrue(np.isnan(self.model.zscore(0, 0, 500.0)))
+        self.assertFalse(self.model.is_foreground(0, 0, 500.0))
+        self.assertTrue(np.isnan(self.model.zscore(90, 20, 500.0)))  # never seen
+        self.model.add([0], [0], [102.0])
+        self.assertAlmostEqual(float(self.model.zscore(0, 0, 111.0)), 10.0)  # mean 101, std 1
+        self.assertTrue(self.model.is_foreground(0, 0, 111.0))
+
+    def test_min_std_floor(self):
+        self.model.add([0] * 5, [0] * 5, [200.0] * 5)  # no spread at all
+        self.assertEqual(self.model.std()[0, 0], 1.0)
+        self.assertAlmostEqual(float(self.model.zscore(0, 0, 202.5)), 2.5)
+        self.assertFalse(self.model.is_foreground(0, 0, 202.5))
+        self.assertTrue(self.model.is_foreground(0, 0, 203.5))
+
+        spread = BackgroundModel(AZ, EL, min_std=1.0)
+        spread.add([0] * 4, [0] * 4, [190.0, 210.0, 190.0, 210.0])
+        self.assertAlmostEqual(float(spread.zscore(0, 0, 200.0 + np.sqrt(400 / 3))), 1.0)
+
+    def test_array_and_scalar_zscores_agree(self):
+        az, el, distance, _ = self.sweep(300)
+        self.model.add(az, el, distance)
+        az, el, distance, _ = self.sweep(50)
+        z = self.model.zscore(az, el, distance)
+        np.testing.assert_allclose([self.model.zscore(a, e, d) for a, e, d in zip(az, el, distance)], z)
+        np.testing.assert_array_equal([self.model.is_foreground(a, e, d) for a, e, d in zip(az, el, distance)],
+                                      self.model.is_foreground(az, el, distance))
+
+class TestAdapt(unittest.TestCase):
+    def setUp(self):
+        self.model = BackgroundModel(AZ, EL, sigma=4.0, min_std=1.0, min_count=3, tau=100.0)
+        self.model.add([0] * 4, [0] * 4, [400.0, 402.0, 398.0, 400.0], t=10.0)  # mean 400, var 8/3
+        self.model.add([30] * 3, [10] * 3, [600.0, 601.0, 602.0], t=10.0)
+
+    def test_exponential_update(self):
+        readings = np.array([401.0, 403.0])
+        foreground = self.model.adapt([0, 0], [0, 0], readings, t=60.0)
+        np.testing.assert_array_equal(foreground, [False, False])
+
+        alpha = 1 - np.exp(-50.0 / 100.0)
+        self.assertAlmostEqual(ew_alpha(50.0, 100.0), alpha)
+        delta = readings.mean() - 400.0
+        var = (1 - alpha) * (8 / 3 + alpha * delta ** 2) + alpha * readings.var()
+        self.assertAlmostEqual(self.model.mean[0, 0], 400.0 + alpha * delta)
+        self.assertAlmostEqual(self.model.m2[0, 0] / 3, var)
+        self.assertEqual(self.model.count[0, 0], 4)
+        self.assertEqual(self.model.updated[0, 0], 60.0)
+        # the other cell saw nothing
+        self.assertEqual((self.model.mean[1, 1], self.model.updated[1, 1]), (601.0, 10.0))
+
+    def test_long_gap_forgets_the_old_background(self):
+        self.model.adapt([0], [0], [405.0], t=10.0 + 1e4)  # 3 std away, not foreground yet
+        self.assertAlmostEqual(self.model.mean[0, 0], 405.0, places=6)
+
+    def test_flagged_cells_stay_unchanged(self):
+        before = (self.model.mean.copy(), self.model.m2.copy(), self.model.count.copy(), self.model.updated.copy())
+        foreground = self.model.adapt([0, 0, 30], [0, 0, 10], [401.0, 250.0, 601.0], t=60.0)
+        np.testing.assert_array_equal(foreground, [False, True, False])
+        self.assertTrue(self.model.flagged[0, 0])
+        self.assertEqual(self.model.mean[0, 0], before[0][0, 0])
+        self.assertEqual(self.model.m2[0, 0], before[1][0, 0])
+        self.assertEqual(self.model.updated[0, 0], 10.0)
+        self.assertFalse(self.model.flagged[1, 1])
+        self.assertEqual(self.model.updated[1, 1], 60.0)
+        # the target left: the flag clears and the cell learns again
+        self.model.adapt([0], [0], [401.0], t=70.0)
+        self.assertFalse(self.model.flagged[0, 0])
+        self.assertGreater(self.model.mean[0, 0], 400.0)
+
+    def test_young_cells_fall_back_to_welford(self):
+        self.model.add([90], [20], [700.0], t=10.0)
+        self.model.adapt([90, 90], [20, 20], [704.0, 708.0], t=500.0)
+        self.assertEqual(self.model.count[3, 2], 3)
+        self.assertAlmostEqual(self.model.mean[3, 2], 704.0)
+        self.assertAlmostEqual(self.model.m2[3, 2] / 2, np.var([700.0, 704.0, 708.0], ddof=1))
+        self.assertEqual(self.model.updated[3, 2], 500.0)
+        # a cell never timestamped also accumulates instead of using dt
+        model = BackgroundModel(AZ, EL, min_count=3)
+        model.add([0] * 5, [0] * 5, [1.0, 2.0, 3.0, 4.0, 5.0])
+        model.adapt([0], [0], [6.0], t=1.0)
+        self.assertEqual((model.count[0, 0], model.mean[0, 0]), (6, 3.5))
+
+class TestAngleBaseline(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(25)
+        self.baseline = AngleBaseline(0, 200, 0.5)  # 401 bins
+
+    def argmin_lookup(self, samples, angle):
+        """ the search detectionOption did before the bins """
+        return samples[np.argmin(np.abs(samples[:, 0] - angle)), 1]
+
+    def test_lookup_matches_argmin(self):
+        angles = np.arange(401) * 0.5
+        samples = np.column_stack([angles, self.rng.uniform(1, 12, len(angles))])
+        for angle, distance in samples:
+            self.baseline.add(angle, distance)
+        query = self.rng.uniform(-5, 205, 500)
+        expected = [self.argmin_lookup(samples, a) for a in query]
+        np.testing.assert_array_equal(self.baseline.lookup(query)[0], expected)
+        self.assertEqual([self.baseline.lookup(a)[0] for a in query], expected)
+
+    def test_sparse_baseline_matches_argmin_at_bin_centres(self):
+        angles = np.sort(self.rng.choice(401, 40, replace=False)) * 0.5
+        samples = np.column_stack([angles, self.rng.uniform(1, 12, len(angles))])
+        for angle, distance in samples:
+            self.baseline.add(angle, distance)
+        query = np.arange(401) * 0.5
+        np.testing.assert_array_equal(self.baseline.lookup(query)[0],
+                                      [self.argmin_lookup(samples, a) for a in query])
+
+    def test_empty_bins_use_the_nearest_filled_bin(self):
+        self.baseline.add(10.0, 5.0)
+        self.baseline.add(20.0, 7.0)
+        np.testing.assert_array_equal(self.baseline.nearest([0.0, 14.5, 15.0, 15.5, 100.0]), [20, 20, 20, 40, 40])
+        np.testing.assert_array_equal(self.baseline.lookup([0.0, 14.5, 15.5, 100.0])[0], [5.0, 5.0, 7.0, 7.0])
+        self.assertEqual(self.baseline.lookup(-3.0), (5.0, 0.0))
+
+    def test_bins_merge_repeated_sweeps(self):
+        readings = self.rng.normal(8, 0.2, 6)
+        for d in readings:
+            self.baseline.add(50.1, d)  # same bin as 50.0
+        mean, std = self.baseline.lookup(50.0)
+        self.assertAlmostEqual(mean, np.mean(readings))
+        self.assertAlmostEqual(std, np.std(readings, ddof=1))
+        self.assertEqual(len(self.baseline), 6)
+
+    def test_scalar_and_array_paths_agree(self):
+        for angle in self.rng.uniform(0, 200, 300):
+            self.baseline.add(angle, self.rng.uniform(1, 12))
+        query = self.rng.uniform(-5, 205, 200)
+        mean, std = self.baseline.lookup(query)
+        scalar = np.array([self.baseline.lookup(a) for a in query])
+        np.testing.assert_array_equal(scalar[:, 0], mean)
+        np.testing.assert_allclose(scalar[:, 1], std)
+        np.testing.assert_array_equal([self.baseline.nearest(a) for a in query], self.baseline.nearest(query))
+
+    def test_empty_baseline_returns_nan(self):
+        mean, std = self.baseline.lookup(12.0)
+        self.assertTrue(np.isnan(mean) and np.isnan(std))
+        mean, std = self.baseline.lookup(np.array([0.0, 12.0, 200.0]))
+        self.assertTrue(np.isnan(mean).all() and np.isnan(std).all())
+        self.assertEqual(len(self.baseline), 0)
+
+if __name__ == '__main__':
+    unittest.main()
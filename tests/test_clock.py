@@ -0,0 +1,115 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from conftest import SCRIPTS
+from utils.clock import RealClock, VirtualClock
+
+class TestVirtualClock(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start=5.0)
+        self.log = []
+
+    def record(self, name):
+        return lambda: self.log.append((name, self.clock.now()))
+
+    def test_sleep_moves_time_and_nothing_else(self):
+        self.assertEqual(self.clock.now(), 5.0)
+        self.clock.sleep(2.5)
+        self.assertEqual(self.clock.now(), 7.5)
+        self.clock.sleep(-1)
+        self.clock.sleep(0)
+        self.assertEqual(self.clock.now(), 7.5)
+
+    def test_events_run_in_time_order_at_their_time(self):
+        self.clock.schedule(3, self.record("c"))
+        self.clock.schedule(1, self.record("a"))
+        self.clock.schedule(2, self.record("b"))
+        self.clock.schedule(2, self.record("b2"))  # same time: scheduling order
+        self.clock.schedule(-4, self.record("now"))
+        self.clock.sleep(2)
+        self.assertEqual(self.log, [("now", 5.0), ("a", 6.0), ("b", 7.0), ("b2", 7.0)])
+        self.assertEqual(self.clock.now(), 7.0)
+        self.clock.sleep(10)
+        self.assertEqual(self.log[-1], ("c", 8.0))
+        self.assertEqual(self.clock.now(), 17.0)
+
+    def test_events_scheduled_by_events(self):
+        self.clock.schedule(1, lambda: self.clock.schedule(0.5, self.record("chained")))
+        self.clock.schedule(1.2, self.record("later"))
+        self.clock.sleep(5)
+        self.assertEqual(self.log, [("later", 6.2), ("chained", 6.5)])
+
+    def test_every_repeats_until_cancelled(self):
+        event = self.clock.every(0.25, self.record("tick"))
+        self.clock.sleep(1)
+        self.assertEqual([t for _, t in self.log], [5.25, 5.5, 5.75, 6.0])
+        event.cancel()
+        self.clock.sleep(1)
+        self.assertEqual(len(self.log), 4)
+        with self.assertRaises(ValueError):
+            self.clock.every(0, self.record("never"))
+
+    def test_cancelled_event_does_not_run(self):
+        self.clock.schedule(1, self.record("cancelled")).cancel()
+        self.clock.sleep(2)
+        self.assertEqual(self.log, [])
+
+    def test_on_advance_sees_every_step_forward(self):
+        self.clock.on_advance(self.record("advance"))
+        self.clock.schedule(1, self.record("event"))
+        self.clock.sleep(3)
+        self.clock.sleep(0)
+        self.assertEqual(self.log, [("advance", 6.0), ("event", 6.0), ("advance", 8.0)])
+
+class TestRealClock(unittest.TestCase):
+    def setUp(self):
+        self.clock = RealClock()
+
+    def test_sleep_and_now(self):
+        start = self.clock.now()
+        self.clock.sleep(0.05)
+        self.clock.sleep(-1)
+        elapsed = self.clock.now() - start
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertLess(elapsed, 1.0)
+
+    def test_scheduled_events_run_in_time_order(self):
+        log, done = [], threading.Event()
+        self.clock.schedule(0.15, lambda: (log.append("b"), done.set()))
+        self.clock.schedule(0.05, lambda: log.append("a"))
+        self.assertTrue(done.wait(2))
+        self.assertEqual(log, ["a", "b"])
+
+    def test_every_repeats_until_cancelled(self):
+        ticks = threading.Semaphore(0)
+        repeater = self.clock.every(0.01, ticks.release)
+        for _ in range(3):
+            self.assertTrue(ticks.acquire(timeout=2))
+        repeater.cancel()
+        repeater.join(2)
+        self.assertFalse(repeater.is_alive())
+
+class TestScannerSmoke(unittest.TestCase):
+    DURATION = 600
+    BUDGET = 1.0  # wall seconds for a 10 minute virtual session
+
+    def test_virtual_session_is_fast(self):
+        # own process: Scanner wires the LiDAR reader and actuators to the clock at import
+        script = ("import time, Scanner\n"
+                  "from utils import get_clock\n"
+                  "start = time.perf_counter()\n"
+                  f"Scanner.main({self.DURATION})\n"
+                  "print(time.perf_counter() - start, get_clock().now())\n")
+        env = dict(os.environ, FMS_HAL="sim", FMS_LIDAR="synthetic", FMS_CLOCK="virtual")
+        result = subprocess.run([sys.executable, "-c", script], cwd=SCRIPTS, env=env,
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        wall, virtual = map(float, result.stdout.splitlines()[-1].split())
+        self.assertGreaterEqual(virtual, self.DURATION)
+        self.assertLess(wall, self.BUDGET)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
-from satellite_tracker.core import SatelliteTracker
+import numpy as np
+from satellite_tracker.core import SatelliteTracker, detect_targets
 
 class TestSatelliteTracker(unittest.TestCase):
     def test_process_frame(self):
@@ -8,5 +9,45 @@ class TestSatelliteTracker(unittest.TestCase):
         result = tracker.process_lidar_frame(dummy_data)
         self.assertEqual(result, (2, 2, 10))
 
+    def test_process_frames_batch(self):
+        tracker = SatelliteTracker()
+        frames = np.array([
+            [(0, 0, 1), (1, 1, 2), (2, 2, 10)],
+            [(5, 5, 7), (6, 6, 3), (7, 7, 7)],
+        ])
+        targets = tracker.process_lidar_frames(frames, timestamps=[1.0, 2.0])
+        np.testing.assert_array_equal(targets, [(2, 2, 10), (5, 5, 7)])
+        self.assertEqual(len(tracker.history), 2)
+
+    def test_calculate_trajectory(self):
+        tracker = SatelliteTracker(fit_window=5)
+        frames = np.array([[(0, 0, 0), (t, 2 * t, 5 + t)] for t in range(6)], dtype=float)
+        tracker.process_lidar_frames(frames, timestamps=np.arange(6.0))
+        np.testing.assert_allclose(tracker.calculate_trajectory(), [1, 2, 1], atol=1e-9)
+        estimate = tracker.estimate_trajectory()
+        np.testing.assert_allclose(estimate.position, [5, 10, 10], atol=1e-9)
+
+    def test_process_frames_default_timestamps(self):
+        frames = np.array([[(0, 0, 0), (t, 2 * t, 5 + t)] for t in range(10)], dtype=float)
+        for frame_period, kwargs in ((0.1, {}), (0.5, {"frame_period": 0.5})):  # 10 Hz refresh by default
+            with self.subTest(frame_period=frame_period):
+                tracker = SatelliteTracker()
+                tracker.process_lidar_frames(frames, **kwargs)
+                np.testing.assert_allclose(np.diff(tracker.history.times), frame_period, atol=1e-6)
+                estimate = tracker.estimate_trajectory()
+                self.assertIsNotNone(estimate)
+                np.testing.assert_allclose(estimate.velocity, np.array([1, 2, 1]) / frame_period, atol=1e-6)
+                np.testing.assert_allclose(estimate.position, [9, 18, 14], atol=1e-6)
+
+    def test_detect_targets_ragged(self):
+        frames = [[(0, 0, 1), (1, 1, 4)], [(3, 3, 9)], [(4, 4, 2), (5, 5, 0), (6, 6, 2)]]
+        targets = detect_targets(frames)
+        expected = [max(frame, key=lambda p: p[2]) for frame in frames]
+        np.testing.assert_array_equal(targets, expected)
+
+    def test_detect_targets_empty_frame(self):
+        with self.assertRaises(ValueError):
+            detect_targets([[(0, 0, 1)], []])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,138 @@
+import dataclasses
+import logging
+import unittest
+import numpy as np
+import create_tle as ct
+
+def kepler_times(sma, ecc, ta):
+    """Seconds after periapsis at true anomalies `ta` on a two-body orbit."""
+    return ct.trueToMeanAnomaly(ta, ecc) / np.sqrt(ct.MU_EARTH / sma**3)
+
+class TestInitialOrbit(unittest.TestCase):
+    sma, ecc, inc, raan, aop = 7200.0, 0.05, 0.9, 2.0, 1.0
+
+    def states(self, ta):
+        return ct.coe2rv(self.sma, self.ecc, self.inc, self.raan, self.aop, np.asarray(ta))
+
+    def test_gibbs_recovers_middle_velocity(self):
+        r, v = self.states([0.1, 0.6, 1.2])
+        np.testing.assert_allclose(ct.gibbs(*r), v[1], rtol=1e-9)
+
+    def test_herrick_gibbs_on_close_points(self):
+        ta = np.array([0.50, 0.51, 0.52])
+        r, v = self.states(ta)
+        t = kepler_times(self.sma, self.ecc, ta)
+        np.testing.assert_allclose(ct.herrickGibbs(*r, *t), v[1], rtol=1e-6)
+
+class TestFitOrbit(unittest.TestCase):
+    def setUp(self):
+        self.elements = np.array([ct.calcMeanMotion(7000.0), 0.01 * np.cos(1.0), 0.01 * np.sin(1.0),
+                                  np.radians(51.6), 2.0, 0.5])
+        self.seconds = np.linspace(0, 1200, 8)
+        self.truth = ct._predict(self.elements, ct.TLE_EPOCH, self.seconds)
+
+    def test_recovers_orbit_from_noisy_positions(self):
+        rng = np.random.default_rng(3)
+        noise = 0.05  # km
+        observed = self.truth + rng.normal(0, noise, self.truth.shape)
+        satellite, residuals = ct.fitOrbit(observed.T, self.seconds)
+
+        self.assertEqual(residuals.shape, (3, len(self.seconds)))
+        self.assertLess(np.sqrt(np.mean(residuals**2)), 2 * noise)
+        _, predicted, _ = satellite.sgp4_array(np.full(len(self.seconds), satellite.jdsatepoch),
+                                               satellite.jdsatepochF + self.seconds / 86400.0)
+        np.testing.assert_allclose(residuals, (observed - predicted).T, atol=1e-6)
+
+        expected = ct._satrecFromElements(self.elements, ct.TLE_EPOCH)
+        r, v = self._epoch_state(satellite)
+        r_true, v_true = self._epoch_state(expected)
+        np.testing.assert_allclose(r, r_true, atol=0.2)    # km
+        np.testing.assert_allclose(v, v_true, atol=5e-4)   # km/s
+        self.assertAlmostEqual(satellite.no_kozai, self.elements[0], delta=1e-5)
+        self.assertAlmostEqual(satellite.inclo, self.elements[3], delta=1e-3)
+
+    def test_exact_positions_fit_to_zero_residual(self):
+        _, residuals = ct.fitOrbit(self.truth.T, self.seconds)
+        self.assertLess(np.abs(residuals).max(), 1e-3)
+
+    def test_needs_three_points(self):
+        with self.assertRaises(ValueError):
+            ct.fitOrbit(self.truth[:2].T, self.seconds[:2])
+
+    @staticmethod
+    def _epoch_state(satellite):
+        _, r, v = satellite.sgp4(satellite.jdsatepoch, satellite.jdsatepochF)
+        return np.array(r), np.array(v)
+
+if __name__ == '__main__':
+    unittest.main()
+
+class TestElementConversion(unittest.TestCase):
+    def assertRoundTrip(self, r, v, tol=1e-9):
+        r2, v2 = ct.coe2rv(*ct.rv2coe(r, v))
+        scale_r = np.linalg.norm(r, axis=-1, keepdims=True)
+        scale_v = np.linalg.norm(v, axis=-1, keepdims=True)
+        np.testing.assert_allclose((r2 - r) / scale_r, 0, atol=tol)
+        np.testing.assert_allclose((v2 - v) / scale_v, 0, atol=tol)
+
+    def test_random_states_round_trip(self):
+        rng = np.random.default_rng(5)
+        n = 10000
+        r, v = ct.coe2rv(rng.uniform(6600, 42000, n), rng.uniform(0, 0.9, n), rng.uniform(0, np.pi, n),
+                         rng.uniform(0, 2 * np.pi, n), rng.uniform(0, 2 * np.pi, n), rng.uniform(0, 2 * np.pi, n))
+        self.assertRoundTrip(r, v)
+
+    def test_elements_round_trip(self):
+        elements = (7000.0, 0.1, 0.7, 1.0, 2.0, 3.0)
+        np.testing.assert_allclose(ct.rv2coe(*ct.coe2rv(*elements)), elements, rtol=1e-9)
+
+    def test_singular_orbits_round_trip(self):
+        # circular, equatorial, circular equatorial, retrograde equatorial and just off each of them
+        for ecc in (0.0, 1e-12, 1e-9, 1e-6, 0.2):
+            for inc in (0.0, 1e-12, 1e-9, 1e-6, 0.5, np.pi - 1e-9, np.pi):
+                with self.subTest(ecc=ecc, inc=inc):
+                    ta = np.linspace(0, 2 * np.pi, 13)
+                    # below SINGULAR_TOL the periapsis is dropped, which moves the state by ~ecc
+                    self.assertRoundTrip(*ct.coe2rv(7000.0, ecc, inc, 1.3, 0.4, ta), tol=2 * ct.SINGULAR_TOL)
+
+    def test_circular_equatorial_convention(self):
+        sma, ecc, inc, raan, aop, ta = ct.rv2coe([0, 7000.0, 0], [-np.sqrt(ct.MU_EARTH / 7000.0), 0, 0])
+        self.assertAlmostEqual(float(sma), 7000.0, places=6)
+        self.assertAlmostEqual(float(ecc), 0.0, places=12)
+        self.assertEqual((float(raan), float(aop)), (0.0, 0.0))
+        self.assertAlmostEqual(float(ta), np.pi / 2, places=12)  # true longitude
+
+class TestTrace(unittest.TestCase):
+    # azimuth, elevation (deg), range (cm) and time of five waypoints
+    waypoints = np.array([[0, 20, 40, 60, 80], [10, 30, 50, 30, 10], [150] * 5, [0, 5, 10, 15, 20]], dtype=float)
+
+    def unset(self, trace):
+        return {f.name for f in dataclasses.fields(trace) if getattr(trace, f.name) is None}
+
+    def test_circular_mode_fills_every_step(self):
+        trace = ct.TLETrace()
+        line1, line2 = ct.calcTLE(self.waypoints, trace=trace)
+        self.assertEqual(self.unset(trace), {"residuals"})
+        self.assertEqual((trace.line1, trace.line2), (line1, line2))
+        self.assertEqual(trace.point_vector.shape, (3, 5))
+        self.assertAlmostEqual(trace.mm, float(ct.calcMeanMotion(trace.sma)))
+
+    def test_od_mode_fills_the_fitted_elements(self):
+        trace = ct.TLETrace()
+        line1, line2 = ct.calcTLE(self.waypoints, mode="od", trace=trace)
+        self.assertEqual(self.unset(trace), {"timestep"})
+        self.assertEqual((trace.line1, trace.line2), (line1, line2))
+        self.assertEqual(trace.residuals.shape, (3, 5))
+        # the recorded elements describe the fitted orbit at the middle waypoint
+        r, v = ct.coe2rv(trace.sma, trace.eccentricity, trace.inclination, trace.raan, trace.aop, trace.ta)
+        np.testing.assert_allclose(v, trace.velocity, rtol=1e-9)
+        np.testing.assert_allclose(np.cross(r, v), trace.angular_momentum, rtol=1e-9)
+        np.testing.assert_allclose(np.linalg.norm(trace.eccentricity_vector), trace.eccentricity, rtol=1e-9)
+        np.testing.assert_allclose(r, trace.point_vector[:, 2] - trace.residuals[:, 2], atol=1e-6)
+
+    def test_debug_logging_without_trace(self):
+        for mode in ("circular", "od"):
+            with self.subTest(mode=mode), self.assertLogs("create_tle", logging.DEBUG) as logs:
+                ct.calcTLE(self.waypoints, mode=mode)
+            logged = {line.split(":")[2] for line in logs.output}
+            self.assertTrue({"inclination", "eccentricity", "sma", "mm", "line2"} <= logged)
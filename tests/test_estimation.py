@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from satellite_tracker.estimation import SlidingPolyFit
+
+class TestSlidingPolyFit(unittest.TestCase):
+    def test_recovers_constant_acceleration(self):
+        fit = SlidingPolyFit(window=8, degree=2)
+        accel = np.array([0.5, -1.0, 2.0])
+        vel0 = np.array([3.0, 0.0, -1.0])
+        t = np.arange(0, 50, 0.1) + 1.7e9   # epoch seconds, as time.time() gives
+        for ti in t:
+            dt = ti - t[0]
+            fit.update(ti, 10 + vel0 * dt + 0.5 * accel * dt * dt)
+        est = fit.estimate()
+        dt = t[-1] - t[0]
+        np.testing.assert_allclose(est.acceleration, accel, atol=1e-3)
+        np.testing.assert_allclose(est.velocity, vel0 + accel * dt, atol=1e-3)
+        self.assertEqual(est.covariance.shape, (3, 3, 3))
+
+    def test_matches_batch_polyfit(self):
+        rng = np.random.default_rng(0)
+        t = np.cumsum(rng.uniform(0.05, 0.15, 200))
+        x = np.stack([np.sin(t), t * t, np.cos(2 * t)], axis=1) + rng.normal(0, 0.01, (200, 3))
+        fit = SlidingPolyFit(window=12, degree=2)
+        fit.extend(t, x)
+        est = fit.estimate()
+        tw, xw = t[-12:] - t[-1], x[-12:]
+        coef, res, *_ = np.polyfit(tw, xw, 2, full=True)
+        np.testing.assert_allclose(est.position, coef[2], rtol=1e-6)
+        np.testing.assert_allclose(est.velocity, coef[1], rtol=1e-6)
+        np.testing.assert_allclose(est.acceleration, 2 * coef[0], rtol=1e-6)
+        sigma2 = res / (12 - 3)
+        np.testing.assert_allclose(est.covariance[:, 0, 0],
+                                   sigma2 * np.linalg.inv(np.vander(tw, 3).T @ np.vander(tw, 3))[2, 2],
+                                   rtol=1e-5)
+
+    def test_two_samples_fall_back_to_differencing(self):
+        fit = SlidingPolyFit(window=5)
+        fit.update(0.0, (0, 0, 0))
+        fit.update(2.0, (2, 4, 6))
+        est = fit.estimate()
+        np.testing.assert_allclose(est.velocity, [1, 2, 3])
+        np.testing.assert_array_equal(est.acceleration, [0, 0, 0])
+        self.assertTrue(np.all(np.isnan(est.covariance)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from sgp4.api import jday
+from satellite_tracker.frames import (
+    ecef_to_enu, ecef_to_sez, geodetic_to_ecef, gmst, look_angles, radec_to_azel, teme_to_ecef,
+)
+
+class TestFrames(unittest.TestCase):
+    def test_gmst_vallado_example(self):
+        # Vallado, Fundamentals of Astrodynamics, example 3-5
+        jd, fr = jday(1992, 8, 20, 12, 14, 0)
+        self.assertAlmostEqual(np.degrees(gmst(jd, fr)), 152.578787886, places=6)
+
+    def test_zenith_and_horizon(self):
+        observer = (42.7, 23.3, 0.0)
+        site = geodetic_to_ecef(*observer)
+        up = ecef_to_enu(site * 1.1, observer)
+        self.assertGreater(up[2], 0)
+        jd, fr = jday(2025, 8, 20, 0, 0, 0)
+        # Undo the Earth rotation so a point straight above the site is given in TEME.
+        theta = gmst(jd, fr)
+        c, s = np.cos(theta), np.sin(theta)
+        above = site + 500.0 * site / np.linalg.norm(site)
+        teme = np.array([c * above[0] - s * above[1], s * above[0] + c * above[1], above[2]])
+        np.testing.assert_allclose(teme_to_ecef(teme, jd, fr), above, atol=1e-9)
+        _, el, rng = look_angles(teme, jd, fr, observer)
+        self.assertGreater(el, 89.8)
+        self.assertAlmostEqual(float(rng), 500.0, places=6)
+
+    def test_sez_is_enu_reordered(self):
+        observer = (42.7, 23.3, 0.5)
+        points = geodetic_to_ecef(np.array([40.0, 45.0]), np.array([20.0, 25.0]), np.array([300.0, 900.0]))
+        enu = ecef_to_enu(points, observer)
+        sez = ecef_to_sez(points, observer)
+        np.testing.assert_allclose(sez, np.stack([-enu[:, 1], enu[:, 0], enu[:, 2]], axis=1))
+
+    def test_vernal_point_on_meridian(self):
+        # When local sidereal time is zero the vernal point culminates due south.
+        jd, fr = jday(2025, 3, 20, 18, 0, 0)
+        lon = -np.degrees(gmst(jd, fr))
+        az, el = radec_to_azel(0.0, 0.0, jd, fr, (42.7, lon, 0.0))
+        self.assertAlmostEqual(float(az), 180.0, places=6)
+        self.assertAlmostEqual(float(el), 90.0 - 42.7, places=6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+from utils.clock import VirtualClock, set_clock
+from utils.fusion import AxisTimeline, PointingFusion
+from utils.lidarSource import SyntheticLidarSource
+from utils.lidar_reader import LidarReader
+from test_lidar_reader import BatchSource
+
+class TestAxisTimeline(unittest.TestCase):
+    def test_ramp_interpolation(self):
+        axis = AxisTimeline(angle=10.0)
+        axis.command(1.0, 30.0, duration=2.0)
+        t = np.array([0.0, 1.0, 1.5, 2.0, 3.0, 4.0])
+        expected = [10, 10, 15, 20, 30, 30]
+        np.testing.assert_allclose(axis.angle_at(t), expected)
+        self.assertEqual([axis.angle_at(x) for x in t], expected)
+        self.assertEqual(axis.settled(), 3.0)
+
+    def test_command_mid_move_cuts_ramp(self):
+        axis = AxisTimeline()
+        axis.command(0.0, 100.0, duration=1.0)
+        axis.command(0.5, 0.0, duration=0.25)  # turned back at 50 deg
+        t = np.array([0.25, 0.5, 0.625, 0.75, 2.0])
+        np.testing.assert_allclose(axis.angle_at(t), [25, 50, 25, 0, 0])
+        np.testing.assert_allclose([axis.angle_at(x) for x in t], [25, 50, 25, 0, 0])
+
+    def test_instant_command(self):
+        axis = AxisTimeline()
+        axis.command(1.0, 45.0)
+        self.assertEqual(axis.angle_at(0.999), 0.0)
+        self.assertEqual(axis.angle_at(1.0 + 1e-6), 45.0)
+
+    def test_capacity_keeps_recent_history(self):
+        axis = AxisTimeline(capacity=16)
+        for i in range(40):
+            axis.command(float(i), float(i), duration=0.5)
+        np.testing.assert_allclose(axis.angle_at(np.array([35.25, 38.5, 39.25, 50])), [34.5, 38, 38.5, 39])
+        self.assertLessEqual(axis.count, 16)
+
+class TestPointingFusion(unittest.TestCase):
+    def test_samples_get_interpolated_pointing(self):
+        t = np.arange(21) / 10
+        reader = LidarReader(BatchSource([t]), frame_rate=10)
+        reader.poll()
+        az, el = AxisTimeline(0.0), AxisTimeline(100.0)
+        az.command(0.0, 30.0, duration=1.0)     # 30 deg/s for a second
+        el.command(0.5, 90.0, duration=0.5)     # -20 deg/s for half a second
+        fusion = PointingFusion(reader, az, el, az_offset=5.0, el_offset=100.0)
+
+        samples = fusion.between(0.2, 1.2)
+        ts = np.round(samples.t, 6)
+        np.testing.assert_allclose(ts, np.arange(2, 13) / 10)
+        np.testing.assert_allclose(samples.az, np.minimum(30 * ts, 30) - 5.0, atol=1e-9)
+        np.testing.assert_allclose(samples.el, -20 * np.clip(ts - 0.5, 0, 0.5), atol=1e-9)
+        np.testing.assert_allclose(samples.distance, samples.t * 2)
+        self.assertEqual(fusion.settled(), 1.0)
+
+    def test_sample_waits_for_the_move_and_window(self):
+        clock = VirtualClock()
+        previous = set_clock(clock)
+        try:
+            az, el = AxisTimeline(), AxisTimeline()
+            source = SyntheticLidarSource(pointing=lambda t: (az.angle_at(t), el.angle_at(t)),
+                                          scene=lambda a, e: 500.0 + 10 * a, rate=100, noise=0)
+            reader = LidarReader(source, frame_rate=100).start()
+            fusion = PointingFusion(reader, az, el, window=0.02)
+
+            clock.sleep(0.1)
+            az.command(clock.now(), 20.0, duration=0.05)
+            samples = fusion.sample(clock=clock)
+            self.assertAlmostEqual(clock.now(), 0.17)
+            self.assertTrue(np.all(samples.t >= 0.15))
+            np.testing.assert_allclose(samples.az, 20.0)
+            np.testing.assert_allclose(samples.distance, 700.0)
+            self.assertEqual(fusion.distance(clock=clock), 700.0)
+        finally:
+            set_clock(previous)
+
+if __name__ == '__main__':
+    unittest.main()
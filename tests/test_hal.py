@@ -0,0 +1,130 @@
+import os
+import sys
+import unittest
+from unittest import mock
+import globalsConfig as gv
+from utils import hal as shared_hal
+from utils.clock import VirtualClock, set_clock
+from utils.hal import ENABLE_PIN, SERVO_PIN, RPiHAL, SimHAL, open_hal
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+class TestServo(unittest.TestCase):
+    # servo commands are timed on the shared clock
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.addCleanup(set_clock, set_clock(self.clock))
+
+    def test_duty_angle_mapping(self):
+        servo = SimHAL().servo
+        self.assertEqual(servo.duty_for(0), 1.5)
+        self.assertEqual(servo.duty_for(90), 6.5)
+        self.assertEqual(servo.duty_for(180), 11.5)
+        for angle in (0, 37.5, 90, 180):
+            self.assertAlmostEqual(servo.angle_for(servo.duty_for(angle)), angle)
+
+    def test_calibration_at_construction(self):
+        servo = SimHAL(min_duty=2.5).servo
+        self.assertEqual(servo.duty_for(0), 2.5)
+        self.assertEqual(servo.duty_for(180), 12.5)
+        servo.set_duty(7.5)
+        self.assertEqual(servo.angle, 90)
+
+    def test_sim_servo_slews(self):
+        servo = SimHAL(slew_rate=600.0).servo
+        servo.set_angle(60)
+        self.assertEqual(servo.angle, 60)
+        self.assertEqual(servo.position(), 0.0)
+        self.assertAlmostEqual(servo.position(0.05), 30.0)
+        self.assertEqual(servo.position(0.2), 60.0)
+        # a new command starts from wherever the horn is, not the old target
+        self.clock.sleep(0.05)
+        servo.set_angle(0)
+        self.assertAlmostEqual(servo.position(0.075), 15.0)
+        servo.release()
+        self.assertEqual(servo.position(1.0), 0.0)
+        self.assertEqual(servo.angle, 0)
+
+class TestSimStepper(unittest.TestCase):
+    def setUp(self):
+        self.clock = ManualClock()
+        self.stepper = SimHAL(self.clock, self.clock.sleep).stepper
+        self.stepper.setup('1/32')
+
+    def test_position_tracking(self):
+        self.assertEqual(self.stepper.steps_per_rev, 6400)
+        self.stepper.enable()
+        self.stepper.move(800, delay=0.001)
+        self.assertEqual(self.stepper.position, 800)
+        self.assertEqual(self.stepper.angle(), 45.0)
+        self.assertAlmostEqual(self.clock.now, 1.6)
+        self.stepper.move(-1600, delay=0.0005)
+        self.stepper.move(0)
+        self.assertEqual(self.stepper.position, -800)
+        self.assertEqual(self.stepper.angle(), -45.0)
+        self.assertEqual(len(self.clock.slept), 2)
+
+    def test_disabled_driver_skips_steps(self):
+        self.stepper.move(10)
+        self.stepper.enable()
+        self.stepper.move(3)
+        self.stepper.disable()
+        self.stepper.move(-4)
+        self.assertEqual(self.stepper.position, 3)
+        self.assertEqual(self.stepper.skipped, 14)
+
+class TestRPiHAL(unittest.TestCase):
+    def setUp(self):
+        self.GPIO = mock.MagicMock()
+        rpi = mock.MagicMock(GPIO=self.GPIO)
+        patch = mock.patch.dict(sys.modules, {"RPi": rpi, "RPi.GPIO": self.GPIO})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_gpio_is_set_up_on_first_use(self):
+        hal = RPiHAL(min_duty=2.5)
+        self.GPIO.setmode.assert_not_called()
+        hal.servo.set_angle(180)
+        self.GPIO.setmode.assert_called_once_with(self.GPIO.BCM)
+        self.GPIO.PWM.assert_called_once_with(SERVO_PIN, 50)
+        hal.pwm.ChangeDutyCycle.assert_called_once_with(12.5)
+        hal.stepper.enable()
+        self.GPIO.output.assert_called_with(ENABLE_PIN, self.GPIO.LOW)
+        self.assertEqual(self.GPIO.setmode.call_count, 1)
+        hal.cleanup()
+        hal.pwm.stop.assert_called_once_with()
+        self.GPIO.cleanup.assert_called_once_with()
+
+    def test_cleanup_before_use_leaves_gpio_alone(self):
+        RPiHAL().cleanup()
+        self.GPIO.cleanup.assert_not_called()
+
+class TestOpenHal(unittest.TestCase):
+    def test_selection(self):
+        self.assertEqual(gv.HAL_BACKEND, os.environ.get("FMS_HAL", "rpi"))
+        with mock.patch.object(gv, "HAL_BACKEND", "sim"):
+            self.assertIsInstance(open_hal(), SimHAL)
+        self.assertIsInstance(open_hal("rpi"), RPiHAL)
+        with mock.patch.object(gv, "HAL_BACKEND", "rpi"):
+            self.assertIsInstance(open_hal(), RPiHAL)
+        with self.assertRaisesRegex(ValueError, "stepperbot"):
+            open_hal("stepperbot")
+
+    def test_calibration_stays_with_its_head(self):
+        hal = open_hal("sim", min_duty=2.5, span=9.0)
+        self.assertEqual((hal.servo.min_duty, hal.servo.span), (2.5, 9.0))
+        # the shared head keeps the default calibration
+        self.assertEqual((shared_hal.servo.min_duty, shared_hal.servo.span), (1.5, 10.0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+from satellite_tracker.history import TrackHistory
+
+class TestTrackHistory(unittest.TestCase):
+    def test_wraps_and_keeps_newest(self):
+        history = TrackHistory(capacity=4)
+        for i in range(6):
+            history.append(float(i), (i, i, i))
+        times, points = history.window()
+        self.assertEqual(len(history), 4)
+        np.testing.assert_array_equal(times, [2, 3, 4, 5])
+        np.testing.assert_array_equal(points[:, 0], [2, 3, 4, 5])
+
+    def test_window_is_a_view(self):
+        history = TrackHistory(capacity=8)
+        history.extend(np.arange(5.0), np.zeros((5, 3)))
+        times, _ = history.window(3)
+        self.assertFalse(times.flags.owndata)
+        self.assertFalse(times.flags.writeable)
+        np.testing.assert_array_equal(times, [2, 3, 4])
+
+    def test_extend_longer_than_capacity(self):
+        history = TrackHistory(capacity=3)
+        history.append(-1.0, (0, 0, 0))
+        history.extend(np.arange(10.0), np.arange(30.0).reshape(10, 3))
+        times, points = history.window()
+        np.testing.assert_array_equal(times, [7, 8, 9])
+        np.testing.assert_array_equal(points[-1], [27, 28, 29])
+        self.assertEqual(history.latest()[0], 9.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+from utils.lidarUtils import FRAME_HEADER, FRAME_SIZE, data_formatter, parse_frames
+
+def frame(distance, strength=100, raw_temp=2200):
+    body = [FRAME_HEADER, FRAME_HEADER, distance & 0xFF, distance >> 8,
+            strength & 0xFF, strength >> 8, raw_temp & 0xFF, raw_temp >> 8]
+    return bytes(body + [sum(body) & 0xFF])
+
+def bad_checksum(distance):
+    raw = bytearray(frame(distance))
+    raw[8] ^= 0xFF
+    return bytes(raw)
+
+class TestParseFrames(unittest.TestCase):
+    def test_fields(self):
+        parsed = parse_frames(frame(1234, strength=567, raw_temp=2200) + frame(5))
+        np.testing.assert_array_equal(parsed.distance, [1234, 5])
+        np.testing.assert_array_equal(parsed.strength, [567, 100])
+        np.testing.assert_allclose(parsed.temperature, 2200 / 8 - 256)
+        np.testing.assert_array_equal(parsed.offsets, [0, FRAME_SIZE])
+        self.assertEqual((parsed.consumed, parsed.corrupt), (2 * FRAME_SIZE, 0))
+        self.assertEqual(data_formatter(frame(1234)), 1234.0)
+
+    def test_resync_after_garbage(self):
+        garbage = bytes([0x01, 0x59, 0x20, 0xFF, 0x59, 0x00])
+        chunk = garbage + frame(300) + b"\x00\x13" + frame(301)
+        parsed = parse_frames(chunk)
+        np.testing.assert_array_equal(parsed.distance, [300, 301])
+        np.testing.assert_array_equal(parsed.offsets, [6, 6 + FRAME_SIZE + 2])
+        self.assertEqual(parsed.corrupt, 0)  # no header pair in the garbage
+        self.assertEqual(parsed.consumed, len(chunk))
+        # a stray 0x59 right before a frame is one header pair that failed
+        self.assertEqual(parse_frames(b"\x00\x59" + frame(300)).corrupt, 1)
+
+    def test_header_pattern_inside_a_frame(self):
+        # distance 0x5959 puts a header pair in the payload
+        parsed = parse_frames(frame(0x5959) + frame(7))
+        np.testing.assert_array_equal(parsed.distance, [0x5959, 7])
+        self.assertEqual(parsed.corrupt, 0)
+
+    def test_partial_trailing_frame_is_kept(self):
+        whole = frame(10) + frame(11)
+        for cut in range(1, FRAME_SIZE):
+            with self.subTest(cut=cut):
+                chunk = whole + frame(12)[:cut]
+                parsed = parse_frames(chunk)
+                np.testing.assert_array_equal(parsed.distance, [10, 11])
+                self.assertEqual(parsed.consumed, len(whole))
+                rest = chunk[parsed.consumed:] + frame(12)[cut:]
+                np.testing.assert_array_equal(parse_frames(rest).distance, [12])
+
+    def test_checksum_rejection_count(self):
+        chunk = frame(1) + bad_checksum(2) + frame(3) + bad_checksum(4) + bad_checksum(5) + frame(6)
+        parsed = parse_frames(chunk)
+        np.testing.assert_array_equal(parsed.distance, [1, 3, 6])
+        self.assertEqual(parsed.corrupt, 3)
+
+    def test_header_run_counts_one_corrupt_frame(self):
+        run = bytes([FRAME_HEADER] * 12) + b"\x00\x00"
+        parsed = parse_frames(frame(1) + run + frame(2))
+        np.testing.assert_array_equal(parsed.distance, [1, 2])
+        self.assertEqual(parsed.corrupt, 1)
+        self.assertEqual(parse_frames(run + frame(2)).corrupt, 1)
+
+    def test_short_chunks(self):
+        for chunk in (b"", b"\x59", bytes([FRAME_HEADER] * 2)):
+            with self.subTest(chunk=chunk):
+                parsed = parse_frames(chunk)
+                self.assertEqual(len(parsed.distance), 0)
+                self.assertEqual(parsed.consumed, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import threading
+import unittest
+import numpy as np
+from utils.clock import VirtualClock, set_clock
+from utils.lidarSource import EMPTY, LidarSource, SerialLidarSource, SyntheticLidarSource
+from utils.lidar_reader import LidarReader, SampleRing
+from utils.stepSync import StepHandshake
+from test_lidar_frames import frame
+
+class FakeSerial:
+    def __init__(self):
+        self.buffer = b""
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def read(self, n):
+        chunk, self.buffer = self.buffer[:n], self.buffer[n:]
+        return chunk
+
+    def close(self):
+        pass
+
+class BatchSource(LidarSource):
+    """ Hands out the given (t, distance, strength) batches one per read """
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+
+    def read(self):
+        if not self.batches:
+            return EMPTY
+        t = np.asarray(self.batches.pop(0), dtype=float)
+        return t, t * 2, np.ones(len(t))
+
+class TestSampleRing(unittest.TestCase):
+    def test_wraparound(self):
+        ring = SampleRing(capacity=8)
+        for start in range(0, 20, 3):
+            t = np.arange(start, start + 3, dtype=float)
+            ring.push(t, t * 2, t * 3)
+        self.assertEqual(ring.count, 21)
+        t, distance, strength = ring.between(-1, 100)
+        np.testing.assert_array_equal(t, np.arange(13, 21))
+        np.testing.assert_array_equal(distance, t * 2)
+        np.testing.assert_array_equal(strength, t * 3)
+        np.testing.assert_array_equal(ring.between(15.5, 18)[0], [16, 17, 18])
+        np.testing.assert_array_equal(ring.latest(3)[0], [18, 19, 20])
+        np.testing.assert_array_equal(ring.latest(50)[0], np.arange(13, 21))
+
+    def test_batch_larger_than_ring(self):
+        ring = SampleRing(capacity=4)
+        t = np.arange(10, dtype=float)
+        ring.push(t, t, t)
+        self.assertEqual(ring.count, 10)
+        np.testing.assert_array_equal(ring.between(0, 10)[0], [6, 7, 8, 9])
+
+    def test_slots_being_overwritten_are_discarded(self):
+        ring = SampleRing(capacity=8)
+        t = np.arange(8, dtype=float)
+        ring.push(t, t, t)
+        # a writer announced the next 3 samples and is part way through them
+        ring._writing = ring.count + 3
+        ring.t[0] = 100.0
+        np.testing.assert_array_equal(ring.between(0, 7)[0], [3, 4, 5, 6, 7])
+        np.testing.assert_array_equal(ring.latest(8)[0], [3, 4, 5, 6, 7])
+
+    def test_read_while_writer_advances(self):
+        ring = SampleRing(capacity=64)
+        done = threading.Event()
+
+        def writer():
+            for start in range(0, 200000, 7):
+                t = np.arange(start, start + 7, dtype=float)
+                ring.push(t, t * 2, t * 3)
+            done.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        reads = 0
+        while not done.is_set() or reads == 0:
+            t, distance, strength = ring.between(-1, np.inf)
+            np.testing.assert_array_equal(distance, t * 2)
+            np.testing.assert_array_equal(strength, t * 3)
+            self.assertTrue(np.all(np.diff(t) == 1))
+            reads += 1
+        thread.join()
+
+class TestLidarReader(unittest.TestCase):
+    def test_dropped_frame_counting(self):
+        # 10 ms frames: 0..4 in full, then 7..8 (5, 6 lost), then 12 (9..11 lost)
+        source = BatchSource([[0.00, 0.01, 0.02], [0.03, 0.04], [0.07, 0.08], [0.12]])
+        reader = LidarReader(source, capacity=16, frame_rate=100)
+        self.assertEqual([reader.poll() for _ in range(5)], [3, 2, 2, 1, 0])
+        self.assertEqual(reader.stats(), {"frames": 8, "corrupt": 0, "dropped": 5, "errors": 0})
+        t, distance, _ = reader.between(0.035, 0.1)
+        np.testing.assert_allclose(t, [0.04, 0.07, 0.08])
+        np.testing.assert_allclose(distance, t * 2)
+
+    def test_virtual_clock_polls_lazily(self):
+        clock = VirtualClock()
+        previous = set_clock(clock)
+        try:
+            handshake = StepHandshake()
+            source = SyntheticLidarSource(pointing=lambda t: (0.0, 0.0), scene=lambda a, e: 300.0, noise=0)
+            reader = LidarReader(source, frame_rate=100, handshake=handshake).start()
+            clock.sleep(0.5)
+            self.assertEqual(reader.frames, 0)  # nobody asked yet
+            self.assertEqual(len(reader.between(0.0, 0.5)[0]), 51)
+            # a pending step is answered as soon as time moves past a sample
+            handshake.announce(10)
+            clock.sleep(0.015)
+            self.assertFalse(handshake.pending)
+            self.assertEqual(handshake.samples[-1].t_sample, 0.51)
+        finally:
+            set_clock(previous)
+
+class TestSerialTimestamps(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        self.source = SerialLidarSource(baudrate=115200, frame_rate=100)
+        self.source.clock = lambda: self.now
+        self.source.ser = FakeSerial()
+
+    def test_backlog_is_spaced_by_the_frame_period(self):
+        self.source.ser.buffer = b"".join(frame(d) for d in range(5)) + frame(9)[:4]
+        t, distance, _ = self.source.read()
+        np.testing.assert_array_equal(distance, range(5))
+        byte_time = 10.0 / 115200
+        np.testing.assert_allclose(t, 100.0 - 4 * byte_time - np.arange(4, -1, -1) * 0.01)
+
+    def test_timestamps_stay_monotonic_after_a_burst(self):
+        self.source.ser.buffer = frame(1) + frame(2)
+        first, _, _ = self.source.read()
+        self.now += 0.015  # far fewer periods than the frames the next read finds
+        self.source.ser.buffer = b"".join(frame(d) for d in range(6))
+        t, _, _ = self.source.read()
+        self.assertGreater(t[0], first[-1])
+        self.assertTrue(np.all(np.diff(t) > 0))
+        self.assertAlmostEqual(t[-1], 100.015)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import globalsConfig as gv
+from utils.lidarSource import (EMPTY, LidarSource, ReplayLidarSource, SerialLidarSource, SyntheticLidarSource,
+                               SyntheticTarget, open_lidar_source, save_recording)
+
+class ManualTime:
+    """ Drives every source's clock by hand: sleep() only moves `now` """
+
+    def __init__(self, start=50.0):
+        self.now = start
+        self.patches = [mock.patch.object(LidarSource, "clock", lambda source: self.now),
+                        mock.patch.object(LidarSource, "sleep", lambda source, seconds: self.advance(seconds))]
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def __enter__(self):
+        for patch in self.patches:
+            patch.start()
+        return self
+
+    def __exit__(self, *exc):
+        for patch in self.patches:
+            patch.stop()
+
+class TestReplayLidarSource(unittest.TestCase):
+    def setUp(self):
+        self.time = ManualTime().__enter__()
+        self.addCleanup(self.time.__exit__)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "scan.npz")
+        # recorded on another clock, 10 ms apart
+        self.t = 1000.0 + 0.01 * np.arange(10)
+        self.distance = np.arange(10) * 3.0
+        self.strength = np.arange(10) + 500.0
+        save_recording(self.path, self.t, self.distance, self.strength)
+
+    def read_all(self, source):
+        batches = []
+        while not source.exhausted:
+            batches.append(source.read())
+        return [np.concatenate(column) for column in zip(*batches)]
+
+    def test_round_trip(self):
+        source = ReplayLidarSource(self.path, speed=0, chunk_size=4)
+        t, distance, strength = self.read_all(source)
+        np.testing.assert_allclose(t, 50.0 + self.t - self.t[0])
+        np.testing.assert_array_equal(distance, self.distance)
+        np.testing.assert_array_equal(strength, self.strength)
+
+    def test_missing_strength_reads_as_zero(self):
+        np.savez(self.path, t=self.t, distance=self.distance)
+        _, distance, strength = self.read_all(ReplayLidarSource(self.path, speed=0))
+        np.testing.assert_array_equal(distance, self.distance)
+        np.testing.assert_array_equal(strength, np.zeros(10))
+
+    def test_plays_against_the_clock(self):
+        source = ReplayLidarSource(self.path, speed=2.0)
+        self.time.advance(0.02)  # 40 ms of recording
+        t, distance, _ = source.read()
+        np.testing.assert_array_equal(distance, self.distance[:5])
+        np.testing.assert_allclose(t, 50.0 + 0.005 * np.arange(5))
+        self.assertEqual(len(source.read()[0]), 0)
+
+    def test_end_of_file(self):
+        source = ReplayLidarSource(self.path, speed=0)
+        self.assertFalse(source.exhausted)
+        self.read_all(source)
+        self.assertTrue(source.exhausted)
+        for column, empty in zip(source.read(), EMPTY):
+            np.testing.assert_array_equal(column, empty)
+        self.assertIsNone(source.read_one(timeout=0.01))
+        self.assertAlmostEqual(self.time.now, 50.01, delta=source.poll_interval)
+
+    def test_loop_restarts_after_the_last_sample(self):
+        source = ReplayLidarSource(self.path, speed=0, chunk_size=10, loop=True)
+        first, _, _ = source.read()
+        second, distance, _ = source.read()
+        self.assertFalse(source.exhausted)
+        np.testing.assert_array_equal(distance, self.distance)
+        np.testing.assert_allclose(second, first + 0.09)
+
+class TestSyntheticLidarSource(unittest.TestCase):
+    def setUp(self):
+        self.time = ManualTime().__enter__()
+        self.addCleanup(self.time.__exit__)
+
+    def source(self, **kwargs):
+        kwargs.setdefault("pointing", lambda t: (10.0 * (t - 50.0), 5.0))
+        return SyntheticLidarSource(rate=100, **kwargs)
+
+    def test_samples_every_period(self):
+        source = self.source(noise=0)
+        t, distance, strength = source.read()
+        np.testing.assert_array_equal(t, [50.0])
+        self.time.advance(0.055)
+        t, distance, strength = source.read()
+        np.testing.assert_allclose(t, 50.0 + 0.01 * np.arange(1, 6))
+        az = 10.0 * (t - 50.0)
+        np.testing.assert_array_equal(distance, np.round(600.0 + 200.0 * np.cos(np.radians(2.0 * az)) + 10.0))
+        np.testing.assert_array_equal(strength, np.full(5, 1000.0))
+
+    def test_seed_makes_the_noise_reproducible(self):
+        runs = []
+        for seed in (7, 7, 8):
+            self.time.now = 50.0
+            source = self.source(seed=seed, noise=5.0)
+            self.time.advance(1.0)
+            runs.append(source.read()[1])
+        np.testing.assert_array_equal(runs[0], runs[1])
+        self.assertFalse(np.array_equal(runs[0], runs[2]))
+
+    def test_moving_target_occludes_the_scene(self):
+        target = SyntheticTarget(az=0.0, el=5.0, az_rate=10.0, el_rate=0.0, distance=150.0, radius=0.5)
+        source = self.source(noise=0, targets=[target], scene=lambda az, el: 800.0)
+        self.time.advance(0.2)
+        np.testing.assert_array_equal(source.read()[1], np.full(21, 150.0))
+        # the scanner stands still while the target moves on
+        source.pointing = lambda t: (2.0, 5.0)
+        self.time.advance(0.3)
+        t, distance, _ = source.read()
+        np.testing.assert_array_equal(distance, np.where(np.abs(10.0 * (t - 50.0) - 2.0) <= 0.5, 150.0, 800.0))
+
+class TestOpenLidarSource(unittest.TestCase):
+    def test_follows_the_environment(self):
+        self.assertEqual(gv.LIDAR_SOURCE, os.environ.get("FMS_LIDAR", "serial"))
+
+    def test_selection(self):
+        with mock.patch.object(gv, "LIDAR_SOURCE", "synthetic"):
+            self.assertIsInstance(open_lidar_source(), SyntheticLidarSource)
+        with mock.patch.object(gv, "LIDAR_SOURCE", "serial"):
+            source = open_lidar_source(baudrate=9600)
+        self.assertIsInstance(source, SerialLidarSource)
+        self.assertEqual(source.baudrate, 9600)
+        self.assertIsNone(source.ser)  # the port opens on the first read
+
+    def test_replay_uses_the_configured_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scan.npz")
+            save_recording(path, [0.0, 0.5], [100.0, 200.0], [1.0, 1.0])
+            with mock.patch.multiple(gv, LIDAR_SOURCE="replay", LIDAR_REPLAY_FILE=path, LIDAR_REPLAY_SPEED=3.0):
+                source = open_lidar_source()
+                self.assertIsInstance(source, ReplayLidarSource)
+                self.assertEqual(source.speed, 3.0)
+                self.assertIsInstance(open_lidar_source("replay", speed=0), ReplayLidarSource)
+            np.testing.assert_array_equal(source.distance, [100.0, 200.0])
+
+    def test_unknown_kind(self):
+        with self.assertRaisesRegex(ValueError, "laser"):
+            open_lidar_source("laser")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+from utils.classes import LATENCY_BINS, Operator, State
+from utils.clock import VirtualClock
+
+class Scripted(State):
+    """ Returns the next state from `plan` on each execute, taking `cost` seconds of clock time """
+
+    def __init__(self, name, clock, plan=(), cost=0.0, events=None):
+        super().__init__(name)
+        self.clock = clock
+        self.plan = list(plan)
+        self.cost = cost
+        self.events = events or {}
+        self.log = []
+
+    def enter(self):
+        self.log.append("enter")
+
+    def exit(self):
+        self.log.append("exit")
+
+    def handle(self, event):
+        return self.events.get(event)
+
+    def execute(self):
+        self.clock.sleep(self.cost)
+        return self.plan.pop(0) if self.plan else self.name
+
+class TestOperator(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock()
+
+    def operator(self, **kwargs):
+        self.a = Scripted("A", self.clock, plan=["A", "B"], cost=0.002)
+        self.b = Scripted("B", self.clock, plan=["A"], cost=0.05, events={"abort": "A"})
+        return Operator({"A": self.a, "B": self.b}, "A", clock=self.clock, **kwargs)
+
+    def test_transitions(self):
+        op = self.operator()
+        for _ in range(3):
+            op.step()
+        self.assertEqual(op.state_name, "A")
+        self.assertEqual(dict(op.transitions), {("A", "B"): 1, ("B", "A"): 1})
+        self.assertEqual(self.a.log, ["enter", "exit", "enter"])
+        self.assertEqual(self.b.log, ["enter", "exit"])
+        self.assertEqual((op.stats["A"].visits, op.stats["B"].visits), (2, 1))
+
+    def test_unknown_state(self):
+        op = Operator({"A": Scripted("A", self.clock, plan=["nowhere"])}, "A", clock=self.clock)
+        with self.assertRaises(KeyError):
+            op.step()
+
+    def test_guard_veto(self):
+        allowed = []
+        op = self.operator(guards={("A", "B"): lambda: bool(allowed)})
+        op.step()
+        op.step()
+        self.assertEqual(op.state_name, "A")
+        self.assertEqual(op.blocked[("A", "B")], 1)
+        self.a.plan = ["B"]
+        allowed.append(True)
+        op.step()
+        self.assertEqual(op.state_name, "B")
+        self.assertIn("A → B: 1 (1 blocked)", op.report())
+
+    def test_timeout_fallback(self):
+        op = self.operator(timeouts={"B": (0.1, "A")})
+        op.step()
+        op.step()
+        self.assertEqual(op.state_name, "B")
+        self.b.plan = []  # B would stay forever
+        op.step()
+        op.step()
+        self.assertEqual(op.state_name, "B")
+        op.step()  # 0.1 s spent in B: leave before executing again
+        self.assertEqual(op.state_name, "A")
+        self.assertEqual(op.stats["B"].executions, 2)
+        self.assertAlmostEqual(op.stats["B"].dwell, 0.1)
+
+    def test_event_handled_by_current_state(self):
+        op = self.operator()
+        op.step()
+        op.step()
+        op.post("abort")
+        op.post("ignored")
+        op.step()
+        self.assertEqual(op.transitions[("B", "A")], 1)
+        self.assertEqual(op.stats["B"].executions, 0)
+
+    def test_tick_schedule(self):
+        state = Scripted("A", self.clock, cost=0.003)
+        op = Operator({"A": state}, "A", tick=0.01, clock=self.clock)
+        op.run(duration=1.0)
+        # on the tick at 0, 0.01, ..., 1.0 s, then stops as the duration is up
+        self.assertEqual(op.stats["A"].executions, 101)
+        self.assertAlmostEqual(self.clock.now(), 1.003)
+        self.assertAlmostEqual(op.stats["A"].dwell, 1.003)
+
+    def test_latency_stats(self):
+        op = self.operator()
+        for _ in range(4):
+            op.step()  # A, A -> B, B -> A, A
+        a, b = op.stats["A"], op.stats["B"]
+        self.assertEqual((a.executions, b.executions), (3, 1))
+        self.assertAlmostEqual(a.latency_total, 0.006)
+        self.assertAlmostEqual(b.latency_max, 0.05)
+        self.assertEqual(a.latency_hist.sum(), 3)
+        self.assertEqual(b.latency_hist.sum(), 1)
+        # percentiles report the upper edge of the bin, capped at the max seen
+        upper = LATENCY_BINS[LATENCY_BINS.searchsorted(0.002)]
+        self.assertAlmostEqual(a.latency_percentile(50), min(upper, 0.002))
+        self.assertAlmostEqual(b.latency_percentile(95), 0.05)
+        # dwell of the visits that ended: A for two executes, B for one
+        self.assertAlmostEqual(a.dwell, 0.004)
+        self.assertAlmostEqual(b.dwell, 0.05)
+
+if __name__ == '__main__':
+    unittest.main()
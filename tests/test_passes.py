@@ -0,0 +1,55 @@
+import datetime as dt
+import unittest
+import numpy as np
+from sgp4.api import Satrec
+from satellite_tracker.frames import SOFIA, look_angles
+from satellite_tracker.passes import CULMINATION, RISE, SET, predict_passes
+from satellite_tracker.propagation import epoch_grid, propagate
+
+ISS = (
+    "1 25544U 98067A   25232.51782528  .00002182  00000-0  11606-4 0  2927",
+    "2 25544  51.6416 247.4627 0006703 130.5360 325.0288 15.50125391563537",
+)
+
+class TestPassPrediction(unittest.TestCase):
+    def setUp(self):
+        self.start = dt.datetime(2025, 8, 20)
+        self.events = predict_passes([ISS], SOFIA, self.start, 86400, step=60.0)
+
+    def test_events_sorted_and_bounded(self):
+        times = self.events["jd"] + self.events["fr"]
+        self.assertTrue(np.all(np.diff(times) >= 0))
+        edges = self.events[self.events["event"] != CULMINATION]
+        np.testing.assert_allclose(edges["elevation"], 0.0, atol=0.05)
+        self.assertTrue(np.all(self.events[self.events["event"] == CULMINATION]["elevation"] > 0))
+
+    def test_matches_dense_sampling(self):
+        jd, fr = epoch_grid(self.start, 86400, 1.0)
+        eph = propagate([ISS], jd, fr)
+        _, el, _ = look_angles(eph.positions, jd, fr, SOFIA)
+        above = (el[0] >= 0).astype(int)
+        rises = np.flatnonzero(np.diff(above) == 1) + 1
+        sets = np.flatnonzero(np.diff(above) == -1)
+        seconds = lambda table: (table["jd"] - jd[0] + table["fr"] - fr[0]) * 86400.0
+        for kind, samples in ((RISE, rises), (SET, sets)):
+            found = seconds(self.events[self.events["event"] == kind])
+            self.assertEqual(len(found), len(samples))
+            np.testing.assert_allclose(found, samples, atol=1.0)
+        peaks = self.events[self.events["event"] == CULMINATION]
+        self.assertAlmostEqual(peaks["elevation"].max(), el.max(), places=2)
+
+    def test_no_culmination_on_the_window_edges(self):
+        jd0, _ = epoch_grid(self.start, 0, 60.0)
+        peak = self.events[self.events["event"] == CULMINATION][0]
+        culmination = self.start + dt.timedelta(days=float(peak["jd"] - jd0[0] + peak["fr"]))
+
+        # already descending at the start: the pass only sets
+        events = predict_passes([ISS], SOFIA, culmination + dt.timedelta(minutes=1), 3600, step=60.0)
+        self.assertEqual(events["event"][0], SET)
+        self.assertTrue(np.all(events["elevation"][events["event"] == CULMINATION] > 0))
+        # still climbing at the end: the pass only rises
+        events = predict_passes([ISS], SOFIA, culmination - dt.timedelta(minutes=30), 28 * 60, step=60.0)
+        self.assertEqual(events["event"][-1], RISE)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import datetime as dt
+import unittest
+import numpy as np
+from sgp4.api import Satrec, WGS72, jday
+from satellite_tracker.propagation import epoch_grid, iter_propagate, load_satellites, propagate
+
+ISS = (
+    "1 25544U 98067A   08264.51782528 -.00002182  00000-0 -11606-4 0  2927",
+    "2 25544  51.6416 247.4627 0006703 130.5360 325.0288 15.72125391563537",
+)
+DRONE = (
+    "1 69420U          25232.29970000  .00000000  00000-0  00000+0 0    04",
+    "2 69420  45.0000 270.0000 0000000   0.0000   0.0000 15.22002539    00",
+)
+
+class TestPropagation(unittest.TestCase):
+    def test_matches_scalar_sgp4(self):
+        sats = load_satellites([ISS, DRONE])
+        jd, fr = epoch_grid(dt.datetime(2008, 9, 20, 12, 0, 0), 3600, 60)
+        eph = propagate(sats, jd, fr)
+        self.assertEqual(eph.positions.shape, (2, 61, 3))
+        for s, sat in enumerate(sats):
+            for t in (0, 30, 60):
+                e, r, v = sat.sgp4(jd[t], fr[t])
+                self.assertEqual(e, eph.error_codes[s, t])
+                np.testing.assert_allclose(eph.positions[s, t], r)
+                np.testing.assert_allclose(eph.velocities[s, t], v)
+
+    def test_failures_are_masked(self):
+        decaying = Satrec()
+        decaying.sgp4init(WGS72, 'i', 1, 25000.0, 0.5, 0.0, 0.0, 0.001, 0.0, 0.9, 0.0, 0.068, 0.0)
+        eph = propagate([decaying], 2433281.5 + 25000 + np.array([0.0, 30.0]), [0.0, 0.0])
+        np.testing.assert_array_equal(eph.failed, [[False, True]])
+        self.assertTrue(np.all(np.isnan(eph.positions[0, 1])))
+
+    def test_chunks_cover_all_epochs(self):
+        jd, fr = epoch_grid(jday(2025, 8, 20, 0, 0, 0), 600, 1)
+        full = propagate([ISS], jd, fr)
+        chunks = list(iter_propagate([ISS], jd, fr, chunk_size=250))
+        self.assertEqual([start for start, _ in chunks], [0, 250, 500])
+        stitched = np.concatenate([eph.positions for _, eph in chunks], axis=1)
+        np.testing.assert_array_equal(stitched, full.positions)
+
+if __name__ == '__main__':
+    unittest.main()
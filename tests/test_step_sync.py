@@ -0,0 +1,131 @@
+import threading
+import time
+import unittest
+import numpy as np
+from utils.clock import RealClock, VirtualClock, set_clock
+from utils.stepSync import StepHandshake
+
+class TestStepHandshake(unittest.TestCase):
+    # servo and LiDAR threads waiting on each other need wall time
+    def setUp(self):
+        self.previous = set_clock(RealClock())
+        self.handshake = StepHandshake()
+
+    def tearDown(self):
+        set_clock(self.previous)
+
+    def test_each_step_handed_off_exactly_once(self):
+        steps = 200
+        answered = []
+
+        def lidar():
+            while True:
+                step = self.handshake.wait_step(timeout=5)
+                if step is None:
+                    return
+                answered.append(step.seq)
+                self.handshake.complete(step.angle * 10)
+
+        thread = threading.Thread(target=lidar)
+        thread.start()
+        for angle in range(steps):
+            self.assertTrue(self.handshake.ready(timeout=5))
+            self.handshake.announce(angle)
+        self.assertTrue(self.handshake.ready(timeout=5))
+        self.handshake.close()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(answered, list(range(1, steps + 1)))
+        self.assertEqual([s.seq for s in self.handshake.samples], list(range(1, steps + 1)))
+        self.assertEqual([s.distance for s in self.handshake.samples], [a * 10.0 for a in range(steps)])
+        self.assertEqual(self.handshake.missed, 0)
+
+    def test_second_complete_is_ignored(self):
+        self.handshake.announce(5)
+        self.assertIsNotNone(self.handshake.complete(100.0))
+        self.assertIsNone(self.handshake.complete(200.0))
+        self.assertEqual(len(self.handshake.samples), 1)
+
+    def test_offer_takes_first_sample_after_the_step(self):
+        self.assertIsNone(self.handshake.offer(np.array([0.0]), np.array([1.0])))  # nothing pending yet
+        self.handshake.announce(3)
+        t_step = self.handshake._step.t
+        self.assertIsNone(self.handshake.offer(np.array([t_step - 1]), np.array([1.0])))
+        sample = self.handshake.offer(np.array([t_step - 1, t_step, t_step + 1]), np.array([1.0, 2.0, 3.0]))
+        self.assertEqual((sample.seq, sample.angle, sample.distance), (1, 3, 2.0))
+        self.assertIsNone(self.handshake.offer(np.array([t_step + 2]), np.array([4.0])))
+
+    def test_unanswered_step_counts_as_missed(self):
+        self.handshake.announce(1)
+        self.assertFalse(self.handshake.ready(timeout=0.01))
+        self.handshake.announce(2)
+        self.assertEqual(self.handshake.missed, 1)
+        self.assertEqual(self.handshake.complete(7.0).seq, 2)
+
+    def test_timeouts_return(self):
+        start = time.monotonic()
+        self.assertIsNone(self.handshake.wait_step(timeout=0.05))
+        self.handshake.announce(1)
+        self.assertFalse(self.handshake.ready(timeout=0.05))
+        self.assertLess(time.monotonic() - start, 2.0)
+
+    def test_close_wakes_waiters(self):
+        results = {}
+        unanswered = StepHandshake()
+        unanswered.announce(1)
+
+        def lidar():
+            results["step"] = self.handshake.wait_step()
+
+        def servo():
+            results["ready"] = unanswered.ready()
+
+        waiters = [threading.Thread(target=lidar), threading.Thread(target=servo)]
+        for thread in waiters:
+            thread.start()
+        time.sleep(0.05)
+        self.assertEqual(results, {})
+        self.handshake.close()
+        unanswered.close()
+        for thread in waiters:
+            thread.join(2)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(results, {"step": None, "ready": True})
+        self.assertIsNone(self.handshake.wait_step())
+
+class TestVirtualClockTimeouts(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start=10.0)
+        self.previous = set_clock(self.clock)
+        self.handshake = StepHandshake()
+
+    def tearDown(self):
+        set_clock(self.previous)
+
+    def test_timeouts_run_on_the_clock(self):
+        start = time.monotonic()
+        self.assertIsNone(self.handshake.wait_step(timeout=0.05))
+        self.assertAlmostEqual(self.clock.now(), 10.05)
+        self.handshake.announce(1)
+        self.assertFalse(self.handshake.ready(timeout=2.0))
+        self.assertAlmostEqual(self.clock.now(), 12.05)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_answer_scheduled_on_the_clock_ends_the_wait(self):
+        self.handshake.announce(4)
+        self.clock.schedule(0.0305, lambda: self.handshake.complete(40.0))
+        self.assertTrue(self.handshake.ready(timeout=1.0))
+        self.assertAlmostEqual(self.clock.now(), 10.031)
+        self.assertEqual(self.handshake.samples[-1].t_sample, 10.0305)
+        self.clock.schedule(0.2, lambda: self.handshake.announce(5))
+        self.assertEqual(self.handshake.wait_step().angle, 5)
+
+    def test_satisfied_wait_leaves_the_clock_alone(self):
+        self.assertTrue(self.handshake.ready(timeout=1.0))
+        self.handshake.announce(1)
+        self.assertEqual(self.handshake.wait_step(timeout=1.0).seq, 1)
+        self.assertEqual(self.clock.now(), 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
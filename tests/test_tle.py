@@ -0,0 +1,157 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import numpy as np
+from sgp4.api import Satrec
+from sgp4 import exporter
+from satellite_tracker import tle
+from satellite_tracker.thor_tletogui import satrec_to_valid_tle
+from satellite_tracker.tle import (
+    export_tle_catalog, format_tle_catalog, load_tle_catalog, parse_tle_catalog,
+    parse_tle_line2, satrecs_from_catalog, satrecs_to_catalog, tle_checksum,
+)
+
+ISS = [
+    "ISS (ZARYA)",
+    "1 25544U 98067A   08264.51782528 -.00002182  00000-0 -11606-4 0  2927",
+    "2 25544  51.6416 247.4627 0006703 130.5360 325.0288 15.72125391563537",
+]
+DRONE = [
+    "1 69420U          25232.29970000  .00000000  00000-0  00000+0 0    04",
+    "2 69420  45.0000 270.0000 0000000   0.0000   0.0000 15.22002539    00",
+]
+
+class TestCatalogParser(unittest.TestCase):
+    def test_fields(self):
+        catalog = parse_tle_catalog(ISS + DRONE)
+        self.assertEqual(len(catalog), 2)
+        iss, drone = catalog
+        self.assertEqual(iss["name"], b"ISS (ZARYA)")
+        self.assertEqual(iss["satnum"], 25544)
+        self.assertEqual(iss["intl_designator"], b"98067A")
+        self.assertEqual(iss["epoch_year"], 2008)
+        self.assertAlmostEqual(iss["epoch_day"], 264.51782528)
+        self.assertAlmostEqual(iss["mean_motion_dot"], -0.00002182)
+        self.assertAlmostEqual(iss["bstar"], -0.11606e-4)
+        self.assertEqual(iss["element_number"], 292)
+        self.assertEqual(iss["rev_number"], 56353)
+        self.assertEqual(drone["name"], b"")
+        self.assertEqual(drone["intl_designator"], b"")
+
+    def test_agrees_with_line2_parser(self):
+        record = parse_tle_catalog(ISS)[0]
+        expected = parse_tle_line2(ISS[2])
+        self.assertAlmostEqual(record["inclination"], expected["Inclination (deg)"])
+        self.assertAlmostEqual(record["raan"], expected["RAAN (deg)"])
+        self.assertAlmostEqual(record["eccentricity"], expected["Eccentricity"])
+        self.assertAlmostEqual(record["arg_perigee"], expected["Argument of Perigee (deg)"])
+        self.assertAlmostEqual(record["mean_anomaly"], expected["Mean Anomaly (deg)"])
+
+    def test_bad_checksum(self):
+        corrupted = ISS[:2] + [ISS[2][:-1] + str((int(ISS[2][-1]) + 1) % 10)]
+        self.assertEqual(tle_checksum(ISS[2]), int(ISS[2][-1]))
+        self.assertEqual(len(parse_tle_catalog(corrupted + DRONE)), 1)
+        self.assertEqual(len(parse_tle_catalog(corrupted, validate=False)), 1)
+        with self.assertRaises(ValueError):
+            parse_tle_catalog(corrupted, strict=True)
+
+    def test_satrecs_match_twoline2rv(self):
+        sat = satrecs_from_catalog(parse_tle_catalog(ISS))[0]
+        ref = Satrec.twoline2rv(ISS[1], ISS[2])
+        jd = ref.jdsatepoch + 0.5
+        np.testing.assert_allclose(sat.sgp4(jd, 0.0)[1], ref.sgp4(jd, 0.0)[1], atol=1e-3)
+
+class TestCatalogEncoder(unittest.TestCase):
+    def test_round_trip_text(self):
+        text = "\n".join(ISS + DRONE) + "\n"
+        self.assertEqual(format_tle_catalog(parse_tle_catalog(text.splitlines())), text)
+
+    def test_matches_sgp4_exporter(self):
+        sat = Satrec.twoline2rv(ISS[1], ISS[2])
+        self.assertEqual(satrec_to_valid_tle(sat), "\n".join(exporter.export_tle(sat)))
+
+    def test_exponent_fields(self):
+        catalog = parse_tle_catalog(ISS)
+        catalog["bstar"] = 0.999999e-3
+        catalog["mean_motion_ddot"] = -1.2345e-7
+        line1 = format_tle_catalog(catalog, names=False).splitlines()[0]
+        self.assertEqual(line1[44:61], "-12345-6  10000-2")
+        self.assertEqual(tle_checksum(line1), int(line1[68]))
+        np.testing.assert_allclose(parse_tle_catalog([line1, ISS[2]])["bstar"], 1e-3)
+
+    def test_alpha5_boundaries(self):
+        catalog = np.repeat(parse_tle_catalog(ISS), 3)
+        catalog["satnum"] = [99999, 100000, 339999]
+        lines = format_tle_catalog(catalog, names=False).splitlines()
+        self.assertEqual([line[2:7] for line in lines], ["99999", "99999", "A0000", "A0000", "Z9999", "Z9999"])
+        np.testing.assert_array_equal(parse_tle_catalog(lines, strict=True)["satnum"], catalog["satnum"])
+
+        catalog["satnum"][1] = 340000
+        with self.assertRaisesRegex(ValueError, "340000"):
+            format_tle_catalog(catalog)
+
+    def test_export_many_satrecs(self):
+        sats = [Satrec.twoline2rv(ISS[1], ISS[2]) for _ in range(50)]
+        catalog = satrecs_to_catalog(sats)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.txt")
+            export_tle_catalog(sats, path)
+            reread = parse_tle_catalog(path, strict=True)
+        self.assertEqual(len(reread), 50)
+        np.testing.assert_allclose(reread["mean_motion"], catalog["mean_motion"], rtol=1e-9)
+
+class TestCatalogCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "TLE.txt")
+        with open(self.source, "w") as f:
+            f.write("\n".join(ISS + DRONE) + "\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_is_memory_mapped(self):
+        first = load_tle_catalog(self.source)
+        self.assertTrue(os.path.exists(self.source + ".tlecache"))
+        second = load_tle_catalog(self.source)
+        self.assertIsInstance(second, np.memmap)
+        np.testing.assert_array_equal(first, parse_tle_catalog(self.source))
+        np.testing.assert_array_equal(second, first)
+
+    def test_touch_keeps_cache_and_edit_rebuilds_it(self):
+        load_tle_catalog(self.source)
+        cache = self.source + ".tlecache"
+        offset = tle._read_cache_header(cache)["offset"]
+        later = time.time() + 10
+        os.utime(self.source, (later, later))
+        load_tle_catalog(self.source)
+        header = tle._read_cache_header(cache)
+        self.assertEqual(header["offset"], offset)
+        self.assertEqual(header["source"]["mtime_ns"], os.stat(self.source).st_mtime_ns)
+        # the refreshed header spares later loads the hash
+        with mock.patch.object(tle, "_file_digest", side_effect=AssertionError("hashed")):
+            self.assertIsInstance(load_tle_catalog(self.source), np.memmap)
+
+        with open(self.source, "w") as f:
+            f.write("\n".join(ISS) + "\n")
+        self.assertEqual(len(load_tle_catalog(self.source)), 1)
+
+    def test_touch_with_longer_header_rewrites_cache(self):
+        os.utime(self.source, ns=(1, 1))
+        first = np.array(load_tle_catalog(self.source))
+        later = time.time() + 10
+        os.utime(self.source, (later, later))
+        np.testing.assert_array_equal(load_tle_catalog(self.source), first)
+        header = tle._read_cache_header(self.source + ".tlecache")
+        self.assertEqual(header["source"]["mtime_ns"], os.stat(self.source).st_mtime_ns)
+        np.testing.assert_array_equal(load_tle_catalog(self.source), first)
+
+    def test_corrupt_cache_is_rebuilt(self):
+        with open(self.source + ".tlecache", "wb") as f:
+            f.write(b"garbage")
+        self.assertEqual(len(load_tle_catalog(self.source)), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from satellite_tracker.utils import (
+    distance, distances_to, pairwise_distances, nearest_neighbors,
+    moving_average, smooth_path, smooth_stream, MovingAverage,
+)
+
+def naive_smooth(points, window):
+    return np.array([np.mean(points[i:i + window], axis=0) for i in range(len(points) - window + 1)])
+
+class TestDistances(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.a = rng.uniform(-100, 100, (37, 3))
+        self.b = rng.uniform(-100, 100, (53, 3))
+
+    def test_distances_to(self):
+        out = np.empty(len(self.b))
+        result = distances_to(self.a[0], self.b, out=out)
+        self.assertIs(result, out)
+        np.testing.assert_allclose(result, [distance(self.a[0], p) for p in self.b])
+
+    def test_pairwise_chunked(self):
+        expected = np.linalg.norm(self.a[:, None, :] - self.b[None, :, :], axis=2)
+        np.testing.assert_allclose(pairwise_distances(self.a, self.b, chunk_size=8), expected, atol=1e-9)
+
+    def test_nearest_neighbors(self):
+        idx, dist = nearest_neighbors(self.a, self.b, chunk_size=5)
+        expected = np.linalg.norm(self.a[:, None, :] - self.b[None, :, :], axis=2)
+        np.testing.assert_array_equal(idx, expected.argmin(axis=1))
+        np.testing.assert_allclose(dist, expected.min(axis=1), atol=1e-9)
+
+class TestSmoothing(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.points = np.cumsum(rng.normal(size=(500, 3)), axis=0) + 7000.0
+
+    def test_moving_average_matches_naive(self):
+        for window in (1, 3, 17):
+            np.testing.assert_allclose(moving_average(self.points, window),
+                                       naive_smooth(self.points, window), rtol=1e-10)
+
+    def test_smooth_path_short_track(self):
+        points = [(0, 0, 0), (1, 1, 1)]
+        result = smooth_path(points, 3)
+        self.assertIsInstance(result, np.ndarray)
+        np.testing.assert_array_equal(result, points)
+        self.assertIsInstance(smooth_path(self.points[:5], 3), np.ndarray)
+
+    def test_stream_matches_batch(self):
+        streamed = np.array(list(smooth_stream(self.points, 5)))
+        np.testing.assert_allclose(streamed, moving_average(self.points, 5), rtol=1e-10)
+
+    def test_push_reuses_output(self):
+        smoother = MovingAverage(window=2)
+        self.assertIsNone(smoother.push((0, 0, 0)))
+        first = smoother.push((2, 2, 2))
+        second = smoother.push((4, 4, 4))
+        self.assertIs(first, second)
+        np.testing.assert_array_equal(second, [3, 3, 3])
+
+if __name__ == '__main__':
+    unittest.main()